@@ -1,27 +1,40 @@
+import numpy as np
 import pandas as pd
 import random
-from collections import defaultdict
+import hashlib
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 import json
+import math
 import sys
 import time as _time
 
 # ===============================================================
-# Globals
+# Constants
 # ===============================================================
-TIME_SLOTS_FROM_DB = defaultdict(set)  # {"จันทร์": {8,9,...}, ...}
-SLOT_POOL = {}  # {"A101": ["จันทร์_8", ...], ...}
-
-# def normalize_locked_sections(locked_df):
-#     """
-#     Auto-increment section สำหรับ locked_courses.csv
-#     - จัดกลุ่มตาม (subject_code, curriculum_type)
-#     - ให้เลข section ไล่จาก 1, 2, 3, ...
-#     """
-#     locked_df = locked_df.copy()
-#     locked_df["section"] = (
-#         locked_df.groupby(["subject_code", "curriculum_type"]).cumcount() + 1
-#     )
-#     return locked_df
+# สถานะของแต่ละรอบ (เวลาใน TimeSlot, ปฏิทิน, pool ห้อง) อยู่ใน ProblemInstance
+# ที่ส่งต่อแบบ explicit ทั้งหมด — ไม่มี global ที่ถูกแก้ระหว่างรัน
+
+NO_SLOT = -1  # slot id แทน "NO_VALID_TIME_i" (หาเวลาให้ไม่ได้)
+
+
+def _locked_type_column(df):
+    """คอลัมน์ 'type' (theory/lab) ของ locked_df ที่ strip ชื่อคอลัมน์แล้ว"""
+    if "type" in df.columns:
+        return df["type"].astype(str).str.lower().str.strip()
+    # รองรับฟอร์แมตเก่า (theory_slot/lab_slot)
+    if "theory_slot" not in df.columns and "lab_slot" not in df.columns:
+        raise ValueError(
+            "locked_df ไม่มีคอลัมน์ type หรือ theory_slot/lab_slot ให้ระบุชนิดคลาส"
+        )
+
+    def slots(col):
+        if col not in df.columns:
+            return pd.Series(0, index=df.index)
+        return df[col].map(lambda x: int(x or 0))
+
+    lab_only = (slots("lab_slot") > 0) & (slots("theory_slot") == 0)
+    return pd.Series(np.where(lab_only, "lab", "theory"), index=df.index)
 
 
 def normalize_locked_sections(locked_df: pd.DataFrame) -> pd.DataFrame:
@@ -33,97 +46,64 @@ def normalize_locked_sections(locked_df: pd.DataFrame) -> pd.DataFrame:
         * ถ้าเป็น theory ซ้ำหลายแถว (type เดียวกัน) => เปิด 'sec ใหม่' ตามจำนวน
         * ถ้าเป็น lab-only (ไม่มี theory) => รวมเป็น 'sec เดียว'
     - ครูคนละคน (ในวิชาเดียวกัน) => เปิด sec ใหม่ตามลำดับที่พบ
+    คำนวณด้วย groupby/cumcount ทั้งตาราง (O(n log n)) ผลเหมือนเวอร์ชันวนลูปเดิม
+    (เทียบผลด้วย manage.py benchmark_locked_sections)
     """
     if locked_df is None or locked_df.empty:
         return locked_df
 
     df = locked_df.copy()
     df.columns = df.columns.str.strip()
-
-    # ---- เตรียมคอลัมน์ 'type' ให้พร้อม ----
-    if "type" not in df.columns:
-        # รองรับฟอร์แมตเก่า (theory_slot/lab_slot)
-        th = df.get("theory_slot")
-        lb = df.get("lab_slot")
-        if th is None and lb is None:
-            raise ValueError(
-                "locked_df ไม่มีคอลัมน์ type หรือ theory_slot/lab_slot ให้ระบุชนิดคลาส"
-            )
-        df["type"] = df.apply(
-            lambda r: (
-                "lab"
-                if int(r.get("lab_slot") or 0) > 0
-                and int(r.get("theory_slot") or 0) == 0
-                else "theory"
-            ),
-            axis=1,
+    df["type"] = _locked_type_column(df)
+
+    section = np.zeros(len(df), dtype=np.int64)
+    subject = df["subject_code"].reset_index(drop=True)
+    valid = subject.notna().to_numpy()  # แถวที่ไม่มีรหัสวิชาไม่ถูกจัดกลุ่ม (section 0)
+    if valid.any():
+        teacher = (
+            df["teacher_name"].astype(str).str.strip().reset_index(drop=True)
+            if "teacher_name" in df.columns
+            else pd.Series("", index=subject.index)
         )
-    else:
-        df["type"] = df["type"].astype(str).str.lower().str.strip()
-
-    # ---- เตรียมชื่ออาจารย์ให้เป็นมาตรฐาน (ถ้ามี normalize_teacher) ----
-    def _norm_teacher(x):
-        s = str(x).strip()
-        return s
-
-    df["teacher_norm"] = df.get("teacher_name", "").map(_norm_teacher)
-
-    # ---- สร้างคอลัมน์ section (ค่าเริ่ม 0) ----
-    df["section"] = 0
-
-    # ---- เดินทีละวิชา (subject_code) และจัดเลข sec ตามกติกา ----
-    # ใช้อินเด็กซ์เดิมเพื่อคงลำดับที่ผู้ใช้กรอก
-    for subject_code, g in df.groupby("subject_code", sort=False):
-        sec_counter = 0
-
-        # เดินตาม "ครู" ในลำดับที่ปรากฏในไฟล์
-        teachers_in_order = g.drop_duplicates(subset=["teacher_norm"])[
-            "teacher_norm"
-        ].tolist()
-
-        for teacher in teachers_in_order:
-            mask_teacher = (df["subject_code"] == subject_code) & (
-                df["teacher_norm"] == teacher
+        kind = df["type"].reset_index(drop=True)
+        rows = pd.DataFrame(
+            {"subject": subject, "teacher": teacher, "kind": kind}
+        )[valid]
+
+        # คู่ (วิชา, ครู) เรียงตามลำดับที่พบ → ครูแต่ละคนกิน sec กี่ตัวในวิชานั้น
+        rows["pair"] = rows.groupby(["subject", "teacher"], sort=False).ngroup()
+        theory = rows["kind"] == "theory"
+        lab = rows["kind"] == "lab"
+        pairs = pd.DataFrame(
+            {
+                "subject": rows.groupby("pair")["subject"].first(),
+                "theory": theory.groupby(rows["pair"]).sum(),
+                "lab": lab.groupby(rows["pair"]).any(),
+            }
+        )
+        pairs["used"] = np.where(pairs["theory"] > 0, pairs["theory"], pairs["lab"].astype(int))
+        # sec ก่อนหน้าของครูคนนี้ในวิชาเดียวกัน (ครูที่พบก่อนได้เลขก่อน)
+        pairs["before"] = pairs.groupby("subject", sort=False)["used"].cumsum() - pairs["used"]
+        subject_total = pairs.groupby("subject", sort=False)["used"].sum()
+
+        before = pairs["before"].to_numpy()[rows["pair"].to_numpy()]
+        sec = np.zeros(len(rows), dtype=np.int64)
+        # theory แต่ละแถว = sec ใหม่; lab ทั้งหมดของครูอยู่ sec แรกของครูคนนั้น
+        sec[theory.to_numpy()] = (
+            before[theory.to_numpy()] + rows[theory].groupby("pair").cumcount().to_numpy() + 1
+        )
+        sec[lab.to_numpy()] = before[lab.to_numpy()] + 1
+        # type อื่น ๆ: ต่อท้ายทุก sec ของวิชานั้นทีละแถว
+        other = ~(theory | lab)
+        if other.any():
+            sec[other.to_numpy()] = (
+                rows.loc[other, "subject"].map(subject_total).to_numpy()
+                + rows[other].groupby("subject", sort=False).cumcount().to_numpy()
+                + 1
             )
+        section[valid] = sec
 
-            idx_theory = df.index[mask_teacher & (df["type"] == "theory")].tolist()
-            idx_lab = df.index[mask_teacher & (df["type"] == "lab")].tolist()
-
-            if len(idx_theory) > 0:
-                # สร้าง sec ใหม่ตามจำนวน 'theory' ที่พบ (theory ซ้ำ = คนละ sec)
-                sec_ids_for_this_teacher = []
-                for idx in idx_theory:
-                    sec_counter += 1
-                    df.at[idx, "section"] = sec_counter
-                    sec_ids_for_this_teacher.append(sec_counter)
-
-                # แนบ lab ทั้งหมด (ถ้ามี) เข้ากับ 'sec แรก' ของครูคนนี้
-                if len(idx_lab) > 0:
-                    first_sec = sec_ids_for_this_teacher[0]
-                    for idx in idx_lab:
-                        df.at[idx, "section"] = first_sec
-            else:
-                # ไม่มี theory เลย แต่มี lab → รวม lab เป็น sec เดียว
-                if len(idx_lab) > 0:
-                    sec_counter += 1
-                    for idx in idx_lab:
-                        df.at[idx, "section"] = sec_counter
-
-        # ปิดกลุ่ม: ถ้าเผื่อมีแถวไหนยังไม่ได้ section (กรณีพิเศษ) ให้กันรันตก
-        unassigned = df.index[
-            (df["subject_code"] == subject_code) & (df["section"] == 0)
-        ].tolist()
-        if unassigned:
-            for idx in unassigned:
-                sec_counter += 1
-                df.at[idx, "section"] = sec_counter
-
-    # เก็บงาน: ไม่ต้องใช้คอลัมน์ช่วยแล้ว
-    df.drop(columns=["teacher_norm"], inplace=True)
-
-    # ให้ section เป็น int ชัดเจน
-    df["section"] = df["section"].astype(int)
-
+    df["section"] = section.astype(int)
     return df
 
 
@@ -132,14 +112,13 @@ def normalize_locked_sections(locked_df: pd.DataFrame) -> pd.DataFrame:
 # ===============================================================
 def preprocess_time_slots(timeslot_df):
     """
-    เติม TIME_SLOTS_FROM_DB จาก TimeSlot.csv
+    คืน {day: set(hours)} จาก TimeSlot.csv
     รองรับทั้งคอลัมน์ (day, hour) และ (day_of_week, start_time, stop_time)
     """
-    global TIME_SLOTS_FROM_DB
-    TIME_SLOTS_FROM_DB.clear()
+    time_slots = defaultdict(set)  # {"จันทร์": {8,9,...}, ...}
 
     if timeslot_df is None or timeslot_df.empty:
-        return
+        return time_slots
 
     df = timeslot_df.copy()
     df.columns = df.columns.str.lower().str.strip()
@@ -151,7 +130,7 @@ def preprocess_time_slots(timeslot_df):
                 h = int(row["hour"])
             except Exception:
                 continue
-            TIME_SLOTS_FROM_DB[d].add(h)
+            time_slots[d].add(h)
 
     elif {"day_of_week", "start_time", "stop_time"}.issubset(df.columns):
         for _, row in df.iterrows():
@@ -161,314 +140,1238 @@ def preprocess_time_slots(timeslot_df):
             except Exception:
                 continue
             for h in range(st, en):
-                TIME_SLOTS_FROM_DB[d].add(h)
+                time_slots[d].add(h)
+
+    return time_slots
 
 
 # ===============================================================
-# Build SLOT_POOL (room × all available times from TimeSlot.csv)
+# Slot calendar: แปลง "day_hour" → slot id (int) ครั้งเดียวต่อรอบ
 # ===============================================================
-def build_slot_pool(timeslot_df, room_df):
+def _split_time_label(ts):
+    """แยก "จันทร์_8" → ("จันทร์", 8); ถ้าแยกไม่ได้คืน None"""
+    if "_" not in ts:
+        return None
+    d, h = ts.split("_", 1)
+    try:
+        return d, int(h)
+    except ValueError:
+        return None
+
+
+class SlotCalendar:
     """
-    สร้าง SLOT_POOL โดย "ทุกห้อง" จะได้รายการ time slot ทั้งหมดจาก TimeSlot.csv ตั้งต้นเท่ากัน
-    (ต่อไปเมื่อมีการจอง จะลบ slot ออกจาก pool ของห้องนั้น ๆ)
+    ปฏิทินสลอตที่ compile แล้ว: ทุก (day, hour) มี slot id เป็นเลขจำนวนเต็มต่อเนื่อง 0..n-1
+    - เรียง id ตาม (day, hour) แบบเดียวกับลำดับของ slot pool
+      (ดังนั้น sorted(ids) == เรียงตามวัน/ชั่วโมง)
+    - day_of[i], hour_of[i]: วัน/ชั่วโมงของ slot i (ไม่ต้อง split สตริงอีก)
+    - next_same_day[i]: slot ของชั่วโมงถัดไปในวันเดียวกัน หรือ NO_SLOT
+    - in_db[i]: True ถ้า slot มาจาก TimeSlot จริง (False = เวลาที่ถูกล็อก/บล็อกนอกตาราง)
+    - time_slots: {day: frozenset(hours)} ของ TimeSlot (ใช้กับกฎชั่วโมงของหลักสูตร)
+    - legal_mask(curriculum): np.ndarray[bool] ต่อ slot ว่าหลักสูตรเรียนชั่วโมงนั้นได้ไหม
+      (compile ตอนสร้างจาก curriculum_hours ครบทุกหลักสูตร; หลักสูตรที่ไม่รู้จัก = False ทั้งหมด)
     """
-    global SLOT_POOL
-    SLOT_POOL = {}
-
-    if timeslot_df is None or timeslot_df.empty or room_df is None or room_df.empty:
-        return
 
-    df = timeslot_df.copy()
-    df.columns = df.columns.str.lower().str.strip()
+    __slots__ = (
+        "labels", "day_of", "hour_of", "next_same_day", "in_db", "time_slots",
+        "curriculum_hours", "_ids", "_legal",
+    )
 
-    all_times = []
-    if {"day", "hour"}.issubset(df.columns):
-        for _, row in df.iterrows():
-            d = str(row["day"]).strip()
-            try:
-                h = int(row["hour"])
-            except Exception:
-                continue
-            all_times.append(f"{d}_{h}")
+    def __init__(self, db_pairs, extra_pairs=(), curriculum_hours=None):
+        db_pairs = set(db_pairs)
+        pairs = sorted(db_pairs | set(extra_pairs))
+
+        hours_by_day = defaultdict(set)
+        for d, h in db_pairs:
+            hours_by_day[d].add(h)
+        self.time_slots = {d: frozenset(hours) for d, hours in hours_by_day.items()}
+
+        self._ids = {p: i for i, p in enumerate(pairs)}
+        self.day_of = tuple(d for d, _ in pairs)
+        self.hour_of = tuple(h for _, h in pairs)
+        self.labels = tuple(f"{d}_{h}" for d, h in pairs)
+        self.in_db = tuple(p in db_pairs for p in pairs)
+        self.next_same_day = tuple(
+            self._ids.get((d, h + 1), NO_SLOT) for d, h in pairs
+        )
 
-    elif {"day_of_week", "start_time", "stop_time"}.issubset(df.columns):
-        for _, row in df.iterrows():
-            d = str(row["day_of_week"]).strip()
-            try:
-                st, en = int(row["start_time"]), int(row["stop_time"])
-            except Exception:
-                continue
-            for h in range(st, en):
-                all_times.append(f"{d}_{h}")
+        # ตารางความถูกต้อง (หลักสูตร × slot): เฉพาะ slot จาก TimeSlot ที่อยู่ในช่วงของหลักสูตร
+        self.curriculum_hours = dict(
+            CURRICULUM_HOURS if curriculum_hours is None else curriculum_hours
+        )
+        hour_of = np.array(self.hour_of, dtype=np.int64)
+        in_db = np.array(self.in_db, dtype=bool)
+        day_of = np.array(self.day_of, dtype=object)
+        self._legal = {}
+        for cur, windows in self.curriculum_hours.items():
+            mask = np.zeros(len(pairs), dtype=bool)
+            for days, lo, hi in windows:
+                on_day = np.isin(day_of, list(days))
+                mask |= on_day & (hour_of >= lo) & (hour_of <= hi)
+            mask &= in_db
+            mask.flags.writeable = False
+            self._legal[cur] = mask
+        self._legal[None] = np.zeros(len(pairs), dtype=bool)
+        self._legal[None].flags.writeable = False
+
+    def __len__(self):
+        return len(self.labels)
+
+    def parse(self, ts):
+        """แปลงสตริง "day_hour" → slot id (NO_SLOT ถ้าไม่รู้จัก)"""
+        pair = _split_time_label(ts)
+        return self._ids.get(pair, NO_SLOT) if pair else NO_SLOT
+
+    def legal_mask(self, curriculum_type):
+        """np.ndarray[bool] (อ่านอย่างเดียว) ของ slot ที่หลักสูตรนี้เรียนได้"""
+        return self._legal.get(curriculum_type, self._legal[None])
+
+    def db_slots(self):
+        """slot id ทั้งหมดที่มาจาก TimeSlot (เรียงตามวัน/ชั่วโมง)"""
+        return [i for i, ok in enumerate(self.in_db) if ok]
+
+
+def compile_slot_calendar(time_slots, extra_times=(), curriculum_hours=None):
+    """
+    สร้าง SlotCalendar จาก {day: hours} (ผลของ preprocess_time_slots)
+    extra_times: สตริง "day_hour" เพิ่มเติม (เวลาของ locked/activities ที่อาจอยู่นอก TimeSlot)
+    curriculum_hours: ช่วงชั่วโมงของแต่ละหลักสูตร (None = CURRICULUM_HOURS)
+    """
+    db_pairs = [(d, h) for d, hours in time_slots.items() for h in hours]
+    extra_pairs = [p for p in map(_split_time_label, extra_times) if p]
+    return SlotCalendar(db_pairs, extra_pairs, curriculum_hours)
 
-    # unique + sorted by (day string, hour int)
-    def _key(ts):
-        d, h = ts.split("_")
-        return (d, int(h))
 
-    all_times = sorted(set(all_times), key=_key)
+# ===============================================================
+# Build slot pool (room × all available times from TimeSlot.csv)
+# ===============================================================
+def build_slot_pool(calendar, rooms):
+    """
+    คืน slot pool {room: tuple(slot ids)} โดย "ทุกห้อง" (ใน RoomCatalog)
+    จะได้รายการ slot id ทั้งหมดจาก TimeSlot ตั้งต้นเท่ากัน
+    (individual แต่ละตัวจะ copy ไปเป็น SlotPool แล้วลบ slot ที่จองออก)
+    """
+    if calendar is None or not len(rooms):
+        return {}
 
-    for _, r in room_df.iterrows():
-        room = str(r.get("room_name", "")).strip()
-        if room:
-            SLOT_POOL[room] = list(all_times)
+    # เรียงตาม (day string, hour int) อยู่แล้วจากลำดับ slot id
+    all_times = tuple(calendar.db_slots())
+    return {room: all_times for room in rooms.rooms}
 
 
 # ===============================================================
 # Check time กันข้อมูลไม่เพียงพอในการจัด
 # ===============================================================
-def precheck_capacity_or_raise(courses, room_df, locked_classes, locked_activity_df):
-    """
-    เช็คว่า 'ชั่วโมงที่ต้องใช้' (ตาม room_type, curriculum_type) <= 'ชั่วโมงที่มีให้ใช้จริง'
-    ถ้าไม่พอ: raise RuntimeError พร้อมรายละเอียด และหยุดโปรแกรม
-    """
-    # 1) สร้างชุดเวลาที่ถูกบล็อก (กิจกรรม) + การใช้ห้องที่ล็อกไว้แล้ว
-    blocked = get_blocked_times_from_activities(locked_activity_df)
-    locked_room_usage = set()
-    for it in locked_classes:
-        room = it.get("room")
-        if room and room != "NO_VALID_ROOM":
-            for t in it.get("time", []):
-                if "NO_VALID_TIME" in t:
-                    continue
-                locked_room_usage.add((room, t))
-
-    # 2) แผนที่ room -> room_type (lower-case)
-    room_df_local = room_df.copy()
-    room_df_local["room_name"] = room_df_local["room_name"].astype(str).str.strip()
-    room_df_local["room_type"] = (
-        room_df_local["room_type"].astype(str).str.lower().str.strip()
-    )
-    room_type_by_room = dict(
-        zip(room_df_local["room_name"], room_df_local["room_type"])
-    )
-
-    # 3) ความจุ (capacity) ต่อคู่ (room_type, curriculum_type)
-    #    นับจำนวน (room, time) ที่ยังว่างจริง และ 'ชั่วโมง' นั้นอยู่ในเกณฑ์หลักสูตร (get_hours_for_day)
-    capacity = defaultdict(int)
-    for room, slots in SLOT_POOL.items():
-        rt = room_type_by_room.get(room, "")
-        if not rt:
-            continue
-        slot_set = set(slots)  # ช่องที่เหลืออยู่ใน pool
-        # ลบที่ถูกบล็อกทั่วระบบ + ที่ล็อกห้องนั้นไว้แล้ว
-        slot_set -= blocked
-        slot_set -= {t for r, t in locked_room_usage if r == room}
-
-        # ตรวจตามกฎชั่วโมงของหลักสูตร
-        for cur in ["ภาคปกติ", "ภาคพิเศษ"]:
-            ok = 0
-            for ts in slot_set:
-                if "_" not in ts:
-                    continue
-                d, h = ts.split("_", 1)
-                try:
-                    h = int(h)
-                except Exception:
-                    continue
-                if h in set(get_hours_for_day(d, cur)):
-                    ok += 1
-            capacity[(rt, cur)] += ok
+def _max_flow(n_nodes, edges, source, sink):
+    """
+    max flow แบบ Dinic สำหรับกราฟเล็ก (ไม่กี่ชั้น)
+    edges = [(u, v, capacity), ...] → (ค่า flow รวม, flow ของแต่ละ edge ตามลำดับ)
+    """
+    graph = [[] for _ in range(n_nodes)]
+    head, cap = [], []
+    for u, v, c in edges:
+        graph[u].append(len(head))
+        head.append(v)
+        cap.append(int(c))
+        graph[v].append(len(head))
+        head.append(u)
+        cap.append(0)
+
+    def push(u, limit, level, it):
+        if u == sink:
+            return limit
+        while it[u] < len(graph[u]):
+            e = graph[u][it[u]]
+            v = head[e]
+            if cap[e] > 0 and level[v] == level[u] + 1:
+                got = push(v, min(limit, cap[e]), level, it)
+                if got:
+                    cap[e] -= got
+                    cap[e ^ 1] += got
+                    return got
+            it[u] += 1
+        return 0
+
+    total = 0
+    while True:
+        level = [-1] * n_nodes
+        level[source] = 0
+        queue = deque([source])
+        while queue:
+            u = queue.popleft()
+            for e in graph[u]:
+                if cap[e] > 0 and level[head[e]] < 0:
+                    level[head[e]] = level[u] + 1
+                    queue.append(head[e])
+        if level[sink] < 0:
+            break
+        it = [0] * n_nodes
+        while True:
+            got = push(source, float("inf"), level, it)
+            if not got:
+                break
+            total += got
+    return total, [cap[2 * k + 1] for k in range(len(edges))]
+
+
+def _run_supply(free, link, day_of_slot, n_days, lengths):
+    """
+    ความจุของช่วงต่อเนื่องต่อ (แถว, วัน) แบบ vectorized
+    free: bool (แถว × slot), link[s] = True ถ้า s+1 คือชั่วโมงถัดไปในวันเดียวกัน
+    คืน (ชั่วโมงว่างรวม (แถว × วัน), {h: ชั่วโมงที่ใช้วางช่วงยาว h ได้จริง (แถว × วัน)})
+    ช่วงว่างยาว L วางช่วงยาว h ได้ floor(L / h) ช่วง = floor(L / h)·h ชั่วโมง
+    """
+    rows, n_slots = free.shape
+    joined = np.zeros_like(free)
+    joined[:, 1:] = free[:, :-1] & link[None, :-1]
+    first = (free & ~joined).ravel()
+    run_id = np.cumsum(first) - 1
+    run_len = np.bincount(run_id[free.ravel()], minlength=int(first.sum()))
+    pos = np.flatnonzero(first)
+    run_row, run_day = pos // n_slots, day_of_slot[pos % n_slots]
+
+    hours = np.zeros((rows, n_days), dtype=np.int64)
+    np.add.at(hours, (run_row, run_day), run_len)
+    usable = {}
+    for h in lengths:
+        usable[h] = np.zeros((rows, n_days), dtype=np.int64)
+        np.add.at(usable[h], (run_row, run_day), run_len // h * h)
+    return hours, usable
+
+
+class FeasibilityReport:
+    """
+    ผลของ analyze_feasibility (แต่ละรายการเป็น tuple ที่อ่านง่าย):
+    - room_types: (room_type, curriculum, ต้องการ ชม., มี ชม.) — ชั่วโมงรวมไม่พอ
+    - room_blocks: (room_type, curriculum, ชั่วโมงต่อช่วง, ต้องการกี่ช่วง, วางได้กี่ช่วง)
+      — ชั่วโมงรวมพอ แต่ช่วงว่างต่อเนื่องรายวันไม่พอ (ตรวจด้วย max flow)
+    - teachers: (อาจารย์, ต้องสอน ชม., มีเวลาว่าง ชม.) — ชั่วโมงรวมไม่พอ
+    - teacher_blocks: (อาจารย์, ต้องสอน ชม., วางเป็นช่วงต่อเนื่องได้ ชม.)
+    ok = ไม่มีปัญหาเลย; lines() = ข้อความสรุปสำหรับแจ้งผู้ใช้
+    """
 
-    # 4) อุปสงค์ (demand): รวมชั่วโมงที่ต้องใช้จาก courses ตาม (room_type, curriculum_type)
-    demand = defaultdict(int)
-    for c in courses:
-        demand[(c["room_type"], c.get("curriculum_type", "ภาคปกติ"))] += int(c["hours"])
+    def __init__(self):
+        self.room_types = []
+        self.room_blocks = []
+        self.teachers = []
+        self.teacher_blocks = []
+        self.elapsed_sec = 0.0
 
-    # 5) เปรียบเทียบแล้วสรุปปัญหา
-    problems = []
-    for key, need in demand.items():
-        cap = capacity.get(key, 0)
-        if cap < need:
-            rt, cur = key
-            problems.append((rt, cur, need, cap))
+    @property
+    def ok(self):
+        return not (self.room_types or self.room_blocks or self.teachers or self.teacher_blocks)
 
-    if problems:
+    def lines(self):
         lines = ["❌ เวลาที่มี ‘ไม่พอ’ ต่อไปนี้:"]
-        for rt, cur, need, cap in problems:
+        for rt, cur, need, cap in self.room_types:
             lines.append(
                 f"- curriculum='{cur}', room_type='{rt}': ต้องการ {need} ชม. แต่มีแค่ {cap} ชม."
             )
+        for rt, cur, h, need, fit in self.room_blocks:
+            lines.append(
+                f"- curriculum='{cur}', room_type='{rt}': ต้องการช่วงต่อเนื่อง {h} ชม. {need} ช่วง"
+                f" แต่วางได้แค่ {fit} ช่วง"
+            )
+        for teacher, need, avail in self.teachers:
+            lines.append(
+                f"- อาจารย์ '{teacher}': ต้องสอน {need} ชม. แต่มีเวลาว่างตามหลักสูตรแค่ {avail} ชม."
+            )
+        for teacher, need, fit in self.teacher_blocks:
+            lines.append(
+                f"- อาจารย์ '{teacher}': ต้องสอน {need} ชม. แต่จัดเป็นช่วงต่อเนื่องรายวันได้แค่ {fit} ชม."
+            )
+        return lines
+
+
+def _block_flow(demand, supply, hours, usable):
+    """
+    max flow ของ demand {(key, h): จำนวนช่วง} → ช่องรายวัน (แถว, วัน)
+    supply(key) = แถวที่ key ใช้ได้; hours[r, d] = ชั่วโมงว่างของแถว r วัน d
+    usable[(key, h)][r, d] = ชั่วโมงที่วางช่วงยาว h ของ key ได้
+    คืน {(key, h): จำนวนช่วงที่วางได้}
+    """
+    demand_keys = list(demand)
+    n_rows, n_days = hours.shape
+    source, sink = 0, 1
+    cell = lambda r, d: 2 + len(demand_keys) + r * n_days + d
+    edges, first_edge = [], []
+    for k, (key, h) in enumerate(demand_keys):
+        first_edge.append(len(edges))
+        edges.append((source, 2 + k, demand[(key, h)] * h))
+        cap = usable[(key, h)]
+        for r in supply(key):
+            for d in np.flatnonzero(cap[r]):
+                edges.append((2 + k, cell(r, d), int(cap[r, d])))
+    for r, d in zip(*np.nonzero(hours)):
+        edges.append((cell(r, d), sink, int(hours[r, d])))
+    _, flows = _max_flow(2 + len(demand_keys) + n_rows * n_days, edges, source, sink)
+    return {
+        (key, h): flows[first_edge[k]] // h for k, (key, h) in enumerate(demand_keys)
+    }
+
+
+def analyze_feasibility(problem):
+    """
+    วิเคราะห์ว่าโจทย์ "เป็นไปได้" หรือไม่ก่อนรัน GA (ข้อมูลจำเป็น ไม่ใช่เพียงพอ) → FeasibilityReport
+    1) ชั่วโมงต่อ (room_type, curriculum): ชั่วโมงของวิชาที่ยังไม่ล็อก ≤ (ห้อง, slot) ที่ว่างจริง
+       และถูกหลักสูตร (นับด้วย numpy ทั้งเมทริกซ์ห้อง × slot)
+    2) ภาระอาจารย์: ชั่วโมงที่ต้องสอน ≤ slot ที่อาจารย์ยังว่าง (หักของที่ล็อก/กิจกรรม) ในหลักสูตรที่สอน
+    3) ช่วงต่อเนื่อง: max flow จากอุปสงค์ (room_type, curriculum, ชั่วโมงต่อช่วง) ไปยัง
+       ช่วงว่างรายวันของแต่ละห้อง (ช่วงว่างยาว L รับช่วงยาว h ได้ floor(L / h) ช่วง)
+       และแบบเดียวกันต่ออาจารย์ (ช่วงว่างรายวันของอาจารย์)
+    """
+    t0 = _time.perf_counter()
+    report = FeasibilityReport()
+    cal = problem.calendar
+    rooms = problem.rooms
+    n_slots = len(cal)
+    table = problem.course_table
+    courses = [table.courses[i] for i in np.flatnonzero(~table.locked)]
+    if not courses or not n_slots:
+        report.elapsed_sec = _time.perf_counter() - t0
+        return report
+
+    blocked = np.zeros(n_slots, dtype=bool)
+    blocked[list(problem.blocked_slots)] = True
+    days = list(dict.fromkeys(cal.day_of))
+    day_of_slot = np.array([days.index(d) for d in cal.day_of], dtype=np.int64)
+    link = np.array([nxt == s + 1 for s, nxt in enumerate(cal.next_same_day)], dtype=bool)
+    curricula = sorted({c.get("curriculum_type", "ภาคปกติ") for c in courses})
+    legal = {cur: curriculum_slot_mask(cal, cur) for cur in curricula}
+
+    # ---------- ห้อง: เมทริกซ์ (ห้อง × slot) ที่ยังว่างจริง ----------
+    room_names = list(problem.slot_pool)
+    room_row = {r: i for i, r in enumerate(room_names)}
+    free = np.zeros((len(room_names), n_slots), dtype=bool)
+    for r, slots in problem.slot_pool.items():
+        free[room_row[r], list(slots)] = True
+    free &= ~blocked
+    for it in problem.locked_classes:
+        r = room_row.get(it.get("room"))
+        if r is not None:
+            free[r, [t for t in it.get("time", []) if t != NO_SLOT]] = False
+    rows_of_type = defaultdict(list)
+    for r in room_names:
+        rows_of_type[rooms.room_type_of.get(r, "")].append(room_row[r])
+
+    need_hours = defaultdict(int)
+    blocks = defaultdict(int)
+    for c in courses:
+        key = (rooms.normalize_type(c["room_type"]), c.get("curriculum_type", "ภาคปกติ"))
+        need_hours[key] += int(c["hours"])
+        blocks[(key, int(c["hours"]))] += 1
+
+    for (rt, cur), need in sorted(need_hours.items()):
+        cap = int((free[rows_of_type.get(rt, [])] & legal[cur]).sum())
+        if cap < need:
+            report.room_types.append((rt, cur, need, cap))
+
+    # ช่วงต่อเนื่องรายวัน (ข้าม key ที่ชั่วโมงรวมไม่พออยู่แล้ว)
+    short = {(rt, cur) for rt, cur, _, _ in report.room_types}
+    demand = {k: n for k, n in blocks.items() if k[0] not in short and k[0][0] in rows_of_type}
+    if demand:
+        hours, _ = _run_supply(free, link, day_of_slot, len(days), ())
+        usable = {}
+        for cur in curricula:
+            lengths = {h for (key, h) in demand if key[1] == cur}
+            _, by_len = _run_supply(free & legal[cur], link, day_of_slot, len(days), lengths)
+            for (key, h) in demand:
+                if key[1] == cur:
+                    usable[(key, h)] = by_len[h]
+        fit = _block_flow(demand, lambda key: rows_of_type[key[0]], hours, usable)
+        for ((rt, cur), h), n in sorted(demand.items()):
+            if fit[((rt, cur), h)] < n:
+                report.room_blocks.append((rt, cur, h, n, fit[((rt, cur), h)]))
+
+    # ---------- อาจารย์: เมทริกซ์ (อาจารย์ × slot) ที่ยังว่าง ----------
+    teachers = sorted({c["teacher"] for c in courses if c["teacher"]})
+    teacher_row = {t: i for i, t in enumerate(teachers)}
+    t_free = np.tile(np.array(cal.in_db, dtype=bool) & ~blocked, (len(teachers), 1))
+    for it in problem.locked_classes:
+        r = teacher_row.get(it.get("teacher"))
+        if r is not None:
+            t_free[r, [t for t in it.get("time", []) if t != NO_SLOT]] = False
+
+    t_need = defaultdict(int)
+    t_blocks = defaultdict(int)
+    t_legal = np.zeros_like(t_free)
+    for c in courses:
+        r = teacher_row.get(c["teacher"])
+        if r is None:
+            continue
+        cur = c.get("curriculum_type", "ภาคปกติ")
+        t_need[r] += int(c["hours"])
+        t_blocks[((r, cur), int(c["hours"]))] += 1
+        t_legal[r] |= legal[cur]
+
+    avail = (t_free & t_legal).sum(axis=1)
+    overloaded = set()
+    for r, need in sorted(t_need.items()):
+        if avail[r] < need:
+            overloaded.add(r)
+            report.teachers.append((teachers[r], need, int(avail[r])))
+
+    # ช่วงต่อเนื่องของอาจารย์ที่ชั่วโมงรวมพอ (flow แยกต่ออาจารย์)
+    by_teacher = defaultdict(dict)
+    for ((r, cur), h), n in t_blocks.items():
+        if r not in overloaded:
+            by_teacher[r][((r, cur), h)] = n
+    for r, demand in sorted(by_teacher.items()):
+        row = t_free[r : r + 1]
+        hours, _ = _run_supply(row & t_legal[r], link, day_of_slot, len(days), ())
+        usable = {}
+        for cur in {key[1] for key, _ in demand}:
+            lengths = {h for (key, h) in demand if key[1] == cur}
+            _, by_len = _run_supply(row & legal[cur], link, day_of_slot, len(days), lengths)
+            for (key, h) in demand:
+                if key[1] == cur:
+                    usable[(key, h)] = by_len[h]
+        fit = _block_flow(demand, lambda key: (0,), hours, usable)
+        placed = sum(fit[k] * k[1] for k in demand)
+        if placed < t_need[r]:
+            report.teacher_blocks.append((teachers[r], t_need[r], placed))
+
+    report.elapsed_sec = _time.perf_counter() - t0
+    return report
+
+
+def precheck_capacity_or_raise(problem):
+    """
+    ตรวจความเป็นไปได้ด้วย analyze_feasibility
+    ถ้าไม่พอ: raise RuntimeError พร้อมรายละเอียด (ห้อง/อาจารย์ที่เกิน) และหยุดโปรแกรม
+    """
+    report = analyze_feasibility(problem)
+    if not report.ok:
+        lines = report.lines()
         lines.append("โปรดเพิ่มช่องเวลา/เพิ่มห้อง/ลดล็อก หรือปรับชั่วโมงรายวิชา ก่อนค่อยรัน GA")
         raise RuntimeError("\n".join(lines))
+    return report
 
 
 # ===============================================================
 # Curriculum helpers (วัน/ชั่วโมงที่อนุญาต)
 # ===============================================================
-def get_valid_days_and_hours(curriculum_type):
+# ช่วงชั่วโมงที่แต่ละหลักสูตรเรียนได้ (ข้อมูล ไม่ใช่เงื่อนไขในโค้ด): {หลักสูตร: ((วัน, ชั่วโมงแรก, ชั่วโมงสุดท้าย), ...)}
+# ชั่วโมง h ใช้ได้ถ้า lo <= h <= hi และอยู่ใน TimeSlot ของวันนั้น; หลักสูตรที่ไม่มีในนี้ใช้ไม่ได้ทุกชั่วโมง
+WEEKDAYS = ("จันทร์", "อังคาร", "พุธ", "พฤหัสบดี", "ศุกร์")
+WEEKENDS = ("เสาร์", "อาทิตย์")
+CURRICULUM_HOURS = {
+    "ภาคปกติ": ((WEEKDAYS, 8, 19),),
+    "ภาคพิเศษ": ((WEEKDAYS, 17, 22), (WEEKENDS, 7, 22)),
+}
+
+
+def curriculum_slot_mask(calendar, curriculum_type):
     """
-    คืน (valid_days, hours_by_day) จาก TIME_SLOTS_FROM_DB ตามประเภทหลักสูตร
+    คืน np.ndarray[bool] ยาวเท่าจำนวน slot: True ถ้าชั่วโมงของ slot นั้นถูกหลักสูตร
+    (ตาราง compile ไว้แล้วใน SlotCalendar — อ่านอย่างเดียว)
     """
-    days_in_db = list(TIME_SLOTS_FROM_DB.keys())
-    weekdays = ["จันทร์", "อังคาร", "พุธ", "พฤหัสบดี", "ศุกร์"]
-    weekends = ["เสาร์", "อาทิตย์"]
+    return calendar.legal_mask(curriculum_type)
 
-    if curriculum_type == "ภาคปกติ":
-        valid_days = [d for d in days_in_db if d in weekdays]
-    else:
-        # ภาคพิเศษ: เปิดทั้ง จ–ศ และ เสาร์–อาทิตย์ (แต่ชั่วโมงต่างกันใน get_hours_for_day)
-        valid_days = [d for d in days_in_db if d in weekdays or d in weekends]
 
-    hours_by_day = {d: sorted(TIME_SLOTS_FROM_DB[d]) for d in valid_days}
-    return valid_days, hours_by_day
+# ===============================================================
+# Room helpers
+# ===============================================================
+class RoomCatalog:
+    """
+    ดัชนีห้องที่สร้างครั้งเดียวต่อรอบจาก room_df (แทนการกรอง DataFrame ทุกครั้งที่ต้องหาห้อง)
+    - rooms: ชื่อห้องทั้งหมดตามลำดับใน room_df (ชื่อห้องคือ id ของห้องทั้งระบบ)
+    - room_type_of[room]: ประเภทห้องที่ normalize แล้ว (lower + strip)
+    - rooms_for(room_type): tuple ของห้องที่รองรับประเภทนั้น (ลำดับเดียวกับใน room_df)
+    """
+
+    __slots__ = ("rooms", "room_type_of", "_by_type")
+
+    def __init__(self, room_df):
+        self.rooms = ()
+        self.room_type_of = {}
+        by_type = defaultdict(list)
+        if room_df is not None and not room_df.empty:
+            rooms = []
+            for row in room_df.to_dict("records"):
+                room = str(row.get("room_name", "")).strip()
+                if not room:
+                    continue
+                rt = self.normalize_type(row.get("room_type", ""))
+                rooms.append(room)
+                by_type[rt].append(room)
+                self.room_type_of.setdefault(room, rt)
+            self.rooms = tuple(rooms)
+        self._by_type = {rt: tuple(names) for rt, names in by_type.items()}
+
+    @staticmethod
+    def normalize_type(room_type):
+        return str(room_type).strip().lower()
+
+    def __len__(self):
+        return len(self.rooms)
+
+    def __contains__(self, room):
+        return room in self.room_type_of
+
+    def rooms_for(self, room_type):
+        """คืน tuple ของห้องที่รองรับ room_type (ว่างถ้าไม่มี)"""
+        return self._by_type.get(self.normalize_type(room_type), ())
 
 
-def get_hours_for_day(day, curriculum_type):
+# ===============================================================
+# Occupancy engine: การใช้ห้อง/อาจารย์เป็นเมทริกซ์ NumPy (แถว × slot)
+# ===============================================================
+class Occupancy:
     """
-    คืนลิสต์ชั่วโมงที่ใช้ได้ของวันนั้น ๆ ตามหลักสูตร โดยอิงจาก TIME_SLOTS_FROM_DB
-    ปรับใหม่:
-    - ภาคปกติ: จ–ศ 8–19
-    - ภาคพิเศษ: จ–ศ 17–22, เสาร์–อาทิตย์ 7–22
+    เก็บการจองห้อง/อาจารย์ของตาราง 1 ชุด เป็นอาร์เรย์ uint8 (จำนวนครั้งที่ถูกจอง)
+    - room_busy: rooms × slots, teacher_busy: teachers × slots
+    - room_load[r]: จำนวน slot ที่ห้อง r ถูกใช้ (ไว้ balance การเลือกห้อง)
+    - reserve/release เป็น O(ชั่วโมงของคลาส); copy() คือ copy อาร์เรย์ล้วน
+    อินเด็กซ์ชื่อ → แถว ใช้ร่วมกันทุกสำเนา (สร้างครั้งเดียวต่อรอบ)
     """
-    hours_from_db = list(TIME_SLOTS_FROM_DB.get(day, set()))
-    weekdays = ["จันทร์", "อังคาร", "พุธ", "พฤหัสบดี", "ศุกร์"]
-    weekends = ["เสาร์", "อาทิตย์"]
 
-    if curriculum_type == "ภาคปกติ":
-        return sorted([h for h in hours_from_db if 8 <= h <= 19 and day in weekdays])
-    elif curriculum_type == "ภาคพิเศษ":
-        if day in weekdays:
-            return sorted([h for h in hours_from_db if 17 <= h <= 22])
-        elif day in weekends:
-            return sorted([h for h in hours_from_db if 7 <= h <= 22])
-        else:
+    __slots__ = ("room_index", "teacher_index", "room_busy", "teacher_busy", "room_load")
+
+    def __init__(self, room_names, teacher_names, n_slots):
+        self.room_index = {r: i for i, r in enumerate(dict.fromkeys(room_names))}
+        self.teacher_index = {
+            t: i for i, t in enumerate(dict.fromkeys(teacher_names))
+        }
+        self.room_busy = np.zeros((len(self.room_index), n_slots), dtype=np.uint8)
+        self.teacher_busy = np.zeros(
+            (len(self.teacher_index), n_slots), dtype=np.uint8
+        )
+        self.room_load = np.zeros(len(self.room_index), dtype=np.int64)
+
+    def copy(self):
+        other = Occupancy.__new__(Occupancy)
+        other.room_index = self.room_index
+        other.teacher_index = self.teacher_index
+        other.room_busy = self.room_busy.copy()
+        other.teacher_busy = self.teacher_busy.copy()
+        other.room_load = self.room_load.copy()
+        return other
+
+    def _rows(self, room, teacher):
+        r = self.room_index.get(room) if room and room != "NO_VALID_ROOM" else None
+        t = self.teacher_index.get(teacher) if teacher else None
+        return r, t
+
+    def reserve(self, room, teacher, times):
+        """จอง (room, teacher) ในทุก slot ของ times (ข้าม NO_SLOT)"""
+        slots = [s for s in times if s != NO_SLOT]
+        if not slots:
+            return
+        r, t = self._rows(room, teacher)
+        if r is not None:
+            row = self.room_busy[r]
+            self.room_load[r] += int((row[slots] == 0).sum())
+            row[slots] += 1
+        if t is not None:
+            self.teacher_busy[t, slots] += 1
+
+    def reserve_all(self, items):
+        """จองทุกคลาสใน items พร้อมกันแบบ vectorized (ใช้ตอนสร้าง occupancy จากทั้งตาราง)"""
+        r_rows, r_slots, t_rows, t_slots = [], [], [], []
+        for item in items:
+            r, t = self._rows(item.get("room"), item.get("teacher"))
+            if r is None and t is None:
+                continue
+            for s in item["time"]:
+                if s == NO_SLOT:
+                    continue
+                if r is not None:
+                    r_rows.append(r)
+                    r_slots.append(s)
+                if t is not None:
+                    t_rows.append(t)
+                    t_slots.append(s)
+        if r_rows:
+            np.add.at(self.room_busy, (r_rows, r_slots), 1)
+            self.room_load[:] = (self.room_busy > 0).sum(axis=1)
+        if t_rows:
+            np.add.at(self.teacher_busy, (t_rows, t_slots), 1)
+
+    def reserve_rows(self, room_rows, teacher_rows, slots):
+        """
+        จองแบบ vectorized จากอาร์เรย์ขนานกัน (แถวห้อง, แถวอาจารย์, slot) ต่อ 1 ชั่วโมง
+        แถว -1 = ไม่จองฝั่งนั้น (ใช้ตอนสร้าง occupancy จาก chromosome)
+        """
+        m = room_rows >= 0
+        if m.any():
+            np.add.at(self.room_busy, (room_rows[m], slots[m]), 1)
+            self.room_load[:] = (self.room_busy > 0).sum(axis=1)
+        m = teacher_rows >= 0
+        if m.any():
+            np.add.at(self.teacher_busy, (teacher_rows[m], slots[m]), 1)
+
+    def release(self, room, teacher, times):
+        """คืนการจองที่ reserve ไว้ก่อนหน้า (ต้องเป็นชุดเดียวกัน)"""
+        slots = [s for s in times if s != NO_SLOT]
+        if not slots:
+            return
+        r, t = self._rows(room, teacher)
+        if r is not None:
+            row = self.room_busy[r]
+            row[slots] -= 1
+            self.room_load[r] -= int((row[slots] == 0).sum())
+        if t is not None:
+            self.teacher_busy[t, slots] -= 1
+
+    def load(self, room):
+        r = self.room_index.get(room)
+        return int(self.room_load[r]) if r is not None else 0
+
+    def unused_room_slots(self, room, times):
+        """slot ใน times ที่ห้องนี้ไม่ถูกจองแล้ว (ห้องที่ไม่รู้จักคืนลิสต์ว่าง)"""
+        r, _ = self._rows(room, None)
+        if r is None:
             return []
-    else:
-        return []
+        row = self.room_busy[r]
+        return [s for s in times if s != NO_SLOT and row[s] == 0]
+
+    def first_free_start(self, room, teacher, starts, length, pool_row):
+        """
+        คืนจุดเริ่มแรกใน starts (จุดเริ่มที่ถูกกติกาจาก SegmentIndex เรียงน้อย→มาก) ที่ slot
+        s..s+length-1 ยังว่างใน pool_row (แถว bool ของ SlotPool) และห้อง/อาจารย์ว่างทุก slot
+        ตรวจเฉพาะ starts × length ช่อง (ไม่ scan ทั้งแถว); ถ้าไม่มีคืน None
+        """
+        r, t = self._rows(room, teacher)
+        windows = starts[:, None] + np.arange(length)
+        ok = pool_row[windows]
+        if r is not None:
+            ok &= self.room_busy[r][windows] == 0
+        if t is not None:
+            ok &= self.teacher_busy[t][windows] == 0
+        hits = np.flatnonzero(ok.all(axis=1))
+        return int(starts[hits[0]]) if hits.size else None
 
 
 # ===============================================================
-# Room helpers
+# Slot pool: slot ที่ยังว่างต่อห้อง เป็นแถว bool (แทน dict ของ list)
 # ===============================================================
-def get_valid_rooms(room_type, room_df):
-    """คืนรายชื่อห้องที่รองรับ room_type นั้น ๆ"""
-    if room_df is None or room_df.empty:
-        return []
-    rt = str(room_type).strip().lower()
-    return (
-        room_df.loc[room_df["room_type"].str.lower() == rt, "room_name"]
-        .astype(str)
-        .str.strip()
-        .tolist()
+class SlotPool:
+    """
+    pool ของ individual: free[r, s] = True ถ้าห้อง r ยังไม่ถูกใช้ที่ slot s
+    - reserve/release เป็น O(ชั่วโมงของคลาส) (ไม่มี list.remove)
+    - copy() คือ copy อาร์เรย์เดียว; room_index ใช้ร่วมกันทุกสำเนา
+    - ลำดับ slot id = ลำดับวัน/ชั่วโมง จึงสแกนช่วงต่อเนื่องตามลำดับได้จากแถวตรง ๆ
+    - แถวเรียงตาม slot_pool; GAEngine สร้าง Occupancy โดยใส่ห้องของ slot_pool ก่อน
+      จึงใช้ id ห้องของ chromosome เป็นแถวของ pool ได้ตรง ๆ
+    """
+
+    __slots__ = ("room_index", "free")
+
+    def __init__(self, slot_pool, n_slots):
+        self.room_index = {room: i for i, room in enumerate(slot_pool)}
+        self.free = np.zeros((len(self.room_index), n_slots), dtype=bool)
+        for room, slots in slot_pool.items():
+            self.free[self.room_index[room], list(slots)] = True
+
+    def copy(self):
+        other = SlotPool.__new__(SlotPool)
+        other.room_index = self.room_index
+        other.free = self.free.copy()
+        return other
+
+    def __contains__(self, room):
+        return room in self.room_index
+
+    def row(self, room):
+        """แถว bool ของห้อง (view ของอาร์เรย์จริง)"""
+        return self.free[self.room_index[room]]
+
+    def reserve(self, room, times):
+        """ลบ slot ออกจาก pool ของห้อง (ห้องที่ไม่อยู่ใน pool / NO_SLOT ข้ามไป)"""
+        r = self.room_index.get(room)
+        slots = [s for s in times if s != NO_SLOT]
+        if r is not None and slots:
+            self.free[r, slots] = False
+
+    def release(self, room, times, within=None):
+        """
+        คืน slot เข้า pool ของห้อง
+        within (SlotPool ที่ room_index เดียวกัน): คืนเฉพาะ slot ที่ว่างใน within (เช่น pool ตั้งต้น)
+        """
+        r = self.room_index.get(room)
+        slots = [s for s in times if s != NO_SLOT]
+        if r is None or not slots:
+            return
+        if within is None:
+            self.free[r, slots] = True
+        else:
+            self.free[r, slots] |= within.free[r, slots]
+
+    def reserve_rows(self, rows, slots):
+        """ลบ (แถวห้อง, slot) ออกจาก pool แบบ vectorized (แถว -1 ข้ามไป)"""
+        m = rows >= 0
+        self.free[rows[m], slots[m]] = False
+
+    def reserve_all(self, items):
+        """ลบ slot ของทุกคลาสใน items ออกจาก pool ทีเดียว"""
+        rows, cols = [], []
+        for item in items:
+            r = self.room_index.get(item.get("room"))
+            if r is None:
+                continue
+            for s in item["time"]:
+                if s != NO_SLOT:
+                    rows.append(r)
+                    cols.append(s)
+        if rows:
+            self.free[rows, cols] = False
+
+
+# ===============================================================
+# Segment index: ช่วงต่อเนื่องที่ถูกกติกา ต่อ (ห้อง, หลักสูตร, จำนวนชั่วโมง)
+# ===============================================================
+class SegmentIndex:
+    """
+    คำนวณล่วงหน้า "จุดเริ่ม" ของทุกช่วงเวลาต่อเนื่องที่ถูกกติกาแบบคงที่ ครั้งเดียวต่อรอบ:
+    - ทุก slot อยู่ใน slot pool ตั้งต้นของห้อง และไม่ถูกบล็อก (กิจกรรม)
+    - ต่อเนื่องในวันเดียวกัน และทุกชั่วโมงถูกหลักสูตร
+    segment ที่เริ่มที่ s คือ slot s..s+h-1 (id เรียงตามวัน/ชั่วโมง)
+    ตอนวางจริงเหลือแค่กรองด้วยความว่าง (pool/occupancy) ของ individual นั้น
+    ห้องที่ pool ตั้งต้นเหมือนกันใช้อาร์เรย์ร่วมกัน
+    """
+
+    def __init__(self, calendar, slot_pool, blocked_times):
+        n_slots = len(calendar)
+        self.calendar = calendar
+        self._starts = {}  # (room, curriculum_type, hours) -> np.ndarray ของจุดเริ่ม
+        self._shared = {}  # (pool key, curriculum_type, hours) -> np.ndarray
+
+        blocked = np.zeros(n_slots, dtype=bool)
+        blocked[[t for t in blocked_times if t != NO_SLOT]] = True
+
+        # link[s] = True ถ้า slot s+1 คือชั่วโมงถัดไปในวันเดียวกันของ s
+        self._link = np.array(
+            [nxt == s + 1 for s, nxt in enumerate(calendar.next_same_day)], dtype=bool
+        )
+
+        self._pool_key = {}
+        self._pool_masks = {}
+        for room, slots in slot_pool.items():
+            key = tuple(slots)
+            self._pool_key[room] = key
+            if key not in self._pool_masks:
+                mask = np.zeros(n_slots, dtype=bool)
+                mask[list(key)] = True
+                self._pool_masks[key] = mask & ~blocked
+
+    def _cur_mask(self, curriculum_type):
+        return self.calendar.legal_mask(curriculum_type)
+
+    def starts(self, room, curriculum_type, hours):
+        """np.ndarray (เรียงจากน้อยไปมาก) ของ slot เริ่มที่ใช้ได้ทั้งหมด; ว่างถ้าห้องไม่รู้จัก"""
+        key = (room, curriculum_type, hours)
+        found = self._starts.get(key)
+        if found is not None:
+            return found
+
+        pool_key = self._pool_key.get(room)
+        if pool_key is None or hours <= 0:
+            found = np.zeros(0, dtype=np.int64)
+        else:
+            shared_key = (pool_key, curriculum_type, hours)
+            found = self._shared.get(shared_key)
+            if found is None:
+                found = self._compute(
+                    self._pool_masks[pool_key], self._cur_mask(curriculum_type), hours
+                )
+                self._shared[shared_key] = found
+        self._starts[key] = found
+        return found
+
+    def _compute(self, pool_mask, cur_mask, hours):
+        n_slots = len(pool_mask)
+        if hours > n_slots:
+            return np.zeros(0, dtype=np.int64)
+        ok = pool_mask & cur_mask
+        # หน้าต่างยาว hours: ทุก slot ok และมี link ต่อกัน hours-1 ครั้ง
+        bad = np.zeros(n_slots + 1, dtype=np.int32)
+        bad[1:] = ~ok
+        np.cumsum(bad, out=bad)
+        good = bad[hours:] == bad[:-hours]
+        if hours > 1:
+            broken = np.zeros(n_slots, dtype=np.int32)
+            broken[1:] = ~self._link[:-1]
+            np.cumsum(broken, out=broken)
+            good &= broken[hours - 1 :] == broken[: n_slots - hours + 1]
+        return np.flatnonzero(good)
+
+
+# ===============================================================
+# Individual: ตาราง 1 ชุด + คะแนนที่ cache ไว้
+# ===============================================================
+class Individual:
+    """
+    chromosome แบบกะทัดรัดของตาราง 1 ชุด + fitness ที่ cache ไว้
+    ยีนที่ g = วิชาที่ยังไม่ล็อกลำดับที่ g ตามลำดับคงที่ของ GAEngine.genes
+    - starts (int32): slot เริ่มของวิชา (ใช้ slot start..start+hours-1), NO_SLOT = หาเวลาไม่ได้
+    - rooms (int16): id ห้อง (แถวของ Occupancy.room_index), -1 = NO_VALID_ROOM
+    ของที่ล็อกไม่อยู่ใน chromosome (ใช้ร่วมกันจาก engine) และข้อมูลวิชาอยู่ที่ engine ที่เดียว
+    → copy() คือ copy อาร์เรย์ 2 ตัว; แปลงกลับเป็นรายการคลาสด้วย GAEngine.decode
+    - dirty=True แปลว่ายังไม่มีคะแนน/คะแนนเก่าใช้ไม่ได้ (ถูก crossover/mutate สร้างใหม่)
+    - ตัวที่ไม่ dirty (เช่น elite ที่ส่งต่อรุ่น) จะไม่ถูกให้คะแนนซ้ำ
+    """
+
+    __slots__ = ("starts", "rooms", "fitness", "dirty")
+
+    def __init__(self, starts, rooms, fitness=None):
+        self.starts = starts
+        self.rooms = rooms
+        self.fitness = fitness
+        self.dirty = fitness is None
+
+    def __len__(self):
+        return len(self.starts)
+
+    def copy(self):
+        return Individual(self.starts.copy(), self.rooms.copy(), self.fitness)
+
+    def set_fitness(self, score):
+        self.fitness = score
+        self.dirty = False
+
+    def invalidate(self):
+        self.fitness = None
+        self.dirty = True
+
+
+# ===============================================================
+# Batched fitness: ให้คะแนนทั้ง population ด้วย NumPy ครั้งเดียว
+# ===============================================================
+PAD_SLOT = -2  # ช่องเติมท้าย genome tensor (คลาสที่มีชั่วโมงน้อยกว่า H)
+
+
+class BatchFitness:
+    """
+    ให้คะแนนตารางทั้ง population พร้อมกัน (กติกาเดียวกับ fitness เดิมทุกข้อ):
+    - slot เป็น NO_SLOT: -1000 / slot ที่ถูกบล็อก (กิจกรรม): -1000
+    - ชั่วโมงผิดหลักสูตร: -50 และไม่นับชนห้อง/อาจารย์ของ slot นั้น
+    - (อาจารย์, slot) และ (ห้อง, slot): ครั้งแรก +30, ครั้งถัดไป -1000
+    - bonus +5 ต่อคู่ชั่วโมงติดกันในวันเดียวกันของคลาสเดียว
+    genome tensor: slots (P × C × H) เป็น slot id, rooms (P × C) เป็นแถวห้อง (-1 = ไม่มีห้อง)
+    คอลัมน์ C = locked items ตามลำดับ + ยีนของ Individual (courses ตามลำดับยีน)
+    """
+
+    def __init__(
+        self, calendar, blocked_times, room_index, teacher_index, locked_items, courses
+    ):
+        self.n_slots = n_slots = len(calendar)
+        self.room_index = room_index
+        self.teacher_index = teacher_index
+        self.n_locked = len(locked_items)
+        self.n_hours = max(
+            [len(it["time"]) for it in locked_items]
+            + [int(c.get("hours", 0)) for c in courses]
+            + [1]
+        )
+        self.evaluations = 0  # จำนวน genome ที่ถูกให้คะแนนจริง (ไม่นับที่ได้จาก cache)
+        self.gene_hours = [int(c.get("hours", 0)) for c in courses]
+
+        # ส่วนของที่ล็อก (เหมือนกันทุก individual) เตรียมไว้ครั้งเดียว
+        H = self.n_hours
+        self.locked_slots = np.full((self.n_locked, H), PAD_SLOT, dtype=np.int64)
+        self.locked_rooms = np.full(self.n_locked, -1, dtype=np.int64)
+        for i, it in enumerate(locked_items):
+            if it["time"]:
+                self.locked_slots[i, : len(it["time"])] = it["time"]
+            room = it.get("room")
+            if room and room != "NO_VALID_ROOM":
+                self.locked_rooms[i] = room_index.get(room, -1)
+
+        # คอลัมน์ที่ไม่ใช่กิจกรรม (กิจกรรมอยู่ใน slot ที่บล็อกของตัวเองเสมอ ไม่นับเป็น conflict)
+        self.not_activity = np.array(
+            [it.get("type") != "activity" for it in locked_items] + [True] * len(courses),
+            dtype=bool,
+        )
+
+        # ยีน: slot ที่ h ของยีน g = start + h (h < hours) ไม่งั้น PAD
+        self._offsets = np.arange(H, dtype=np.int64)
+        self._in_gene = self._offsets[None, :] < np.array(
+            self.gene_hours, dtype=np.int64
+        ).reshape(-1, 1)
+
+        cols = [(it.get("teacher"), it.get("curriculum_type")) for it in locked_items]
+        cols += [(c.get("teacher"), c.get("curriculum_type")) for c in courses]
+        self.n_cols = len(cols)
+        self.col_teacher = np.array(
+            [teacher_index.get(t, -1) if t else -1 for t, _ in cols], dtype=np.int64
+        )
+
+        # ตารางชั่วโมงที่ถูกหลักสูตร: curricula × slots (แถวสุดท้าย = ไม่รู้จัก → ผิดทั้งหมด)
+        curricula = list(dict.fromkeys(cur for _, cur in cols))
+        cur_index = {cur: i for i, cur in enumerate(curricula)}
+        self.col_cur = np.array([cur_index[cur] for _, cur in cols], dtype=np.int64)
+        self.legal = np.zeros((len(curricula), n_slots), dtype=bool)
+        for k, cur in enumerate(curricula):
+            self.legal[k] = curriculum_slot_mask(calendar, cur)
+
+        self.blocked = np.zeros(n_slots, dtype=bool)
+        self.blocked[[t for t in blocked_times if t != NO_SLOT]] = True
+
+        # next_same_day + ช่อง sentinel ท้าย (index n_slots) ที่ไม่มีวันเท่ากับ slot ใด
+        self.next_same_day = np.array(
+            list(calendar.next_same_day) + [PAD_SLOT], dtype=np.int64
+        )
+
+        # สำเนาแบบ list ธรรมดา สำหรับ ScoreState (index ทีละตัวเร็วกว่า numpy)
+        self.py_legal = self.legal.tolist()
+        self.py_blocked = self.blocked.tolist()
+        self.py_next_same_day = calendar.next_same_day
+        self.py_col_teacher = self.col_teacher.tolist()
+        self.py_col_cur = self.col_cur.tolist()
+
+    def gene_times(self, g, start):
+        """slot ทั้งหมดของยีน g เมื่อเริ่มที่ start (NO_SLOT → [NO_SLOT] * hours)"""
+        hours = self.gene_hours[g]
+        if start < 0:
+            return [NO_SLOT] * hours
+        return list(range(start, start + hours))
+
+    def encode(self, population):
+        """แปลง population (list ของ Individual) → (slots P×C×H, rooms P×C) แบบ vectorized"""
+        P, C, H, L = len(population), self.n_cols, self.n_hours, self.n_locked
+        slots = np.empty((P, C, H), dtype=np.int64)
+        rooms = np.empty((P, C), dtype=np.int64)
+        slots[:, :L] = self.locked_slots
+        rooms[:, :L] = self.locked_rooms
+
+        if C > L:
+            starts = np.stack([ind.starts for ind in population]).astype(np.int64)
+            genes = starts[:, :, None] + self._offsets
+            genes = np.where(starts[:, :, None] < 0, NO_SLOT, genes)
+            slots[:, L:] = np.where(self._in_gene, genes, PAD_SLOT)
+            rooms[:, L:] = np.stack([ind.rooms for ind in population])
+        return slots, rooms
+
+    def _terms(self, slots, rooms):
+        """
+        แยกคะแนนเป็น 2 ส่วน:
+        - local (P × C): คะแนนเฉพาะคลาส (NO_SLOT, บล็อก, ผิดหลักสูตร, bonus ต่อเนื่อง)
+        - t_counts (P × T·S), r_counts (P × R·S): จำนวนครั้งที่ใช้ (อาจารย์/ห้อง, slot)
+          เฉพาะ slot ที่ถูกหลักสูตร
+        """
+        P, C, H = slots.shape
+        S = self.n_slots
+
+        valid = slots >= 0
+        g = np.where(valid, slots, 0)
+        legal = valid & self.legal[self.col_cur[None, :, None], g]
+
+        local = -1000 * (slots == NO_SLOT).sum(axis=2)
+        local -= 1000 * (valid & self.blocked[g]).sum(axis=2)
+        local -= 50 * (valid & ~legal).sum(axis=2)
+
+        # bonus: ชั่วโมงติดกันในวันเดียวกัน (slot id เรียงตาม (day, hour) แล้ว)
+        if H > 1:
+            srt = np.sort(np.where(valid, slots, S), axis=2)
+            local += 5 * (self.next_same_day[srt[:, :, :-1]] == srt[:, :, 1:]).sum(
+                axis=2
+            )
+
+        p_idx = np.arange(P, dtype=np.int64)[:, None, None]
+
+        # อาจารย์: key = (p, teacher, slot)
+        T = len(self.teacher_index)
+        teacher = self.col_teacher[None, :, None]
+        t_mask = legal & (teacher >= 0)
+        t_keys = (p_idx * T + teacher) * S + g
+        t_counts = np.bincount(t_keys[t_mask], minlength=P * T * S).reshape(P, -1)
+
+        # ห้อง: key = (p, room, slot)
+        R = len(self.room_index)
+        room = rooms[:, :, None]
+        r_mask = legal & (room >= 0)
+        r_keys = (p_idx * R + room) * S + g
+        r_counts = np.bincount(r_keys[r_mask], minlength=P * R * S).reshape(P, -1)
+
+        return local, t_counts, r_counts
+
+    @staticmethod
+    def _clash_score(counts):
+        """คะแนนชนต่อ individual จากจำนวนครั้ง: key ละ +30 ครั้งแรก, -1000 ทุกครั้งถัดไป"""
+        return 1030 * (counts > 0).sum(axis=-1) - 1000 * counts.sum(axis=-1)
+
+    def score_genomes(self, slots, rooms):
+        """คืนคะแนน (np.int64, ยาว P) ของ genome tensor"""
+        local, t_counts, r_counts = self._terms(slots, rooms)
+        return (
+            local.sum(axis=1)
+            + self._clash_score(t_counts)
+            + self._clash_score(r_counts)
+        )
+
+    def hard_conflicts(self, population):
+        """
+        จำนวน hard conflict ต่อ individual (list[int]):
+        ชั่วโมงที่หาเวลาไม่ได้ + ชั่วโมงที่ชนกิจกรรม + การใช้ (อาจารย์/ห้อง, slot) ซ้ำเกินครั้งแรก
+        (ชั่วโมงผิดหลักสูตรถือเป็น soft: โดนหักคะแนนแต่ไม่นับตรงนี้;
+        ตัวกิจกรรมเองไม่นับว่าชน slot ที่บล็อก)
+        """
+        if not population:
+            return []
+        slots, rooms = self.encode(population)
+        _, t_counts, r_counts = self._terms(slots, rooms)
+        valid = slots >= 0
+        g = np.where(valid, slots, 0)
+        hard = (slots == NO_SLOT).sum(axis=(1, 2))
+        hard += (valid & self.blocked[g] & self.not_activity[None, :, None]).sum(
+            axis=(1, 2)
+        )
+        hard += np.maximum(t_counts - 1, 0).sum(axis=1)
+        hard += np.maximum(r_counts - 1, 0).sum(axis=1)
+        return hard.tolist()
+
+    def state(self, individual):
+        """สร้าง ScoreState (สำหรับคำนวณ delta) ของ individual 1 ตัว"""
+        slots, rooms = self.encode([individual])
+        local, t_counts, r_counts = self._terms(slots, rooms)
+        return ScoreState(
+            self, individual, slots[0], rooms[0], local[0], t_counts[0], r_counts[0]
+        )
+
+    def score(self, population):
+        """คะแนนของแต่ละ individual ใน population (list[int])"""
+        if not population:
+            return []
+        self.evaluations += len(population)
+        return self.score_genomes(*self.encode(population)).tolist()
+
+    def evaluate(self, population):
+        """
+        ให้คะแนนเฉพาะ Individual ที่ dirty (ตัวที่มีคะแนนแล้วใช้ค่าที่ cache ไว้)
+        genome ซ้ำกันในชุดเดียวกันให้คะแนนครั้งเดียว (ตัวแรก) แล้วแจกให้ตัวอื่น
+        คืน list คะแนนตามลำดับ population
+        """
+        todo = []
+        clones = defaultdict(list)
+        for ind in population:
+            if ind.dirty:
+                key = genome_hash(ind)
+                if key not in clones:
+                    todo.append((key, ind))
+                clones[key].append(ind)
+
+        if todo:
+            self.evaluations += len(todo)
+            scores = self.score_genomes(*self.encode([ind for _, ind in todo])).tolist()
+            for (key, _), score in zip(todo, scores):
+                for ind in clones[key]:
+                    ind.set_fitness(score)
+
+        return [ind.fitness for ind in population]
+
+
+class ScoreState:
+    """
+    คะแนนของตาราง 1 ชุดแบบแยกส่วน สำหรับ delta evaluation:
+    - local[c]: คะแนนเฉพาะคลาส c
+    - teacher_cnt (T × S), room_cnt (R × S): ตัวนับการใช้ (เฉพาะ slot ที่ถูกหลักสูตร)
+    ย้ายคลาส (move) ปรับคะแนนใน O(ชั่วโมงของคลาสนั้น) แทนการให้คะแนนใหม่ทั้งตาราง
+    score ตรงกับ BatchFitness.score_genomes ของตารางปัจจุบันเสมอ
+    """
+
+    __slots__ = (
+        "ev", "score", "teacher_cnt", "room_cnt", "times", "rooms", "local",
+        "starts", "gene_rooms",
     )
 
+    def __init__(self, ev, individual, slots, rooms, local, t_counts, r_counts):
+        self.ev = ev
+        self.times = [[t for t in row if t != PAD_SLOT] for row in slots.tolist()]
+        self.rooms = rooms.tolist()
+        # chromosome ปัจจุบันของ state (ไว้เทียบกับ individual อื่นใน sync)
+        self.starts = individual.starts.copy()
+        self.gene_rooms = individual.rooms.copy()
+        self.local = local.tolist()
+        self.teacher_cnt = t_counts.reshape(len(ev.teacher_index), ev.n_slots)
+        self.room_cnt = r_counts.reshape(len(ev.room_index), ev.n_slots)
+        self.score = int(
+            sum(self.local)
+            + BatchFitness._clash_score(t_counts)
+            + BatchFitness._clash_score(r_counts)
+        )
+
+    def copy(self):
+        other = ScoreState.__new__(ScoreState)
+        other.ev = self.ev
+        other.score = self.score
+        other.teacher_cnt = self.teacher_cnt.copy()
+        other.room_cnt = self.room_cnt.copy()
+        other.times = list(self.times)
+        other.rooms = list(self.rooms)
+        other.local = list(self.local)
+        other.starts = self.starts.copy()
+        other.gene_rooms = self.gene_rooms.copy()
+        return other
+
+    def class_local(self, col, times):
+        """คะแนนเฉพาะคลาส col ถ้าอยู่ที่เวลา times"""
+        ev = self.ev
+        legal = ev.py_legal[ev.py_col_cur[col]]
+        blocked = ev.py_blocked
+        score = 0
+        valid = []
+        for t in times:
+            if t == NO_SLOT:
+                score -= 1000
+                continue
+            valid.append(t)
+            if blocked[t]:
+                score -= 1000
+            if not legal[t]:
+                score -= 50
+        if len(valid) > 1:
+            valid.sort()
+            nxt = ev.py_next_same_day
+            score += 5 * sum(1 for a, b in zip(valid, valid[1:]) if nxt[a] == b)
+        return score
+
+    def _apply(self, col, room, times, sign):
+        """เพิ่ม (sign=+1) / ลบ (sign=-1) การใช้ของคลาส col แล้วคืนคะแนนชนที่เปลี่ยน"""
+        ev = self.ev
+        legal = ev.py_legal[ev.py_col_cur[col]]
+        teacher = ev.py_col_teacher[col]
+        delta = 0
+        for counts, row in ((self.teacher_cnt, teacher), (self.room_cnt, room)):
+            if row < 0:
+                continue
+            line = counts[row]
+            for t in times:
+                if t < 0 or not legal[t]:
+                    continue
+                n = int(line[t])
+                if sign > 0:
+                    delta += 30 if n == 0 else -1000
+                else:
+                    delta -= 30 if n == 1 else -1000
+                line[t] = n + sign
+        return delta
+
+    def move(self, col, room, times):
+        """ย้ายคลาส col ไปห้อง (แถว) room เวลา times; คืนคะแนนที่เปลี่ยน"""
+        delta = self._apply(col, self.rooms[col], self.times[col], -1)
+        delta -= self.local[col]
+        new_local = self.class_local(col, times)
+        delta += new_local + self._apply(col, room, times, +1)
+
+        self.local[col] = new_local
+        self.rooms[col] = room
+        self.times[col] = times
+        g = col - self.ev.n_locked
+        if g >= 0:
+            self.starts[g] = times[0] if times else NO_SLOT
+            self.gene_rooms[g] = room
+        self.score += delta
+        return delta
+
+    def sync(self, individual):
+        """ปรับ state ให้ตรงกับ individual (ย้ายเฉพาะยีนที่ต่างกัน); คืนคะแนนที่เปลี่ยน"""
+        ev = self.ev
+        diff = np.flatnonzero(
+            (individual.starts != self.starts) | (individual.rooms != self.gene_rooms)
+        )
+        delta = 0
+        for g in diff.tolist():
+            start = int(individual.starts[g])
+            delta += self.move(
+                ev.n_locked + g, int(individual.rooms[g]), ev.gene_times(g, start)
+            )
+        return delta
+
+
+def genome_hash(individual):
+    """hash แบบ canonical ของ chromosome 1 ตัว (ของที่ล็อกเหมือนกันทุกตัวจึงไม่ต้องนับ)"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(individual.starts.tobytes())
+    h.update(individual.rooms.tobytes())
+    return h.digest()
 
-def find_available_rooms(candidate_times, room_usage, valid_room_names):
-    """หา "ห้อง" ที่ว่างครบทุกชั่วโมงใน candidate_times (จาก room_usage)"""
-    available = []
-    for room in valid_room_names:
-        if all((room, t) not in room_usage for t in candidate_times):
-            available.append(room)
-    return available
+
+def hamming_matrix(population):
+    """
+    ระยะ Hamming แบบสัดส่วน (n × n) ระหว่าง individual ทุกคู่:
+    สัดส่วนของยีนที่ (slot เริ่ม, ห้อง) ต่างกัน (0 = เหมือนกันทุกยีน, 1 = ต่างทุกยีน)
+    """
+    if not population or not len(population[0]):
+        return np.zeros((len(population), len(population)))
+    starts = np.stack([ind.starts for ind in population])
+    rooms = np.stack([ind.rooms for ind in population])
+    diff = (starts[:, None, :] != starts[None, :, :]) | (rooms[:, None, :] != rooms[None, :, :])
+    return diff.mean(axis=2)
+
+
+def diversity_metrics(population, hashes=None, distances=None):
+    """
+    ความหลากหลายของ population → {"size", "unique" (จำนวน genome ไม่ซ้ำ), "hamming"
+    (ระยะ Hamming เฉลี่ยของทุกคู่)}; hashes / distances ส่งมาได้ถ้าคำนวณไว้แล้ว
+    """
+    n = len(population)
+    if hashes is None:
+        hashes = [genome_hash(ind) for ind in population]
+    if distances is None:
+        distances = hamming_matrix(population)
+    pairs = n * (n - 1) / 2
+    hamming = float(np.triu(distances, 1).sum() / pairs) if pairs else 0.0
+    return {"size": n, "unique": len(set(hashes)), "hamming": round(hamming, 4)}
 
 
 # ===============================================================
-# NEW: get_consecutive_times ใช้ SLOT_POOL (มีตัวเลือกส่ง slot_pool เฉพาะของ individual)
+# NEW: get_consecutive_times ใช้ slot_pool เฉพาะของ individual (SlotPool)
 # ===============================================================
 
 
 def get_consecutive_times(
     hours_needed,
-    blocked_times,
-    room_usage,
+    segment_index,
+    occupancy,
     valid_room_names,
     curriculum_type,
-    teacher_usage,
     teacher_name,
     slot_pool,
+    rng=random,
 ):
     """
-    ดึงช่วงเวลาต่อเนื่องจาก slot_pool (หรือ SLOT_POOL ถ้าไม่ส่งมา)
-    - เคารพ block activity (blocked_times)
-    - กันชนอาจารย์ (teacher_usage)
-    - กันชนห้อง (room_usage)
-    - เลือกห้องแบบ balance: ใช้ห้องที่ถูกใช้น้อยสุด (tie-break ด้วยสุ่ม)
-    - reserve slot หลังจากเลือก candidate แล้วเท่านั้น
+    ดึงช่วงเวลาต่อเนื่องจาก slot_pool (pool เฉพาะของ individual)
+    - ช่วงที่ถูกกติกา (ต่อเนื่อง/หลักสูตร/ไม่ชน block activity) มาจาก segment_index (SegmentIndex)
+    - กันชนอาจารย์/ห้อง ด้วย occupancy (Occupancy) + ต้องยังว่างใน slot_pool (SlotPool)
+    - เลือกห้องแบบ balance: ใช้ห้องที่ถูกใช้น้อยสุด (tie-break ด้วยสุ่มจาก rng)
+    - reserve slot (ลบออกจาก pool) หลังจากเลือก candidate แล้วเท่านั้น
+      ส่วนการจองใน occupancy ให้ผู้เรียกทำเอง
+    เวลาทั้งหมดเป็น slot id (int) ของ SlotCalendar; ถ้าหาไม่ได้คืน [NO_SLOT] * hours_needed
     """
     pool = slot_pool
 
-    # นับจำนวนการใช้งานของแต่ละห้องจาก room_usage เพื่อนำมา balance
-    room_use_count = {}
-    for r, t in room_usage:
-        room_use_count[r] = room_use_count.get(r, 0) + 1
+    if hours_needed <= 0:
+        return {"times": [], "available_rooms": []}
 
     candidates = []  # เก็บ (room, segment)
 
     for room in valid_room_names:
         if room not in pool:
             continue
-        free_slots = pool[room]
-
-        # หา "ช่วงต่อเนื่องแรกที่ valid" ของห้องนี้ (ถ้าเจอจะหยุดที่ห้องนี้แค่ 1 segment)
-        found_segment = None
-
-        for i in range(0, len(free_slots) - hours_needed + 1):
-            segment = free_slots[i : i + hours_needed]
-
-            # ต่อเนื่องใน "วันเดียวกัน"
-            ok = True
-            prev_day, prev_hour = None, None
-            for s in segment:
-                if "_" not in s:
-                    ok = False
-                    break
-                d, h = s.split("_")
-                try:
-                    h = int(h)
-                except Exception:
-                    ok = False
-                    break
-                if prev_day is not None:
-                    if d != prev_day or h != prev_hour + 1:
-                        ok = False
-                        break
-                prev_day, prev_hour = d, h
-            if not ok:
-                continue
-
-            # ชั่วโมงต้องถูกหลักสูตร
-            valid_hours = set(get_hours_for_day(prev_day, curriculum_type))
-            if not all(int(ts.split("_")[1]) in valid_hours for ts in segment):
-                continue
-
-            # กันกิจกรรม / อาจารย์ / ห้อง
-            if any(s in blocked_times for s in segment):
-                continue
-            if teacher_usage is not None and teacher_name:
-                if any((teacher_name, s) in teacher_usage for s in segment):
-                    continue
-            if any((room, s) in room_usage for s in segment):
-                continue
-
-            found_segment = segment
-            break  # เอา segment แรกของห้องนี้พอ
+        starts = segment_index.starts(room, curriculum_type, hours_needed)
+        if not starts.size:
+            continue
 
-        if found_segment:
-            candidates.append((room, found_segment))
+        # เอา "ช่วงแรกที่ยังว่าง" ของห้องนี้ (จุดเริ่มน้อยสุด) แค่ 1 segment
+        first = occupancy.first_free_start(room, teacher_name, starts, hours_needed, pool.row(room))
+        if first is not None:
+            candidates.append((room, list(range(first, first + hours_needed))))
 
-    # ถ้าไม่มีผู้สมัครเลย → ส่ง NO_VALID_TIME
+    # ถ้าไม่มีผู้สมัครเลย → ส่ง NO_SLOT (แสดงผลเป็น NO_VALID_TIME_i ตอน save_schedule)
     if not candidates:
-        return {
-            "times": [f"NO_VALID_TIME_{i}" for i in range(hours_needed)],
-            "available_rooms": [],
-        }
+        return {"times": [NO_SLOT] * hours_needed, "available_rooms": []}
 
     # เลือก candidate ที่ใช้ห้องน้อยสุด (ถ้าเสมอกันสุ่ม)
     # score = จำนวนใช้ห้อง (น้อยดีกว่า)
-    min_use = min(room_use_count.get(r, 0) for r, _ in candidates)
-    best_rooms = [
-        (r, seg) for r, seg in candidates if room_use_count.get(r, 0) == min_use
-    ]
+    room_use_count = {r: occupancy.load(r) for r, _ in candidates}
+    min_use = min(room_use_count.values())
+    best_rooms = [(r, seg) for r, seg in candidates if room_use_count[r] == min_use]
 
-    room, segment = random.choice(best_rooms)
+    room, segment = rng.choice(best_rooms)
 
     # reserve: ลบสลอตที่เลือกออกจาก pool ของห้องนั้น
-    for s in segment:
-        try:
-            pool[room].remove(s)
-        except ValueError:
-            pass
+    pool.reserve(room, segment)
 
     return {"times": segment, "available_rooms": [room]}
 
@@ -606,462 +1509,1953 @@ def get_blocked_times_from_activities(locked_activity_df):
 # ===============================================================
 # apply_blocks_to_slot_pool ลบ slot ที่ lock_activaity ใช้ไปแล้ว
 # ===============================================================
-def apply_blocks_to_slot_pool(locked_activity_df):
+def apply_blocks_to_slot_pool(slot_pool, blocked_slots):
     """
-    ลบสลอตที่ 'ใช้ไม่ได้จริง' ออกจาก SLOT_POOL โดยตรง
+    คืน slot pool ใหม่ที่ลบสลอตที่ 'ใช้ไม่ได้จริง' ออก (ไม่แก้ pool เดิม)
     - กิจกรรม (locked_activities): ลบจากทุกห้อง (global)
     """
-    global SLOT_POOL
-
-    # 1) บล็อกจากกิจกรรม (ลบออกจากทุกห้อง)
-    blocked = get_blocked_times_from_activities(locked_activity_df)
-    if blocked:
-        for room in list(SLOT_POOL.keys()):
-            # เก็บเฉพาะสลอตที่ไม่ได้ถูกบล็อก
-            SLOT_POOL[room] = [t for t in SLOT_POOL[room] if t not in blocked]
+    blocked = set(blocked_slots)
+    if not blocked:
+        return dict(slot_pool)
+    # เก็บเฉพาะสลอตที่ไม่ได้ถูกบล็อก
+    return {
+        room: tuple(t for t in slots if t not in blocked)
+        for room, slots in slot_pool.items()
+    }
 
 
 # ===============================================================
-# GA Runner
+# ProblemInstance: ข้อมูลของโจทย์ 1 รอบ ที่ compile แล้ว (immutable)
 # ===============================================================
-def run_genetic_algorithm(data_loader, write_csv=False, return_df=False):
-    try:
-        # -------------------- Load data --------------------
-        course_df, room_df, locked_df, locked_activity_df, timeslot_df = data_loader()
+class FrozenRecord(dict):
+    """
+    dict แบบอ่านอย่างเดียว (แก้/ลบ key จะ raise TypeError)
+    ใช้แทน MappingProxyType เพราะต้อง pickle ส่งให้ worker process ได้
+    """
 
-        # ✅ จัด section ของ locked ให้เริ่มจาก 1 ต่อเนื่องตาม (subject_code, curriculum_type)
-        locked_df = normalize_locked_sections(locked_df)
+    __slots__ = ()
 
-        # ---------------- Preprocess time slots & pool ----------------
-        preprocess_time_slots(timeslot_df)
-        build_slot_pool(timeslot_df, room_df)
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("FrozenRecord เป็น read-only")
 
-        # ---------------- Prepare courses list ----------------
-        courses = []
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
 
-        # ✅ สร้างแผนที่ "max section" ที่ locked ใช้ไปแล้ว ต่อ (subject_code, curriculum_type)
-        locked_section_map = (
-            locked_df.groupby(["subject_code"])["section"]
-            .max()
-            .to_dict()
-            if not locked_df.empty
-            else {}
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def freeze_record(item):
+    """dict ของวิชา/ของที่ล็อก → FrozenRecord (list เช่น "time" กลายเป็น tuple)"""
+    return FrozenRecord(
+        {k: tuple(v) if isinstance(v, list) else v for k, v in item.items()}
+    )
+
+
+class ProblemInstance:
+    """
+    ข้อมูลทั้งหมดที่ GA ต้องใช้ของการจัดตาราง 1 ครั้ง:
+    - calendar (SlotCalendar), rooms (RoomCatalog)
+    - slot_pool: {room: tuple(slot ids)} หลังหักเวลาที่ถูกบล็อกแล้ว
+    - courses: วิชาที่ต้องจัด, locked_classes / locked_activities: ของที่ล็อก (เวลาเป็น slot id)
+    - blocked_slots: frozenset ของ slot ที่ถูกบล็อกด้วยกิจกรรม
+    - course_table: CourseTable ของ courses (compile ตอนสร้าง)
+    สร้างแล้วแก้ไม่ได้: ตั้ง attribute ใหม่จะ raise, dict ข้างในเป็น FrozenRecord
+    และ list เป็น tuple → ใช้ร่วมกันหลาย thread ได้ และ pickle ส่งให้ worker process ได้โดยตรง
+    """
+
+    __slots__ = (
+        "calendar",
+        "rooms",
+        "slot_pool",
+        "courses",
+        "locked_classes",
+        "locked_activities",
+        "blocked_slots",
+        "course_table",
+    )
+
+    def __init__(
+        self, calendar, rooms, slot_pool, courses, locked_classes, locked_activities,
+        blocked_slots,
+    ):
+        values = {
+            "calendar": calendar,
+            "rooms": rooms,
+            "slot_pool": FrozenRecord(
+                {room: tuple(slots) for room, slots in slot_pool.items()}
+            ),
+            "courses": tuple(freeze_record(c) for c in courses),
+            "locked_classes": tuple(freeze_record(it) for it in locked_classes),
+            "locked_activities": tuple(freeze_record(it) for it in locked_activities),
+            "blocked_slots": frozenset(t for t in blocked_slots if t != NO_SLOT),
+        }
+        values["course_table"] = CourseTable(
+            values["courses"], {c["course"] for c in values["locked_classes"]}, rooms
         )
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
 
-        # ✅ ตัวนับ section ต่อ (subject_code, curriculum_type) โดยเริ่มจากค่าที่ locked ใช้ไปแล้ว
-        subject_section_counter = defaultdict(int)
-        for key, max_sec in locked_section_map.items():
-            subject_section_counter[key] = int(max_sec)
-
-        for _, row in course_df.iterrows():
-            subject_code = str(row.get("subject_code", "")).strip()
-            subject_name = str(row.get("subject_name", "")).strip()
-            teacher_name = str(row.get("teacher_name", "")).strip()
-            room_type = str(row.get("room_type", "")).strip().lower()
-            theory_slot = int(row.get("theory_slot") or 0)
-            lab_slot = int(row.get("lab_slot") or 0)
-            section_count = int(row.get("section_count") or 0)
-            curriculum_type = str(row.get("curriculum_type", "")).strip() or "ภาคปกติ"
-
-            key = (subject_code)
-
-            for _sec in range(1, section_count + 1):
-                # เพิ่ม section ต่อจากที่ locked ใช้ไปแล้ว
-                subject_section_counter[key] += 1
-                current_section = subject_section_counter[key]
-                suffix = f"_sec{current_section}"
-
-                if theory_slot > 0:
-                    courses.append(
-                        {
-                            "name": subject_code + suffix,
-                            "subject_name": subject_name or subject_code,
-                            "teacher": teacher_name,
-                            "type": "theory",
-                            "room_type": room_type,
-                            "hours": theory_slot,
-                            "curriculum_type": curriculum_type,
-                        }
-                    )
-                if lab_slot > 0:
-                    courses.append(
-                        {
-                            "name": subject_code + suffix + "_lab",
-                            "subject_name": subject_name or subject_code,
-                            "teacher": teacher_name,
-                            "type": "lab",
-                            "room_type": room_type,
-                            "hours": lab_slot,
-                            "curriculum_type": curriculum_type,
-                        }
-                    )
+    def __setattr__(self, name, value):
+        raise AttributeError("ProblemInstance เป็น immutable")
 
-        # ---------------- Locked items ----------------
-        locked_classes = extract_locked_schedule(locked_df)
-        locked_activities = extract_locked_activities(locked_activity_df)
-        all_locked_items = locked_classes + locked_activities
-        locked_names = {c["course"] for c in locked_classes}
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
 
-        # global blocked times (กิจกรรมเท่านั้น)
-        all_blocked_times = get_blocked_times_from_activities(locked_activity_df)
-        
-        apply_blocks_to_slot_pool(locked_activity_df)
-
-        precheck_capacity_or_raise(courses, room_df, locked_classes, locked_activity_df)
-
-        # ---------------- GA components ----------------
-        def create_individual():
-            """
-            สร้าง individual เดียวโดยใช้ "สำเนา" ของ SLOT_POOL (local_pool) เพื่อไม่ส่งผลกับตัวอื่น
-            ใช้ heuristic แบบง่าย: เรียงวิชาที่ยังไม่ล็อกโดยชั่วโมงมากก่อน + ห้องรองรับน้อยก่อน
-            """
-            # เริ่มต้นจากสำเนา pool (ของแต่ละ individual)
-            local_pool = {room: slots.copy() for room, slots in SLOT_POOL.items()}
-
-            individual = list(all_locked_items)  # ใส่ที่ล็อกไว้ก่อน
-            used_times = set()
-            room_usage = set()
-            teacher_usage = set()
-
-            # อัปเดต usage จากของที่ล็อกแล้ว และ remove ออกจาก local_pool
-            for item in individual:
-                for t in item["time"]:
-                    if "NO_VALID_TIME" in t:
-                        continue
-                    used_times.add(t) # บันทึกเวลา
-                    if item.get("room") and item["room"] != "NO_VALID_ROOM":
-                        room_usage.add((item["room"], t)) # บันทึกห้อง
-                        if item["room"] in local_pool and t in local_pool[item["room"]]:
-                            try:
-                                local_pool[item["room"]].remove(t)
-                            except ValueError:
-                                pass
-                    if item.get("teacher"):
-                        teacher_usage.add((item["teacher"], t))
-
-            # ---------- NEW: วางวิชาที่ยังไม่ล็อก (เรียงตาม LPT + Scarcity) ----------
-            unlocked_courses = [c for c in courses if c["name"] not in locked_names]
-
-            def sort_key(c):
-                # 1) ชั่วโมงที่ต้องใช้ (มากก่อน)
-                h_key = -int(c.get("hours", 0))
-                # 2) ห้องรองรับน้อย (scarcity) → มาก่อน
-                room_choices = len(get_valid_rooms(c["room_type"], room_df))
-                scarcity_key = room_choices
-                return (h_key, scarcity_key)
-
-            # เรียงลำดับวิชาที่ยังไม่ล็อก
-            unlocked_courses.sort(key=sort_key)
-
-            # วางวิชาตามลำดับที่เรียงไว้
-            for c in unlocked_courses:
-                valid_room_names = get_valid_rooms(c["room_type"], room_df)
-                curriculum_type = c.get("curriculum_type")
-
-                result = get_consecutive_times(
-                    c["hours"],
-                    all_blocked_times,
-                    room_usage,
-                    valid_room_names,
-                    curriculum_type,
-                    teacher_usage=teacher_usage,
-                    teacher_name=c["teacher"],
-                    slot_pool=local_pool,  # ใช้ pool เฉพาะ individual
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+
+def build_problem_instance(
+    course_df, room_df, locked_df, locked_activity_df, timeslot_df, curriculum_hours=None
+):
+    """
+    compile ข้อมูลดิบ (DataFrame ทั้ง 5 ชุดจาก data_loader) → ProblemInstance
+    curriculum_hours: ช่วงชั่วโมงของแต่ละหลักสูตร (None = CURRICULUM_HOURS) ดู compile_slot_calendar
+    ไม่แตะ state ระดับโมดูล: เรียกพร้อมกันหลาย thread ได้
+    """
+    # ✅ จัด section ของ locked ให้เริ่มจาก 1 ต่อเนื่องตาม (subject_code, curriculum_type)
+    locked_df = normalize_locked_sections(locked_df)
+
+    # ---------------- Locked items (เวลาเป็นสตริง "day_hour") ----------------
+    locked_classes = extract_locked_schedule(locked_df)
+    locked_activities = extract_locked_activities(locked_activity_df)
+    blocked_labels = get_blocked_times_from_activities(locked_activity_df)
+
+    # ---------------- Time slots, calendar & pool ----------------
+    time_slots = preprocess_time_slots(timeslot_df)
+    cal = compile_slot_calendar(
+        time_slots,
+        [t for it in locked_classes + locked_activities for t in it["time"]]
+        + list(blocked_labels),
+        curriculum_hours,
+    )
+    rooms = RoomCatalog(room_df)
+
+    # แปลงเวลาของ locked ทั้งหมดเป็น slot id ครั้งเดียว (GA ใช้ int ตลอด)
+    for it in locked_classes + locked_activities:
+        it["time"] = [cal.parse(t) for t in it["time"]]
+
+    # global blocked times (กิจกรรมเท่านั้น) เป็น slot id
+    blocked_slots = {cal.parse(t) for t in blocked_labels}
+    slot_pool = apply_blocks_to_slot_pool(build_slot_pool(cal, rooms), blocked_slots)
+
+    courses = build_courses(course_df, locked_df)
+
+    return ProblemInstance(
+        cal, rooms, slot_pool, courses, locked_classes, locked_activities, blocked_slots
+    )
+
+
+def build_courses(course_df, locked_df):
+    """
+    แตก course_df เป็นรายการ section ที่ต้องจัด (theory / lab แยกกัน)
+    เลข section ต่อจากที่ locked ใช้ไปแล้วของวิชาเดียวกัน
+    """
+    courses = []
+
+    # ✅ สร้างแผนที่ "max section" ที่ locked ใช้ไปแล้ว ต่อ (subject_code, curriculum_type)
+    locked_section_map = (
+        locked_df.groupby(["subject_code"])["section"]
+        .max()
+        .to_dict()
+        if not locked_df.empty
+        else {}
+    )
+
+    # ✅ ตัวนับ section ต่อ (subject_code, curriculum_type) โดยเริ่มจากค่าที่ locked ใช้ไปแล้ว
+    subject_section_counter = defaultdict(int)
+    for key, max_sec in locked_section_map.items():
+        subject_section_counter[key] = int(max_sec)
+
+    for _, row in course_df.iterrows():
+        subject_code = str(row.get("subject_code", "")).strip()
+        subject_name = str(row.get("subject_name", "")).strip()
+        teacher_name = str(row.get("teacher_name", "")).strip()
+        room_type = str(row.get("room_type", "")).strip().lower()
+        theory_slot = int(row.get("theory_slot") or 0)
+        lab_slot = int(row.get("lab_slot") or 0)
+        section_count = int(row.get("section_count") or 0)
+        curriculum_type = str(row.get("curriculum_type", "")).strip() or "ภาคปกติ"
+
+        key = (subject_code)
+
+        for _sec in range(1, section_count + 1):
+            # เพิ่ม section ต่อจากที่ locked ใช้ไปแล้ว
+            subject_section_counter[key] += 1
+            current_section = subject_section_counter[key]
+            suffix = f"_sec{current_section}"
+
+            if theory_slot > 0:
+                courses.append(
+                    {
+                        "name": subject_code + suffix,
+                        "subject_name": subject_name or subject_code,
+                        "teacher": teacher_name,
+                        "type": "theory",
+                        "room_type": room_type,
+                        "hours": theory_slot,
+                        "curriculum_type": curriculum_type,
+                    }
                 )
-                times = result["times"]
-                available_rooms = result["available_rooms"]
-                selected_room = (
-                    available_rooms[0] if available_rooms else "NO_VALID_ROOM"
+            if lab_slot > 0:
+                courses.append(
+                    {
+                        "name": subject_code + suffix + "_lab",
+                        "subject_name": subject_name or subject_code,
+                        "teacher": teacher_name,
+                        "type": "lab",
+                        "room_type": room_type,
+                        "hours": lab_slot,
+                        "curriculum_type": curriculum_type,
+                    }
                 )
+    return courses
 
-                cls = {
+
+class CourseTable:
+    """
+    ตารางวิชาที่ compile ครั้งเดียวต่อรอบ (ข้อมูลคงที่ของวิชาทั้งหมด ไม่ต้องคำนวณซ้ำต่อ individual)
+    - course id = ลำดับใน courses (คงที่ตลอดรอบ): courses[i] คือ dict ของวิชา i
+    - hours / scarcity: np.ndarray ต่อ course id (scarcity = จำนวนห้องที่รองรับ)
+    - room_type / curriculum / room_candidates: tuple ต่อ course id
+      (room_candidates[i] = ห้องที่รองรับ ลำดับเดียวกับ RoomCatalog.rooms_for)
+    - locked: np.ndarray[bool] วิชาที่ถูกล็อกไว้แล้ว (ชื่อตรงกับ locked_classes)
+    - order: course id ของวิชาที่ยังไม่ล็อก ตามลำดับวางตั้งต้น
+      (LPT: ชั่วโมงมากก่อน → scarcity น้อยก่อน → ลำดับเดิม) = ลำดับยีนของ GAEngine
+    """
+
+    __slots__ = (
+        "courses", "hours", "scarcity", "room_type", "curriculum",
+        "room_candidates", "locked", "order",
+    )
+
+    def __init__(self, courses, locked_names, rooms):
+        self.courses = tuple(courses)
+        self.hours = np.array([int(c.get("hours", 0)) for c in self.courses], dtype=np.int64)
+        self.room_type = tuple(rooms.normalize_type(c["room_type"]) for c in self.courses)
+        self.curriculum = tuple(c.get("curriculum_type") for c in self.courses)
+        self.room_candidates = tuple(rooms.rooms_for(rt) for rt in self.room_type)
+        self.scarcity = np.array([len(r) for r in self.room_candidates], dtype=np.int64)
+        self.locked = np.array(
+            [c["name"] in locked_names for c in self.courses], dtype=bool
+        )
+        free = np.flatnonzero(~self.locked)
+        # lexsort: key สุดท้ายสำคัญสุด และ stable → เสมอกันคงลำดับเดิม
+        self.order = free[np.lexsort((self.scarcity[free], -self.hours[free]))]
+
+    def __len__(self):
+        return len(self.courses)
+
+    def unlocked(self):
+        """dict ของวิชาที่ยังไม่ล็อก ตามลำดับวางตั้งต้น"""
+        return [self.courses[i] for i in self.order]
+
+
+# ===============================================================
+# Construction: สถานะระหว่างสร้าง individual 1 ตัว (ใช้กับ bounded backtracking)
+# ===============================================================
+class Construction:
+    """
+    pool/occupancy/chromosome ของ individual ที่กำลังสร้าง + เจ้าของ (ยีน) ของทุก
+    (ห้อง, slot) และ (อาจารย์, slot) ที่วางไปแล้ว → รู้ว่ายีนไหนขวางตัวเลือกหนึ่งอยู่
+    ทุกการวาง/ถอนลง trail → mark() / rollback(mark) ย้อนกลับได้
+    nodes: งบจำนวนตัวเลือกที่ backtracking ลองได้ทั้ง individual
+    failed: signature ของยีนที่ซ่อมไม่สำเร็จ (ยีนหน้าตาเดียวกันไม่ต้องลองซ้ำจนกว่าจะซ่อมสำเร็จสักตัว)
+    """
+
+    __slots__ = (
+        "engine", "pool", "occupancy", "starts", "rooms",
+        "room_owner", "teacher_owner", "trail", "nodes", "failed",
+    )
+
+    def __init__(self, engine, nodes=0):
+        self.engine = engine
+        self.pool = engine.base_pool.copy()
+        self.occupancy = engine.base_occupancy.copy()  # usage ของที่ล็อกแล้ว
+        n = len(engine.genes)
+        self.starts = np.full(n, NO_SLOT, dtype=np.int32)
+        self.rooms = np.full(n, -1, dtype=np.int16)
+        self.room_owner = np.full(self.pool.free.shape, -1, dtype=np.int32)
+        self.teacher_owner = np.full(self.occupancy.teacher_busy.shape, -1, dtype=np.int32)
+        self.trail = []
+        self.nodes = nodes
+        self.failed = set()
+
+    def place(self, g, rng):
+        """วางยีน g ในช่วงที่ยังว่าง (GAEngine._place) → True ถ้าวางได้"""
+        start, room_id, _ = self.engine._place(g, self.occupancy, self.pool, rng)
+        if start == NO_SLOT:
+            return False
+        self._occupy(g, room_id, start, pool_reserved=True)
+        return True
+
+    def assign(self, g, room_id, start):
+        """วางยีน g ที่ (ห้อง, slot เริ่ม) ที่กำหนด (ผู้เรียกต้องถอนยีนที่ขวางออกก่อน)"""
+        self._occupy(g, room_id, start)
+
+    def unassign(self, g):
+        """ถอนยีน g ออกจากตาราง (คืน slot ให้ pool/occupancy)"""
+        room_id, start = int(self.rooms[g]), int(self.starts[g])
+        self._vacate(g)
+        self.trail.append((g, room_id, start))
+
+    def owners(self, g, cands):
+        """
+        ยีนที่วางอยู่ในทุกชั่วโมงของตัวเลือก cands ของยีน g → อาร์เรย์ (ตัวเลือก × 2·ชั่วโมง)
+        (ครึ่งแรกเจ้าของห้อง ครึ่งหลังเจ้าของอาจารย์; -1 = ว่าง)
+        """
+        engine = self.engine
+        slots = engine.cand_starts[cands][:, None] + np.arange(int(engine.gene_hours[g]))
+        by_room = self.room_owner[engine.cand_rows[cands][:, None], slots]
+        t = engine.gene_teacher_rows[g]
+        if t < 0:
+            return np.concatenate((by_room, np.full_like(by_room, -1)), axis=1)
+        return np.concatenate((by_room, self.teacher_owner[t, slots]), axis=1)
+
+    def mark(self):
+        return len(self.trail)
+
+    def rollback(self, mark):
+        """ย้อนทุกการวาง/ถอนหลัง mark"""
+        while len(self.trail) > mark:
+            g, room_id, start = self.trail.pop()
+            if room_id < 0:
+                self._vacate(g)
+            else:
+                self._occupy(g, room_id, start, record=False)
+
+    def _occupy(self, g, room_id, start, pool_reserved=False, record=True):
+        engine = self.engine
+        room = engine.room_name(room_id)
+        times = list(range(start, start + int(engine.gene_hours[g])))
+        if not pool_reserved:
+            self.pool.reserve(room, times)
+        self.occupancy.reserve(room, engine.genes[g]["teacher"], times)
+        self.room_owner[room_id, times] = g
+        t = engine.gene_teacher_rows[g]
+        if t >= 0:
+            self.teacher_owner[t, times] = g
+        self.starts[g] = start
+        self.rooms[g] = room_id
+        if record:
+            self.trail.append((g, -1, NO_SLOT))
+
+    def _vacate(self, g):
+        engine = self.engine
+        room_id, start = int(self.rooms[g]), int(self.starts[g])
+        room = engine.room_name(room_id)
+        times = list(range(start, start + int(engine.gene_hours[g])))
+        self.pool.release(room, times)
+        self.occupancy.release(room, engine.genes[g]["teacher"], times)
+        self.room_owner[room_id, times] = -1
+        t = engine.gene_teacher_rows[g]
+        if t >= 0:
+            self.teacher_owner[t, times] = -1
+        self.starts[g] = NO_SLOT
+        self.rooms[g] = -1
+
+
+# ===============================================================
+# GA engine: ข้อมูลคงที่ของรอบ + ตัวดำเนินการ (ส่งไป worker process ได้)
+# ===============================================================
+CROSSOVER_MODES = ("uniform", "segment", "onepoint")
+
+
+class GAEngine:
+    """
+    รวมข้อมูลที่ไม่เปลี่ยนตลอดรอบ (courses, ห้อง, ของที่ล็อก, pool, occupancy ตั้งต้น, evaluator)
+    กับตัวดำเนินการ GA ไว้ใน object ระดับโมดูล → pickle ส่งให้ worker ได้ครั้งเดียวต่อ process
+    ตัวดำเนินการทุกตัวรับ rng เพื่อให้ผลลัพธ์ขึ้นกับ seed เท่านั้น (ไม่ขึ้นกับจำนวน worker)
+    สร้างจาก ProblemInstance ตัวเดียว (ไม่อ่าน state ระดับโมดูล)
+    backtrack_depth / backtrack_nodes: ตอนสร้าง individual ถ้ายีนหาช่วงว่างไม่ได้ ให้ย้ายยีนที่ขวาง
+    ออกได้ไม่เกิน backtrack_depth ตัวแล้ววางใหม่ ลองได้ไม่เกิน backtrack_nodes ตัวเลือกต่อ individual
+    (0 = ปิด → ยีนนั้นเป็น NO_SLOT ทันทีแบบเดิม)
+    crossover_mode / crossover_repair: วิธีผสมพันธุ์และการซ่อมลูก (ดู crossover)
+    """
+
+    def __init__(
+        self, problem, backtrack_depth=2, backtrack_nodes=50,
+        crossover_mode="onepoint", crossover_repair=False,
+    ):
+        if crossover_mode not in CROSSOVER_MODES:
+            raise ValueError(
+                f"ไม่รู้จัก crossover '{crossover_mode}' (ที่มี: {', '.join(CROSSOVER_MODES)})"
+            )
+        self.problem = problem
+        self.backtrack_depth = backtrack_depth
+        self.backtrack_nodes = backtrack_nodes
+        self.crossover_mode = crossover_mode
+        self.crossover_repair = crossover_repair
+        self.courses = problem.courses
+        self.rooms = rooms = problem.rooms  # RoomCatalog ของรอบนี้
+        locked_classes = list(problem.locked_classes)
+        self.course_table = table = problem.course_table
+        self.locked_names = {c["course"] for c in locked_classes}
+        self.all_locked_items = locked_classes + list(problem.locked_activities)
+        self.blocked_times = blocked_times = problem.blocked_slots
+        self.calendar = problem.calendar
+        self.slot_pool = problem.slot_pool
+        self.segment_index = SegmentIndex(self.calendar, self.slot_pool, blocked_times)
+
+        # Occupancy ตั้งต้น (ของที่ล็อก) สร้างครั้งเดียว
+        self.base_occupancy = Occupancy(
+            list(self.slot_pool)
+            + [it["room"] for it in locked_classes if it.get("room")],
+            [c["teacher"] for c in self.courses if c["teacher"]]
+            + [it["teacher"] for it in locked_classes if it.get("teacher")],
+            len(self.calendar),
+        )
+        self.base_occupancy.reserve_all(self.all_locked_items)
+
+        # pool ตั้งต้นที่หักเวลาของที่ล็อกออกแล้ว (individual ทุกตัว copy จากอันนี้)
+        self.initial_pool = SlotPool(self.slot_pool, len(self.calendar))
+        self.base_pool = self.initial_pool.copy()
+        self.base_pool.reserve_all(self.all_locked_items)
+
+        # ---------- ลำดับยีนคงที่ของ chromosome ----------
+        # วิชาที่ยังไม่ล็อก เรียงตาม LPT + Scarcity (ลำดับที่ create_individual วาง) จาก CourseTable
+        # ยีน g = วิชา course id gene_course[g]
+        self.gene_course = table.order
+        self.genes = tuple(table.unlocked())
+        self.gene_rooms = tuple(table.room_candidates[i] for i in table.order)
+
+        room_index = self.base_occupancy.room_index
+        teacher_index = self.base_occupancy.teacher_index
+        self.room_names = tuple(room_index)  # id ห้อง → ชื่อ
+        self.room_id = room_index  # ชื่อห้อง → id
+        gene_hours = table.hours[table.order]
+        self.gene_teacher_rows = np.array(
+            [teacher_index.get(c["teacher"], -1) if c["teacher"] else -1 for c in self.genes],
+            dtype=np.int64,
+        )
+        # กระจายยีน → ชั่วโมง: ชั่วโมงที่ k ของ chromosome เป็นของยีน _hour_gene[k]
+        # และอยู่ห่างจาก slot เริ่ม _hour_offset[k]
+        self._hour_gene = np.repeat(np.arange(len(self.genes)), gene_hours)
+        self._hour_offset = np.arange(len(self._hour_gene)) - np.repeat(
+            np.cumsum(gene_hours) - gene_hours, gene_hours
+        )
+
+        # กลุ่มยีนที่สลับ (ห้อง, เวลา) กันได้ตรง ๆ: ชั่วโมง / ประเภทห้อง / หลักสูตรเดียวกัน
+        # signature (กลุ่ม swap + อาจารย์): ยีนที่ signature เท่ากันวางได้ที่เดียวกันทุกประการ
+        swap_groups = defaultdict(list)
+        self.gene_signature = []
+        for g, c in enumerate(self.genes):
+            key = (int(c["hours"]), rooms.normalize_type(c["room_type"]), c.get("curriculum_type"))
+            swap_groups[key].append(g)
+            self.gene_signature.append((key, c["teacher"]))
+        self.swap_partners = [None] * len(self.genes)
+        for members in swap_groups.values():
+            if len(members) > 1:
+                for g in members:
+                    self.swap_partners[g] = members
+
+        # ---------- conflict graph ของยีน (ใช้กับ DSATUR seeding) ----------
+        # ยีน 2 ตัวเป็นเพื่อนบ้านกันถ้าใช้อาจารย์คนเดียวกัน หรือแย่งห้องชุดเดียวกัน
+        # (ประเภทห้องที่มีห้องรองรับร่วมกัน) → วางยีนหนึ่งแล้วกระทบเฉพาะตัวเลือกของเพื่อนบ้าน
+        self.gene_hours = gene_hours
+        type_ids = {}
+        self.gene_type = np.array(
+            [
+                type_ids.setdefault(rooms.normalize_type(c["room_type"]), len(type_ids))
+                for c in self.genes
+            ],
+            dtype=np.int64,
+        )
+        type_rooms = [
+            [room_index[r] for r in rooms.rooms_for(rt) if r in self.base_pool]
+            for rt in type_ids
+        ]
+        type_overlap = np.eye(len(type_ids), dtype=bool)
+        for a in range(len(type_ids)):
+            for b in range(a + 1, len(type_ids)):
+                if set(type_rooms[a]) & set(type_rooms[b]):
+                    type_overlap[a, b] = type_overlap[b, a] = True
+        t = self.gene_teacher_rows
+        adjacency = ((t[:, None] == t[None, :]) & (t[:, None] >= 0)) | type_overlap[
+            np.ix_(self.gene_type, self.gene_type)
+        ]
+        np.fill_diagonal(adjacency, False)
+        self.conflict_degree = adjacency.sum(axis=1)
+        # ตัวเลือก (ห้อง, slot เริ่ม) ที่ถูกกติกาคงที่ของทุกยีน แบบ flat:
+        # ตัวเลือก gene_candidates[g] ของยีน g คือ cand_rows/cand_starts/cand_ends ที่ index นั้น
+        cand_rows, cand_starts, self.gene_candidates = [], [], []
+        pos = 0
+        for c, gene_rooms in zip(self.genes, self.gene_rooms):
+            first = pos
+            for room in gene_rooms:
+                if room not in self.base_pool:
+                    continue
+                st = self.segment_index.starts(room, c.get("curriculum_type"), int(c["hours"]))
+                cand_rows.append(np.full(len(st), room_index[room], dtype=np.int64))
+                cand_starts.append(st)
+                pos += len(st)
+            self.gene_candidates.append(np.arange(first, pos))
+        self.cand_rows = np.concatenate(cand_rows) if cand_rows else np.zeros(0, np.int64)
+        self.cand_starts = (
+            np.concatenate(cand_starts).astype(np.int64) if cand_starts else np.zeros(0, np.int64)
+        )
+        self.cand_count = np.array([len(ix) for ix in self.gene_candidates], dtype=np.int64)
+        self.cand_gene = np.repeat(np.arange(len(self.genes)), self.cand_count)
+        self.cand_ends = self.cand_starts + gene_hours[self.cand_gene]
+        # ตัวเลือกที่ใช้ห้อง r / อาจารย์ t (ขอบของ conflict graph ในระดับตัวเลือก)
+        cand_teacher = self.gene_teacher_rows[self.cand_gene]
+        self.room_candidates = {
+            int(r): np.flatnonzero(self.cand_rows == r) for r in np.unique(self.cand_rows)
+        }
+        self.teacher_candidates = {
+            int(t): np.flatnonzero(cand_teacher == t)
+            for t in np.unique(cand_teacher)
+            if t >= 0
+        }
+        # ตัวเลือกที่ยังใช้ได้หลังหักของที่ล็อก (ตัวที่ False ไม่มีทางใช้ได้ใน individual ไหน)
+        self.base_cand_ok = self.candidate_ok(self.base_pool, self.base_occupancy)
+        self.base_options = np.bincount(
+            self.cand_gene, weights=self.base_cand_ok, minlength=len(self.genes)
+        )
+
+        # สร้างดัชนีช่วงเวลาของทุก (ห้อง, หลักสูตร, ชั่วโมง) ที่ courses ต้องใช้ไว้ก่อนเลย
+        for c, gene_rooms in zip(self.genes, self.gene_rooms):
+            for room in gene_rooms:
+                self.segment_index.starts(
+                    room, c.get("curriculum_type"), int(c["hours"])
+                )
+
+        self.evaluator = BatchFitness(
+            self.calendar,
+            blocked_times,
+            self.base_occupancy.room_index,
+            self.base_occupancy.teacher_index,
+            self.all_locked_items,
+            self.genes,
+        )
+
+    def room_name(self, room_id):
+        return self.room_names[room_id] if room_id >= 0 else "NO_VALID_ROOM"
+
+    def candidate_ok(self, pool, occupancy):
+        """
+        np.ndarray[bool] ต่อตัวเลือก (ห้อง, ช่วง [s, e)) ของทุกยีน: True ถ้าห้องว่างใน pool และ
+        อาจารย์ว่างทั้งช่วง (เช็กจาก prefix sum ของความว่าง; ยีนที่ไม่มีอาจารย์ไม่ต้องเช็กอาจารย์)
+        """
+        n_slots = pool.free.shape[1]
+        room_cs = np.zeros((pool.free.shape[0], n_slots + 1), dtype=np.int32)
+        room_cs[:, 1:] = np.cumsum(pool.free, axis=1)
+        teacher_cs = np.zeros((occupancy.teacher_busy.shape[0], n_slots + 1), dtype=np.int32)
+        teacher_cs[:, 1:] = np.cumsum(occupancy.teacher_busy == 0, axis=1)
+        rows, s, e = self.cand_rows, self.cand_starts, self.cand_ends
+        teacher = self.gene_teacher_rows[self.cand_gene]
+        t = np.maximum(teacher, 0)
+        ok = room_cs[rows, e] - room_cs[rows, s] == e - s
+        ok &= (teacher < 0) | (teacher_cs[t, e] - teacher_cs[t, s] == e - s)
+        return ok
+
+    def _backtrack(self, build, g, depth, rng, frozen=frozenset()):
+        """
+        วางยีน g ที่หาช่วงว่างไม่ได้ โดยถอนยีนที่ขวาง (ใช้ห้อง/อาจารย์ชนกัน) ออกไม่เกิน depth ตัว
+        แล้ววางยีนเหล่านั้นใหม่: ลองช่วงว่างก่อน ถ้าไม่ได้ backtrack ต่อด้วย depth ที่เหลือ
+        ลองตัวเลือกที่ขวางน้อยก่อน (เสมอกันสุ่ม); ยีนใน frozen (กำลังซ่อมอยู่ในสายนี้) ห้ามถอน
+        และไม่ถอนยีนที่ signature เดียวกับ g (สลับที่กันเฉย ๆ ไม่ได้อะไร)
+        ทุกตัวเลือกที่ลองใช้งบ build.nodes 1 หน่วย; ไม่สำเร็จ → build กลับเป็นสภาพเดิม
+        คืน True ถ้าวาง g ได้
+        """
+        cands = self.gene_candidates[g]
+        cands = cands[self.base_cand_ok[cands]]
+        if not cands.size:
+            return False
+        # จำนวนยีนที่ขวางของแต่ละตัวเลือก (นับเจ้าของไม่ซ้ำต่อแถว)
+        owners = np.sort(build.owners(g, cands), axis=1)
+        distinct = (owners >= 0) & np.concatenate(
+            (np.ones((len(cands), 1), dtype=bool), owners[:, 1:] != owners[:, :-1]), axis=1
+        )
+        counts = distinct.sum(axis=1)
+        options = []
+        sig = self.gene_signature[g]
+        for i in np.flatnonzero((counts > 0) & (counts <= depth)):
+            blockers = set(owners[i][distinct[i]].tolist())
+            if not blockers & frozen and all(self.gene_signature[b] != sig for b in blockers):
+                options.append((int(counts[i]), rng.random(), int(cands[i]), blockers))
+        options.sort(key=lambda o: o[:3])
+
+        inner = frozen | {g}
+        for k, _, ci, blockers in options:
+            if build.nodes <= 0:
+                break
+            build.nodes -= 1
+            mark = build.mark()
+            for b in blockers:
+                build.unassign(b)
+            build.assign(g, int(self.cand_rows[ci]), int(self.cand_starts[ci]))
+            if all(
+                build.place(b, rng)
+                or (depth - k > 0 and self._backtrack(build, b, depth - k, rng, inner))
+                for b in sorted(blockers)
+            ):
+                return True
+            build.rollback(mark)
+        return False
+
+    def _repair(self, build, g, rng):
+        """ยีน g หาช่วงว่างไม่ได้ → ลอง bounded backtracking ถ้ายังมีงบ (True ถ้าวางได้)"""
+        sig = self.gene_signature[g]
+        if self.backtrack_depth <= 0 or build.nodes <= 0 or sig in build.failed:
+            return False
+        if self._backtrack(build, g, self.backtrack_depth, rng):
+            build.failed.clear()
+            return True
+        build.failed.add(sig)
+        return False
+
+    def _expand(self, starts):
+        """(ยีน, slot) ของทุกชั่วโมงที่วางได้แล้วใน chromosome (ข้ามยีนที่เป็น NO_SLOT)"""
+        first = starts.astype(np.int64)[self._hour_gene]
+        keep = first >= 0
+        return self._hour_gene[keep], (first + self._hour_offset)[keep]
+
+    def occupancy_of(self, individual):
+        """Occupancy ของทั้งตาราง (ของที่ล็อก + ทุกยีน)"""
+        occupancy = self.base_occupancy.copy()
+        genes, slots = self._expand(individual.starts)
+        occupancy.reserve_rows(
+            individual.rooms.astype(np.int64)[genes], self.gene_teacher_rows[genes], slots
+        )
+        return occupancy
+
+    def decode(self, individual):
+        """chromosome → รายการคลาส (dict) แบบเดิม: ของที่ล็อกก่อน แล้วตามลำดับยีน"""
+        classes = [dict(it, time=list(it["time"])) for it in self.all_locked_items]
+        for g, c in enumerate(self.genes):
+            start = int(individual.starts[g])
+            classes.append(
+                {
                     "course": c["name"],
                     "subject_name": c.get("subject_name", c["name"]),
                     "teacher": c["teacher"],
-                    "room": selected_room,
+                    "room": self.room_name(int(individual.rooms[g])),
                     "room_type": c["room_type"],
                     "type": c["type"],
-                    "time": times,
-                    "curriculum_type": curriculum_type,
+                    "time": self.evaluator.gene_times(g, start),
+                    "curriculum_type": c.get("curriculum_type"),
                 }
+            )
+        return classes
+
+    def _place(self, g, occupancy, local_pool, rng):
+        """หาช่วงเวลา/ห้องใหม่ให้ยีน g → (start, room id, times)"""
+        c = self.genes[g]
+        result = get_consecutive_times(
+            c["hours"],
+            self.segment_index,
+            occupancy,
+            self.gene_rooms[g],
+            c.get("curriculum_type"),
+            teacher_name=c["teacher"],
+            slot_pool=local_pool,  # ใช้ pool เฉพาะ individual
+            rng=rng,
+        )
+        times = result["times"]
+        avail = result["available_rooms"]
+        if not avail:
+            return NO_SLOT, -1, times
+        return times[0], self.room_id[avail[0]], times
+
+    def create_individual(self, rng=random):
+        """
+        สร้าง individual เดียวโดยใช้ "สำเนา" ของ pool ตั้งต้น (local_pool) เพื่อไม่ส่งผลกับตัวอื่น
+        ใช้ heuristic แบบง่าย: วางตามลำดับยีน (ชั่วโมงมากก่อน + ห้องรองรับน้อยก่อน)
+        """
+        # เริ่มต้นจากสำเนา pool (ของแต่ละ individual) ที่หักเวลาของที่ล็อกไว้แล้ว
+        build = Construction(self, self.backtrack_nodes)
+
+        # ---------- NEW: วางวิชาที่ยังไม่ล็อก (เรียงตาม LPT + Scarcity) ----------
+        for g in range(len(self.genes)):
+            if not build.place(g, rng):
+                self._repair(build, g, rng)  # ไม่สำเร็จ → ยีนนั้นเป็น NO_SLOT
+
+        return Individual(build.starts, build.rooms)
+
+    def seed_individual(self, rng=random, noise=0.0):
+        """
+        สร้าง individual แบบ DSATUR บน conflict graph: แทนที่จะวางตามลำดับยีนคงที่
+        เลือกยีนที่ "อิ่มตัว" ที่สุดก่อนทุกครั้ง คือยีนที่เหลือตัวเลือก (ห้อง, ช่วงเวลา)
+        ที่ยังวางได้จริง (ห้องว่างทั้งช่วง + อาจารย์ว่างทั้งช่วง) ต่อชั่วโมงที่ต้องใช้น้อยที่สุด
+        เสมอกัน → degree มากก่อน
+        วางยีนแล้วตัดเฉพาะตัวเลือกของเพื่อนบ้าน (ห้อง/อาจารย์เดียวกัน) ที่ทับช่วงนั้นออก
+        noise > 0: variant แบบสุ่ม — คูณจำนวนตัวเลือกด้วย 1 + noise × U(0, 1) (คงที่ต่อยีน)
+        """
+        build = Construction(self, self.backtrack_nodes)
+        n = len(self.genes)
+        if not n:
+            return Individual(build.starts, build.rooms)
+
+        ok = self.base_cand_ok.copy()
+        options = self.base_options.copy()
+        s, e = self.cand_starts, self.cand_ends
+
+        scale = np.ones(n)
+        if noise:
+            scale += noise * np.array([rng.random() for _ in range(n)])
+        tie = -self.conflict_degree / (self.conflict_degree.max() + 1.0)
+        weight = scale / self.gene_hours
+
+        keys = options * weight + tie
+        for _ in range(n):
+            g = int(np.argmin(keys))
+            keys[g] = np.inf
+            if not build.place(g, rng):
+                if self._repair(build, g, rng):
+                    # backtracking ย้ายยีนอื่นด้วย → นับตัวเลือกใหม่ทั้งหมด
+                    ok = self.candidate_ok(build.pool, build.occupancy)
+                    options = np.bincount(self.cand_gene, weights=ok, minlength=n)
+                    left = np.isfinite(keys)
+                    keys[left] = options[left] * weight[left] + tie[left]
+                continue
 
-                # อัปเดต usage + remove
-                for t in times:
-                    if "NO_VALID_TIME" in t:
-                        continue
-                    used_times.add(t)
-                    if selected_room != "NO_VALID_ROOM":
-                        room_usage.add((selected_room, t))
-                        if (
-                            selected_room in local_pool
-                            and t in local_pool[selected_room]
-                        ):
-                            try:
-                                local_pool[selected_room].remove(t)
-                            except ValueError:
-                                pass
-                    if c["teacher"]:
-                        teacher_usage.add((c["teacher"], t))
-
-                individual.append(cls)
-
-            return individual
-
-        def fitness(individual):
-            """
-            ให้คะแนนตาราง: กันชนห้อง/อาจารย์, เคารพหลักสูตร, bonus ช่วงต่อเนื่อง
-            """
-            score = 0
-            used = {"teacher_time": set(), "room_time": set()}
-
-            for cls in individual:
-                curriculum_type = cls.get("curriculum_type", "ภาคปกติ")
-
-                # ตรวจเวลาแต่ละสลอต
-                for t in cls["time"]:
-                    if "NO_VALID_TIME" in t:
-                        score -= 1000
-                        continue
-
-                    if t in all_blocked_times:
-                        score -= 1000
-
-                    if "_" not in t:
-                        score -= 50
-                        continue
-
-                    day, hour_str = t.split("_")
-                    try:
-                        hour = int(hour_str)
-                    except Exception:
-                        score -= 50
-                        continue
-
-                    valid_hours = get_hours_for_day(day, curriculum_type)
-                    if hour not in valid_hours:
-                        score -= 50
-                        continue
-
-                    # กันชนอาจารย์
-                    if cls.get("teacher"):
-                        key = (cls["teacher"], t)
-                        if key in used["teacher_time"]:
-                            score -= 1000
-                        else:
-                            used["teacher_time"].add(key)
-                            score += 30
-
-                    # กันชนห้อง
-                    room = cls.get("room")
-                    if room and room != "NO_VALID_ROOM":
-                        key = (room, t)
-                        if key in used["room_time"]:
-                            score -= 1000
-                        else:
-                            used["room_time"].add(key)
-                            score += 30
-
-                # bonus: เวลาต่อเนื่องในวันเดียวกัน
-                valid_times = [
-                    t for t in cls["time"] if "NO_VALID_TIME" not in t and "_" in t
-                ]
-                if valid_times:
-                    times_sorted = sorted(
-                        valid_times,
-                        key=lambda x: (x.split("_")[0], int(x.split("_")[1])),
-                    )
-                    contiguous_bonus = 0
-                    prev_day, prev_hour = None, None
-                    for t in times_sorted:
-                        d, h = t.split("_")
-                        h = int(h)
-                        if (
-                            prev_day == d
-                            and prev_hour is not None
-                            and h == prev_hour + 1
-                        ):
-                            contiguous_bonus += 5
-                        prev_day, prev_hour = d, h
-                    score += contiguous_bonus
-
-            return score
-
-        def crossover(p1, p2):
-            """
-            ผสมพันธุ์: รักษารายการที่ล็อกไว้ + ผสมส่วนที่ไม่ล็อก
-            """
-            locked = [
-                cls.copy()
-                for cls in p1
-                if cls["course"] in locked_names or cls["type"] == "activity"
-            ]
-            u1 = [
-                cls.copy()
-                for cls in p1
-                if cls["course"] not in locked_names and cls["type"] != "activity"
-            ]
-            u2 = [
-                cls.copy()
-                for cls in p2
-                if cls["course"] not in locked_names and cls["type"] != "activity"
-            ]
+            # ตัวเลือกของเพื่อนบ้านที่ใช้ห้อง/อาจารย์เดียวกันและทับช่วงที่เพิ่งวาง → ใช้ไม่ได้แล้ว
+            room_id = int(build.rooms[g])
+            lo = int(build.starts[g])
+            hi = lo + int(self.gene_hours[g])
+            lost = []
+            for ix in (
+                self.room_candidates.get(int(room_id)),
+                self.teacher_candidates.get(int(self.gene_teacher_rows[g])),
+            ):
+                if ix is not None:
+                    ix = ix[ok[ix] & (s[ix] < hi) & (e[ix] > lo)]
+                    ok[ix] = False  # ตัวที่โดนทั้งห้องและอาจารย์จะไม่ถูกนับซ้ำ
+                    lost.append(ix)
+            idx = np.concatenate(lost) if lost else ()
+            if len(idx):
+                lost = np.bincount(self.cand_gene[idx], minlength=n)
+                changed = np.flatnonzero(lost)
+                options[changed] -= lost[changed]
+                changed = changed[np.isfinite(keys[changed])]
+                keys[changed] = options[changed] * weight[changed] + tie[changed]
+
+        return Individual(build.starts, build.rooms)
+
+    def build_individual(self, rng=random, seeding="greedy", noise=0.0):
+        """สร้าง individual ตามวิธี seeding ("dsatur" = seed_individual, "greedy" = create_individual)"""
+        if seeding == "dsatur":
+            return self.seed_individual(rng, noise)
+        if seeding == "greedy":
+            return self.create_individual(rng)
+        raise ValueError(f"ไม่รู้จัก seeding '{seeding}' (ที่มี: dsatur, greedy)")
+
+    def crossover(self, p1, p2, rng=random):
+        """
+        ผสมพันธุ์บน chromosome ที่ index ด้วยยีน (ยีน g = วิชา gene_course[g] เหมือนกันทุกตัว
+        จึงเลือกยีนรายวิชาจากพ่อหรือแม่ได้ตรง ๆ; ของที่ล็อกใช้ร่วมกันจาก engine อยู่แล้ว)
+        crossover_mode: "uniform" = สุ่มพ่อ/แม่ทีละยีน, "segment" = ช่วงยีนสุ่ม 1 ช่วงจาก p2,
+                        "onepoint" = จุดตัดเดียวแบบเดิม
+        crossover_repair: หลังผสมแล้ววางยีนที่ชนกันใหม่ (ดู repair)
+        """
+        n = len(self.genes)
+        if n > 1:
+            if self.crossover_mode == "uniform":
+                bits = rng.getrandbits(n).to_bytes((n + 7) // 8, "little")
+                take = np.unpackbits(
+                    np.frombuffer(bits, dtype=np.uint8), bitorder="little"
+                )[:n].astype(bool)
+            else:
+                if self.crossover_mode == "segment":
+                    lo, hi = sorted(rng.sample(range(n + 1), 2))
+                else:
+                    lo, hi = rng.randint(1, n - 1), n
+                take = np.zeros(n, dtype=bool)
+                take[lo:hi] = True
+            starts = np.where(take, p2.starts, p1.starts)
+            room_ids = np.where(take, p2.rooms, p1.rooms)
+        else:
+            starts, room_ids = p1.starts.copy(), p1.rooms.copy()
+
+        if self.crossover_repair:
+            self.repair(starts, room_ids, rng)
+        return Individual(starts, room_ids)
+
+    def clashing_genes(self, starts, room_ids):
+        """
+        ยีนที่ต้องวางใหม่ (np.ndarray เรียงตามลำดับยีน): หาเวลาไม่ได้ / ทับ slot ที่ห้องใช้ไม่ได้
+        (นอก pool, ถูกบล็อก, ของที่ล็อก) / อาจารย์ไม่ว่างเพราะของที่ล็อก / ผิดหลักสูตร
+        หรือชนห้อง/อาจารย์กับยีนก่อนหน้า (ยีนแรกตามลำดับยีนได้ที่นั้นไป ตัวหลังถูกวางใหม่)
+        """
+        ev = self.evaluator
+        genes, slots = self._expand(starts)
+        rows = room_ids.astype(np.int64)[genes]
+        teachers = self.gene_teacher_rows[genes]
+        n_slots = len(self.calendar)
+
+        bad = ~ev.legal[ev.col_cur[ev.n_locked + genes], slots]
+        has_room = (rows >= 0) & (rows < self.base_pool.free.shape[0])
+        bad |= ~has_room
+        bad[has_room] |= ~self.base_pool.free[rows[has_room], slots[has_room]]
+        has_teacher = teachers >= 0
+        bad[has_teacher] |= (
+            self.base_occupancy.teacher_busy[teachers[has_teacher], slots[has_teacher]] > 0
+        )
+        # ยีนเรียงจากน้อยไปมากอยู่แล้ว → ตัวแรกของแต่ละ cell คือยีนที่มาก่อน
+        for keep, key in (
+            (has_room, rows * n_slots + slots),
+            (has_teacher, teachers * n_slots + slots),
+        ):
+            idx = np.flatnonzero(keep)
+            _, first = np.unique(key[idx], return_index=True)
+            dup = np.ones(len(idx), dtype=bool)
+            dup[first] = False
+            bad[idx[dup]] = True
+
+        lost = np.zeros(len(starts), dtype=bool)
+        lost[genes[bad]] = True
+        lost[starts < 0] = True
+        return np.flatnonzero(lost)
+
+    def _place_candidate(self, g, occupancy, local_pool, rng):
+        """
+        หาที่ใหม่ให้ยีน g จากตัวเลือก (ห้อง, slot เริ่ม) ที่ compile ไว้แล้ว (gene_candidates)
+        เช็กเฉพาะ slot ของตัวเลือกกับ pool (ห้อง) + occupancy (อาจารย์) → (start, room id)
+        เลือกแบบ get_consecutive_times: ช่วงแรกที่ว่างของแต่ละห้อง แล้วห้องที่ใช้น้อยสุด (เสมอกันสุ่ม)
+        หาไม่ได้คืน (NO_SLOT, -1)
+        """
+        cands = self.gene_candidates[g]
+        cands = cands[self.base_cand_ok[cands]]
+        if not cands.size:
+            return NO_SLOT, -1
+        rows = self.cand_rows[cands]
+        windows = self.cand_starts[cands][:, None] + np.arange(int(self.gene_hours[g]))
+        ok = local_pool.free[rows[:, None], windows].all(axis=1)
+        t = self.gene_teacher_rows[g]
+        if t >= 0:
+            ok &= (occupancy.teacher_busy[t][windows] == 0).all(axis=1)
+        hit = np.flatnonzero(ok)
+        if not hit.size:
+            return NO_SLOT, -1
+        # ตัวเลือกเรียงตามห้อง (ลำดับ gene_rooms) แล้วตาม slot → ตัวแรกของแต่ละห้องคือช่วงแรกที่ว่าง
+        _, first = np.unique(rows[hit], return_index=True)
+        hit = hit[np.sort(first)]
+        load = occupancy.room_load[rows[hit]]
+        best = hit[load == load.min()]
+        ci = int(best[rng.randrange(best.size)])
+        return int(self.cand_starts[cands[ci]]), int(rows[ci])
+
+    def repair(self, starts, room_ids, rng=random):
+        """
+        ซ่อม chromosome (แก้ starts / room_ids ในที่): ถอนยีนที่ชน (clashing_genes) ออก
+        แล้ววางใหม่ทีละตัวตามลำดับยีนในช่วงที่ยังว่างจริง (ห้อง + อาจารย์) ด้วย _place_candidate
+        ยีนที่หาที่ว่างไม่ได้คงตำแหน่งเดิมไว้ (ยังโดนหักคะแนนแบบเดิม) → คืนจำนวนยีนที่ย้ายได้
+        """
+        lost = self.clashing_genes(starts, room_ids)
+        if not len(lost):
+            return 0
+        kept_starts = starts.copy()
+        kept_starts[lost] = NO_SLOT
+        genes, slots = self._expand(kept_starts)
+        rows = room_ids.astype(np.int64)[genes]
+        occupancy = self.base_occupancy.copy()
+        occupancy.reserve_rows(rows, self.gene_teacher_rows[genes], slots)
+        local_pool = self.base_pool.copy()
+        local_pool.reserve_rows(rows, slots)
+
+        moved = 0
+        for g in lost.tolist():
+            start, room_id = self._place_candidate(g, occupancy, local_pool, rng)
+            if start == NO_SLOT:
+                continue
+            room = self.room_name(room_id)
+            times = self.evaluator.gene_times(g, start)
+            local_pool.reserve(room, times)
+            occupancy.reserve(room, self.genes[g]["teacher"], times)
+            starts[g] = start
+            room_ids[g] = room_id
+            moved += 1
+        return moved
+
+    def mutate(self, individual, rate=0.02, rng=random, state=None):
+        """
+        กลายพันธุ์: เคลื่อนยีน (วิชาที่ไม่ล็อก) ไปยังช่วง/ห้องใหม่ โดยใช้ local_pool ที่เหลืออยู่
+        - local_pool สร้างครั้งเดียวต่อการเรียก (เมื่อมียีนแรกถูกย้าย) แล้วปรับทีละยีน:
+          ลบช่วงใหม่ออก + คืน slot เดิมที่ไม่มีคลาสอื่นในห้องนั้นใช้อยู่
+        - state (ScoreState ของ individual): ปรับคะแนนแบบ delta ทุกครั้งที่ย้ายยีน
+          แล้วให้ลูกได้ fitness ทันที ไม่ต้องให้คะแนนใหม่ทั้งตาราง
+        - ไม่มี state: ถ้าไม่มียีนไหนถูกย้าย ลูกจะได้ fitness ที่ cache ไว้ของตัวเดิมไปด้วย
+        """
+        starts = individual.starts.copy()
+        room_ids = individual.rooms.copy()
+
+        occupancy = None
+        local_pool = None
+        for g, c in enumerate(self.genes):
+            if rng.random() < rate:
+                if occupancy is None:
+                    # usage + pool ของทั้งตาราง (ของที่ล็อกอยู่ใน base_* แล้ว)
+                    occupancy = self.occupancy_of(individual)
+                    local_pool = self.base_pool.copy()
+                    genes, slots = self._expand(starts)
+                    local_pool.reserve_rows(room_ids.astype(np.int64)[genes], slots)
+
+                # เอา usage เดิมของยีนนี้ออกก่อน
+                old_room = self.room_name(int(room_ids[g]))
+                old_times = self.evaluator.gene_times(g, int(starts[g]))
+                occupancy.release(old_room, c["teacher"], old_times)
+
+                start, room_id, times = self._place(g, occupancy, local_pool, rng)
+                starts[g] = start
+                room_ids[g] = room_id
+
+                # ใส่ usage ใหม่กลับ
+                occupancy.reserve(self.room_name(room_id), c["teacher"], times)
+
+                # คืน slot เดิมเข้า pool เฉพาะที่ไม่มีคลาสอื่นในห้องเดิมใช้อยู่
+                # (ช่วงใหม่ไม่ทับ slot เดิมในห้องเดิมได้ เพราะตอนเลือกยังไม่ว่างใน pool)
+                freed = occupancy.unused_room_slots(old_room, old_times)
+                if freed:
+                    local_pool.release(old_room, freed, within=self.initial_pool)
+                if state is not None:
+                    state.move(self.evaluator.n_locked + g, room_id, times)
+
+        if state is not None:
+            fitness = state.score
+        else:
+            fitness = None if occupancy is not None else individual.fitness
+        return Individual(starts, room_ids, fitness=fitness)
+
+    # ---------------- Memetic: local search บน elite ----------------
+    def conflicted_genes(self, state):
+        """ยีนที่ยังมีปัญหาใน state: หาเวลาไม่ได้ / ชนกิจกรรม / ผิดหลักสูตร / ชนอาจารย์หรือห้อง"""
+        ev = self.evaluator
+        genes, slots = self._expand(state.starts)
+        room_rows = state.gene_rooms.astype(np.int64)[genes]
+        teacher_rows = self.gene_teacher_rows[genes]
+        bad = ev.blocked[slots] | ~ev.legal[ev.col_cur[ev.n_locked + genes], slots]
+        bad |= (teacher_rows >= 0) & (
+            state.teacher_cnt[np.maximum(teacher_rows, 0), slots] > 1
+        )
+        bad |= (room_rows >= 0) & (state.room_cnt[np.maximum(room_rows, 0), slots] > 1)
+        hot = set(genes[bad].tolist())
+        hot.update(np.flatnonzero(state.starts < 0).tolist())
+        return sorted(hot)
+
+    def _try_move(self, state, g, rng):
+        """ย้ายยีน g ไปช่วงที่ถูกกติกาของห้องที่รองรับ (เลือกช่วงที่ยังว่างก่อน); คืน delta"""
+        ev = self.evaluator
+        c = self.genes[g]
+        hours = ev.gene_hours[g]
+        room = rng.choice(self.gene_rooms[g] or ("",))
+        starts = self.segment_index.starts(room, c.get("curriculum_type"), hours)
+        if not starts.size:
+            return None
+
+        # ช่วงที่ห้อง/อาจารย์ว่างทั้งช่วงตามตัวนับของ state (ถ้าไม่มีเลยสุ่มจากทั้งหมด)
+        r = self.room_id[room]
+        busy = state.room_cnt[r] > 0
+        t = self.gene_teacher_rows[g]
+        if t >= 0:
+            busy = busy | (state.teacher_cnt[t] > 0)
+        window = np.zeros(len(busy) + 1, dtype=np.int32)
+        np.cumsum(busy, out=window[1:])
+        free = starts[window[starts + hours] == window[starts]]
+        pool = free if free.size else starts
+        start = int(pool[rng.randrange(pool.size)])
+        if start == state.starts[g] and r == state.gene_rooms[g]:
+            return None
+        return state.move(ev.n_locked + g, r, list(range(start, start + hours)))
+
+    def _try_swap(self, state, g, rng):
+        """สลับ (ห้อง, เวลา) ของยีน g กับยีนอื่นในกลุ่มเดียวกัน; คืน delta"""
+        partners = self.swap_partners[g]
+        if not partners:
+            return None
+        other = rng.choice(partners)
+        if other == g:
+            return None
+        ev = self.evaluator
+        L = ev.n_locked
+        a = (int(state.gene_rooms[g]), ev.gene_times(g, int(state.starts[g])))
+        b = (int(state.gene_rooms[other]), ev.gene_times(other, int(state.starts[other])))
+        if a == b:
+            return None
+        return state.move(L + g, *b) + state.move(L + other, *a)
+
+    def neighbor(self, state, rng, hot=()):
+        """
+        เปลี่ยน state ไปยังเพื่อนบ้านแบบสุ่ม 1 ครั้ง (swap 30% / move 70%)
+        เลือกยีนจาก hot (ยีนที่มีปัญหา) 80% ของครั้ง
+        คืน (delta, snapshot) — ส่ง snapshot ให้ undo เพื่อย้อนกลับ; None = ไม่มีการเปลี่ยน
+        """
+        n = len(self.genes)
+        g = rng.choice(hot) if hot and rng.random() < 0.8 else rng.randrange(n)
+        before = (state.starts.copy(), state.gene_rooms.copy())
+        if rng.random() < 0.3:
+            delta = self._try_swap(state, g, rng)
+        else:
+            delta = self._try_move(state, g, rng)
+        if delta is None:
+            return None
+        return delta, before
+
+    def undo(self, state, before):
+        """ย้อน state กลับเป็น snapshot จาก neighbor (ย้ายเฉพาะยีนที่เปลี่ยน)"""
+        ev = self.evaluator
+        old_starts, old_rooms = before
+        for k in np.flatnonzero(
+            (old_starts != state.starts) | (old_rooms != state.gene_rooms)
+        ).tolist():
+            state.move(
+                ev.n_locked + k, int(old_rooms[k]), ev.gene_times(k, int(old_starts[k]))
+            )
 
-            if len(u1) > 1:
-                point = random.randint(1, len(u1) - 1)
-                child_unlocked = u1[:point] + u2[point:]
+    def local_search(self, individual, steps, rng=random, state=None):
+        """
+        hill-climbing แบบจำกัดจำนวนครั้ง (steps) บน individual 1 ตัว ด้วย delta scoring:
+        - move: ย้ายยีนไปช่วงเวลาที่ถูกกติกา (จาก SegmentIndex) ของห้องที่รองรับ
+        - swap: สลับ (ห้อง, เวลา) ของสองยีนที่ชั่วโมง/ประเภทห้อง/หลักสูตรเหมือนกัน
+        เลือกยีนที่มีปัญหาก่อน; รับเฉพาะการเปลี่ยนที่คะแนนดีขึ้น ไม่งั้นย้อนกลับ
+        คืน Individual ใหม่พร้อม fitness (ตัวเดิมไม่ถูกแก้)
+        """
+        if state is None:
+            state = self.evaluator.state(individual)
+        n = len(self.genes)
+        if not n or steps <= 0:
+            return Individual(state.starts.copy(), state.gene_rooms.copy(), state.score)
+
+        hot = self.conflicted_genes(state)
+        for _ in range(steps):
+            step = self.neighbor(state, rng, hot)
+            if step is None:
+                continue
+            delta, before = step
+            if delta > 0:
+                hot = self.conflicted_genes(state)
             else:
-                child_unlocked = u1
-
-            return locked + child_unlocked
-
-
-        def _build_local_pool_from_individual(individual):
-            """
-            สร้าง local_pool จาก SLOT_POOL และลบสลอตที่ถูกใช้ใน individual ออก
-            """
-            lp = {room: slots.copy() for room, slots in SLOT_POOL.items()}
-            for cls in individual:
-                room = cls.get("room")
-                if room and room in lp:
-                    for t in cls["time"]:
-                        if t in lp[room]:
-                            try:
-                                lp[room].remove(t)
-                            except ValueError:
-                                pass
-            return lp
-
-        def mutate(individual, rate=0.02):
-            """
-            กลายพันธุ์: เคลื่อนคลาสที่ไม่ล็อกไปยังช่วง/ห้องใหม่ โดยใช้ local_pool ที่เหลืออยู่
-            """
-            locked_items = [
-                c.copy()
-                for c in individual
-                if c["course"] in locked_names or c["type"] == "activity"
+                self.undo(state, before)  # ไม่ดีขึ้น → ย้อนกลับ
+
+        return Individual(state.starts.copy(), state.gene_rooms.copy(), state.score)
+
+    def create_population(self, jobs, seeding="greedy"):
+        """
+        สร้าง individual ตาม jobs = [(seed, noise), ...] (ดู seed_jobs) แล้วให้คะแนนทั้งชุดทีเดียว
+        """
+        population = [
+            self.build_individual(random.Random(seed), seeding, noise)
+            for seed, noise in jobs
+        ]
+        self.evaluator.evaluate(population)
+        return population
+
+    def make_children(self, parents, jobs, rate=0.02):
+        """
+        สร้างลูกจาก parents ตาม jobs = [(i1, i2, seed), ...]
+        ลูกแต่ละตัวได้คะแนนแบบ delta จาก ScoreState ของ p1 (เฉพาะยีนที่ต่าง + ที่กลายพันธุ์)
+        """
+        parent_states = {}
+        children = []
+        for i1, i2, seed in jobs:
+            rng = random.Random(seed)
+            if i1 not in parent_states:
+                parent_states[i1] = self.evaluator.state(parents[i1])
+            child = self.crossover(parents[i1], parents[i2], rng)
+            state = parent_states[i1].copy()
+            state.sync(child)
+            children.append(self.mutate(child, rate=rate, rng=rng, state=state))
+        return children
+
+
+# ---------------- Worker process (parallel mode) ----------------
+_WORKER_ENGINE = None  # GAEngine ของ worker นี้ (ส่งมาครั้งเดียวตอนเริ่ม process)
+
+
+def _init_worker(engine):
+    global _WORKER_ENGINE
+    _WORKER_ENGINE = engine
+
+
+def _worker_create_population(jobs, seeding):
+    return _WORKER_ENGINE.create_population(jobs, seeding)
+
+
+def seed_jobs(rng, size):
+    """
+    [(seed, noise), ...] ของ population ขนาด size: ตัวแรกเป็น DSATUR ล้วน (noise 0)
+    ตัวถัดไปเป็น variant แบบสุ่มที่ noise 0.5, 1, 2 วนไป (ดู GAEngine.seed_individual)
+    """
+    return [
+        (rng.getrandbits(64), 0.0 if k == 0 else 2.0 ** ((k - 1) % 3 - 1))
+        for k in range(size)
+    ]
+
+
+def _worker_make_children(parents, jobs, rate):
+    return _WORKER_ENGINE.make_children(parents, jobs, rate)
+
+
+# จำนวนลูกขั้นต่ำต่อ worker ที่คุ้มค่าส่งเข้า process pool (ต่ำกว่านี้ overhead ต่อรุ่นมากกว่างาน)
+PARALLEL_MIN_CHILDREN = 32
+
+
+def _chunks(items, n):
+    """แบ่ง items เป็น n ก้อนติดกัน (คงลำดับ) ตัดก้อนว่างทิ้ง"""
+    size, extra = divmod(len(items), n)
+    out, start = [], 0
+    for k in range(n):
+        end = start + size + (1 if k < extra else 0)
+        if end > start:
+            out.append(items[start:end])
+        start = end
+    return out
+
+
+SELECTIONS = ("sharing", "tournament", "rank", "elite")
+SHARING_RADIUS = 0.25  # รัศมี niche ของ fitness sharing (สัดส่วนยีนที่ต่างกัน)
+
+# adaptive mutation / immigrants / partial restart (ดู Island)
+MAX_MUTATION_RATE = 0.2
+IMMIGRANT_STALL = 10  # ไม่ดีขึ้นครบทุก ๆ กี่รุ่น → เพิ่ม rate 2 เท่า + ใส่ immigrants
+IMMIGRANT_SHARE = 0.2  # สัดส่วนของลูกที่แทนด้วย individual ใหม่
+RESTART_STALL = 40  # ไม่ดีขึ้นครบทุก ๆ กี่รุ่น → partial restart (คง elite, สร้างที่เหลือใหม่)
+
+
+class Island:
+    """
+    population 1 กลุ่มพร้อมสถานะการวิวัฒน์ (rng, best, ตัวนับ early stop)
+    ทั้ง object pickle ได้ → ส่งไปวิวัฒน์ต่อใน worker แล้วรับกลับมาได้ โดยผลเหมือนรันในเครื่องเดียว
+    เงื่อนไขหยุด (stop_reason): "stagnation" (ไม่ดีขึ้น 100 รุ่น), "deadline" (เลย deadline
+    ซึ่งเป็นเวลา _time.monotonic()), "target" (ถึง target_fitness), "feasible" (ไม่มี hard conflict)
+    local_search_steps > 0: ขั้น memetic — ทำ GAEngine.local_search กับ elite local_search_elites ตัว
+    ทุกรุ่น (หลังให้คะแนน ก่อนเลือก parents)
+    selection: วิธีเลือกพ่อแม่ของลูกแต่ละตัวจากทั้ง population (elite 5 ตัวแรกส่งต่อรุ่นเสมอ)
+      - "tournament": สุ่ม tournament_size ตัว ตัวที่ดีที่สุดชนะ
+      - "rank": สุ่มตามน้ำหนักลำดับ (ที่ 1 ได้ n, ตัวสุดท้ายได้ 1)
+      - "sharing": น้ำหนักลำดับหารด้วย niche count (ตัวที่มีตัวคล้าย ๆ กันในรัศมี
+        SHARING_RADIUS ของระยะ Hamming เยอะ → โอกาสน้อยลง)
+      - "elite" (ค่าเริ่ม): สุ่มจาก elite 5 ตัวแรกเท่านั้น (แบบเดิม; elite เหลือตัวเดียว → ผสมกับตัวเอง)
+    dedupe: ตัดตัวที่ genome ซ้ำ (genome_hash) ออกก่อนเลือก elite/พ่อแม่ → ที่ว่างเติมด้วยลูก (ค่าเริ่มปิด)
+    diversity: ความหลากหลายของรุ่นล่าสุด (diversity_metrics ก่อนตัดตัวซ้ำ) พิมพ์ทุกรุ่น
+    adaptive: ปรับ mutation rate ตามความคืบหน้า (rate เริ่มที่ mutation_rate, ค่าเริ่มปิด)
+      - best ดีขึ้น → rate ลดครึ่ง (ไม่ต่ำกว่า mutation_rate)
+      - ไม่ดีขึ้นครบทุก IMMIGRANT_STALL รุ่น → rate คูณ 2 (ไม่เกิน MAX_MUTATION_RATE) และแทนลูก
+        IMMIGRANT_SHARE ส่วนด้วย individual ใหม่ (GAEngine.build_individual ตาม seeding)
+      - ไม่ดีขึ้นครบทุก RESTART_STALL รุ่น → partial restart: คง elite แล้วสร้างที่เหลือใหม่ทั้งหมด
+        และ rate กลับเป็น mutation_rate
+      restart / immigrants ใช้เวลาที่เดิมเสียไปกับการรอ early stop 100 รุ่นบน plateau
+    """
+
+    __slots__ = (
+        "population", "rng", "best", "gen",
+        "fitness_old", "break_point", "stopped", "label",
+        "deadline", "target_fitness", "stop_on_feasible", "stop_reason",
+        "local_search_steps", "local_search_elites",
+        "size", "selection", "tournament_size", "dedupe", "diversity",
+        "seeding", "mutation_rate", "rate", "adaptive", "restarts",
+    )
+
+    def __init__(
+        self, population, rng, label="",
+        deadline=None, target_fitness=None, stop_on_feasible=False,
+        local_search_steps=0, local_search_elites=2,
+        selection="elite", tournament_size=3, dedupe=False,
+        seeding="greedy", mutation_rate=0.02, adaptive=False,
+    ):
+        if selection not in SELECTIONS:
+            raise ValueError(
+                f"ไม่รู้จัก selection '{selection}' (ที่มี: {', '.join(SELECTIONS)})"
+            )
+        self.population = population
+        self.rng = rng
+        self.best = None  # Individual ที่ดีที่สุดเท่าที่เคยเจอ (สำเนา)
+        self.gen = 0
+        self.fitness_old = None
+        self.break_point = 0
+        self.stopped = False
+        self.label = label
+        self.deadline = deadline
+        self.target_fitness = target_fitness
+        self.stop_on_feasible = stop_on_feasible
+        self.stop_reason = None
+        self.local_search_steps = local_search_steps
+        self.local_search_elites = local_search_elites
+        self.size = len(population)
+        self.selection = selection
+        self.tournament_size = max(int(tournament_size), 1)
+        self.dedupe = dedupe
+        self.diversity = None
+        self.seeding = seeding
+        self.mutation_rate = mutation_rate
+        self.rate = mutation_rate
+        self.adaptive = adaptive
+        self.restarts = 0
+
+    def _stop(self, reason, population, message=None):
+        if message:
+            print(f"{self.label}{message}")
+        self.population = population
+        self.stopped = True
+        self.stop_reason = reason
+        return False
+
+    @property
+    def best_fitness(self):
+        return self.best.fitness if self.best is not None else float("-inf")
+
+    def prime(self, engine):
+        """
+        ให้คะแนน population ตั้งต้นแล้วจำตัวที่ดีที่สุดไว้ก่อนรุ่นแรก
+        → best ไม่เป็น None แม้ generations=0 หรือหมดเวลาก่อนได้วิวัฒน์
+        """
+        if not self.population:
+            return self
+        scores = engine.evaluator.evaluate(self.population)
+        self.best = self.population[max(range(len(scores)), key=scores.__getitem__)].copy()
+        return self
+
+    def step(self, engine, make_children=None, create_population=None):
+        """
+        วิวัฒน์ 1 รุ่น: ให้คะแนน/เรียง → จำตัวที่ดีที่สุด → early stop → สร้างรุ่นถัดไป
+        make_children(parents, jobs, rate) / create_population(jobs, seeding) ใช้แทน
+        engine.make_children / engine.create_population ได้ (เช่นแบบขนาน)
+        คืน False เมื่อหยุด (ไม่มีการปรับปรุง 100 รุ่นติด)
+        """
+        # ให้คะแนนเฉพาะตัวที่ยังไม่มีคะแนน แล้วเรียงมาก → น้อย (stable)
+        scores = engine.evaluator.evaluate(self.population)
+        order = sorted(range(len(self.population)), key=scores.__getitem__, reverse=True)
+        population = [self.population[i] for i in order]
+
+        # memetic: ขัดเกลา elite ด้วย local search (ได้คะแนนจาก delta มาด้วย) แล้วเรียงใหม่
+        if self.local_search_steps > 0:
+            k = min(self.local_search_elites, len(population))
+            refined = [
+                engine.local_search(
+                    ind, self.local_search_steps, random.Random(self.rng.getrandbits(64))
+                )
+                for ind in population[:k]
             ]
-            unlocked_items = [
-                c.copy()
-                for c in individual
-                if c["course"] not in locked_names and c["type"] != "activity"
+            population = sorted(
+                refined + population[k:], key=lambda ind: ind.fitness, reverse=True
+            )
+
+        hashes = [genome_hash(ind) for ind in population]
+        distances = hamming_matrix(population)
+        self.diversity = diversity_metrics(population, hashes, distances)
+        if self.dedupe:
+            seen = set()
+            keep = [k for k, h in enumerate(hashes) if not (h in seen or seen.add(h))]
+            if len(keep) < len(population):
+                population = [population[k] for k in keep]
+                distances = distances[np.ix_(keep, keep)]
+
+        best = population[0]
+        best_fit = best.fitness
+
+        print(
+            f"{self.label}Gen {self.gen:03d} | Fitness: {best_fit}"
+            f" | Unique: {self.diversity['unique']}/{self.diversity['size']}"
+            f" | Hamming: {self.diversity['hamming']:.3f}"
+        )
+
+        # รุ่น 0 นับเป็น "ดีขึ้น" เสมอ (best จาก prime ยังไม่ได้เช็ค target / feasible)
+        improved = self.gen == 0 or best_fit > self.best_fitness
+        if improved:
+            self.best = best.copy()
+
+        # หยุดทันทีเมื่อได้ตารางที่ต้องการแล้ว (เช็คเฉพาะตอนที่ best เปลี่ยน)
+        if improved and self.target_fitness is not None and best_fit >= self.target_fitness:
+            return self._stop("target", population, f"Target fitness reached: {best_fit}")
+        if (
+            improved
+            and self.stop_on_feasible
+            and engine.evaluator.hard_conflicts([best])[0] == 0
+        ):
+            return self._stop("feasible", population, "No hard conflicts left.")
+
+        if best_fit == self.fitness_old:
+            self.break_point += 1
+        else:
+            self.break_point = 0  # reset ถ้ามีการเปลี่ยนแปลง
+
+        if self.break_point >= 100:  # หยุดถ้าไม่มีการปรับปรุง 100 รอบติด
+            return self._stop(
+                "stagnation",
+                population,
+                "Early stopping: no improvement in 100 generations.",
+            )
+
+        if self.deadline is not None and _time.monotonic() >= self.deadline:
+            return self._stop(
+                "deadline", population, f"Time budget reached after {self.gen} generations."
+            )
+
+        self.fitness_old = best_fit
+
+        # next generation (elites ส่งต่อพร้อมคะแนนเดิม ไม่ต้องคำนวณใหม่)
+        elites = population[:5]
+        if self.selection == "elite":
+            parents = elites
+            jobs = []
+            for _ in range(self.size - len(parents)):
+                # dedupe อาจเหลือ elite ตัวเดียว → จับคู่กับตัวเอง แบบเดียวกับ _pick_pair
+                i1, i2 = self.rng.sample(range(len(parents)), 2) if len(parents) > 1 else (0, 0)
+                jobs.append((i1, i2, self.rng.getrandbits(64)))
+        else:
+            parents = population
+            weights = None
+            n = len(parents)
+            if self.selection != "tournament":
+                weights = np.arange(n, 0, -1, dtype=float)  # rank: ที่ 1 ได้ n
+                if self.selection == "sharing":
+                    niche = np.clip(1.0 - distances / SHARING_RADIUS, 0.0, None).sum(axis=1)
+                    weights /= niche
+                weights = weights.tolist()
+            jobs = [
+                self._pick_pair(n, weights) + (self.rng.getrandbits(64),)
+                for _ in range(self.size - len(elites))
             ]
 
-            # usage ปัจจุบันในตาราง
-            room_usage = set()
-            teacher_usage = set()
-            for item in locked_items + unlocked_items:
-                for t in item["time"]:
-                    if "NO_VALID_TIME" in t:
-                        continue
-                    if item.get("room") and item["room"] != "NO_VALID_ROOM":
-                        room_usage.add((item["room"], t))
-                    if item.get("teacher"):
-                        teacher_usage.add((item["teacher"], t))
-
-            for cls in unlocked_items:
-                if random.random() < rate:
-                    # เอา usage เดิมของคลาสนี้ออกก่อน
-                    for t in cls["time"]:
-                        if "NO_VALID_TIME" in t:
-                            continue
-                        if cls.get("room") and cls["room"] != "NO_VALID_ROOM":
-                            room_usage.discard((cls["room"], t))
-                        if cls.get("teacher"):
-                            teacher_usage.discard((cls["teacher"], t))
-
-                    valid_room_names = get_valid_rooms(cls["room_type"], room_df)
-                    curriculum_type = cls.get("curriculum_type", "ภาคปกติ")
-
-                    # hours_needed จาก courses list
-                    original = next(
-                        (c for c in courses if c["name"] == cls["course"]), None
-                    )
-                    hours_needed = original["hours"] if original else len(cls["time"])
+        fresh = self._adapt(len(jobs))
+        if fresh == len(jobs):
+            children = []  # partial restart: ไม่ต้องสร้างลูกที่จะถูกแทนทั้งหมดอยู่แล้ว
+        else:
+            jobs = jobs[: len(jobs) - fresh]
+            children = (make_children or engine.make_children)(parents, jobs, self.rate)
+        if fresh:
+            children += (create_population or engine.create_population)(
+                seed_jobs(self.rng, fresh + 1)[1:], self.seeding
+            )
+        self.population = elites + children
+        self.gen += 1
+        return True
+
+    def _adapt(self, n_children):
+        """
+        ปรับ self.rate ตาม break_point (จำนวนรุ่นที่ best ไม่ดีขึ้น) → จำนวนลูกที่ต้องแทนด้วย
+        individual ใหม่ (n_children = partial restart)
+        """
+        if not self.adaptive:
+            return 0
+        if self.break_point == 0:
+            self.rate = max(self.mutation_rate, self.rate / 2)
+            return 0
+        if self.break_point % RESTART_STALL == 0:
+            self.rate = self.mutation_rate
+            self.restarts += 1
+            print(f"{self.label}Partial restart after {self.break_point} stalled generations")
+            return n_children
+        if self.break_point % IMMIGRANT_STALL == 0:
+            self.rate = min(MAX_MUTATION_RATE, self.rate * 2)
+            return max(1, int(round(n_children * IMMIGRANT_SHARE)))
+        return 0
+
+    def _pick_pair(self, n, weights=None):
+        """เลือกพ่อแม่ 2 ตัว (index ใน population ที่เรียงแล้ว ไม่ซ้ำกันถ้า n > 1)"""
+        if n < 2:
+            return 0, 0
+        rng = self.rng
+        if weights is None:  # tournament: index น้อย = fitness ดีกว่า
+            k = min(self.tournament_size, n - 1)
+            i1 = min(rng.sample(range(n), k))
+            others = [i for i in range(n) if i != i1]
+            return i1, min(rng.sample(others, k))
+        i1 = rng.choices(range(n), weights=weights)[0]
+        rest = list(weights)
+        rest[i1] = 0.0
+        return i1, rng.choices(range(n), weights=rest)[0]
+
+    def evolve(self, engine, generations):
+        """วิวัฒน์ต่อสูงสุด generations รุ่น (หยุดก่อนถ้า early stop)"""
+        for _ in range(generations):
+            if self.stopped or not self.step(engine):
+                break
+        return self
+
+    def emigrants(self, k):
+        """สำเนาตัวที่ดีที่สุด k ตัว (พร้อม fitness) สำหรับส่งไปเกาะอื่น"""
+        ranked = sorted(
+            (ind for ind in self.population if not ind.dirty),
+            key=lambda ind: ind.fitness,
+            reverse=True,
+        )
+        return [ind.copy() for ind in ranked[:k]]
+
+    def immigrate(self, migrants):
+        """แทนที่ตัวที่แย่ที่สุดด้วย migrants"""
+        if not migrants or self.stopped:
+            return
+        self.population.sort(
+            key=lambda ind: ind.fitness if not ind.dirty else float("-inf"),
+            reverse=True,
+        )
+        keep = max(len(self.population) - len(migrants), 0)
+        self.population = self.population[:keep] + migrants[: len(self.population)]
+
+
+def _worker_evolve(island, generations):
+    return island.evolve(_WORKER_ENGINE, generations)
+
+
+def _deadline(time_budget_sec):
+    """เวลาสิ้นสุด (_time.monotonic) จากงบเวลาเป็นวินาที; None = ไม่จำกัดเวลา"""
+    if time_budget_sec is None:
+        return None
+    return _time.monotonic() + max(float(time_budget_sec), 0.0)
+
+
+def genetic_algorithm(
+    engine,
+    pop_size,
+    generations,
+    seed=None,
+    workers=0,
+    time_budget_sec=None,
+    target_fitness=None,
+    stop_on_feasible=False,
+    local_search_steps=0,
+    local_search_elites=2,
+    seeding="greedy",
+    selection="elite",
+    tournament_size=3,
+    dedupe=False,
+    mutation_rate=0.02,
+    adaptive=False,
+):
+    """
+    คืน (Individual ที่ดีที่สุด พร้อม fitness, info)
+    info = {"generations": จำนวนรุ่นที่วิวัฒน์ไป, "stop_reason": เหตุที่หยุด,
+            "diversity": diversity_metrics ของรุ่นสุดท้าย}
+    generations: จำนวนรุ่นสูงสุด (None = ไม่จำกัด ใช้คู่กับ time_budget_sec)
+    seed: กำหนดผลลัพธ์ (None = สุ่มจาก random ของโมดูล)
+    workers: > 1 = สร้าง population ตั้งต้นใน ProcessPoolExecutor และสร้างลูกแบบขนานเมื่อ
+             ลูกต่อรุ่นพอให้ทุก worker ได้ ≥ PARALLEL_MIN_CHILDREN ตัว (ไม่งั้นสร้างในเครื่องเดียว)
+             (ผลลัพธ์เหมือนโหมดเดี่ยวทุกประการสำหรับ seed เดียวกัน)
+    time_budget_sec: งบเวลา (วินาที นับรวมการสร้าง population) → คืนตัวที่ดีที่สุดเมื่อหมดเวลา
+    target_fitness / stop_on_feasible: หยุดทันทีเมื่อถึงคะแนนเป้าหมาย / ไม่มี hard conflict
+    local_search_steps / local_search_elites: ขั้น memetic บน elite ทุกรุ่น (0 = ปิด)
+    seeding: วิธีสร้าง population ตั้งต้น "greedy" (ค่าเริ่ม, ลำดับยีนคงที่แบบเดิม)
+             หรือ "dsatur" (ดู GAEngine.seed_individual)
+    selection / tournament_size / dedupe: การเลือกพ่อแม่และตัดตัวซ้ำ (ดู Island)
+    mutation_rate / adaptive: rate ตั้งต้นของ mutate และการปรับ rate + immigrants + partial restart
+                              เมื่อติด plateau (ดู Island, ค่าเริ่มปิด); individual ใหม่สร้างใน
+                              process pool เหมือน population ตั้งต้น
+    """
+    deadline = _deadline(time_budget_sec)
+    rng = random.Random(seed if seed is not None else random.getrandbits(64))
+    executor = None
+    if workers and workers > 1:
+        executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(engine,)
+        )
 
-                    # ใช้ local_pool จากทั้ง individual
-                    local_pool = _build_local_pool_from_individual(
-                        locked_items + unlocked_items
-                    )
+    def run_chunked(func, serial, items, *args):
+        if executor is None:
+            return serial(items, *args)
+        futures = [
+            executor.submit(func, chunk, *args) for chunk in _chunks(items, workers)
+        ]
+        return [x for f in futures for x in f.result()]
+
+    def create_population(jobs, seeding):
+        return run_chunked(
+            _worker_create_population, engine.create_population, jobs, seeding
+        )
+
+    def make_children(parents, jobs, rate):
+        # ส่งเข้า pool เฉพาะเมื่อแต่ละ worker ได้ลูกอย่างน้อย PARALLEL_MIN_CHILDREN ตัว
+        # (ลูกน้อยกว่านี้ค่า pickle parents + job ต่อรุ่นแพงกว่างานจริง → ทำในเครื่องเดียว)
+        n = min(workers, len(jobs) // PARALLEL_MIN_CHILDREN) if executor is not None else 0
+        if n <= 1:
+            return engine.make_children(parents, jobs, rate)
+        futures = [
+            executor.submit(_worker_make_children, parents, chunk, rate)
+            for chunk in _chunks(jobs, n)
+        ]
+        return [x for f in futures for x in f.result()]
+
+    try:
+        population = create_population(seed_jobs(rng, pop_size), seeding)
+        island = Island(
+            population,
+            rng,
+            deadline=deadline,
+            target_fitness=target_fitness,
+            stop_on_feasible=stop_on_feasible,
+            local_search_steps=local_search_steps,
+            local_search_elites=local_search_elites,
+            selection=selection,
+            tournament_size=tournament_size,
+            dedupe=dedupe,
+            seeding=seeding,
+            mutation_rate=mutation_rate,
+            adaptive=adaptive,
+        ).prime(engine)
+        while generations is None or island.gen < generations:
+            if not island.step(engine, make_children, create_population):
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return island.best, {
+        "generations": island.gen,
+        "stop_reason": island.stop_reason or "generations",
+        "diversity": island.diversity,
+    }
+
+
+def island_genetic_algorithm(
+    engine,
+    pop_size,
+    generations,
+    islands=4,
+    migration_interval=20,
+    migrants=2,
+    seed=None,
+    workers=0,
+    time_budget_sec=None,
+    target_fitness=None,
+    stop_on_feasible=False,
+    local_search_steps=0,
+    local_search_elites=2,
+    seeding="greedy",
+    selection="elite",
+    tournament_size=3,
+    dedupe=False,
+    mutation_rate=0.02,
+    adaptive=False,
+):
+    """
+    Island model: แต่ละเกาะมี population ขนาด pop_size วิวัฒน์แยกกัน (แยก process ถ้า workers > 1)
+    ทุก migration_interval รุ่น ส่งตัวที่ดีที่สุด migrants ตัวไปแทนตัวที่แย่สุดของเกาะถัดไป (วงแหวน)
+    คืน (Individual ที่ดีที่สุดจากทุกเกาะ, info) เหมือน genetic_algorithm
+    ผลลัพธ์ขึ้นกับ seed เท่านั้น ไม่ขึ้นกับจำนวน worker (ยกเว้นเมื่อหยุดด้วยงบเวลา)
+    ถ้าเกาะใดถึง target_fitness / ไม่มี hard conflict ทุกเกาะจะหยุดหลังรอบ migration นั้น
+    """
+    deadline = _deadline(time_budget_sec)
+    rng = random.Random(seed if seed is not None else random.getrandbits(64))
+    interval = max(int(migration_interval), 1)
+    executor = None
+    if workers and workers > 1:
+        executor = ProcessPoolExecutor(
+            max_workers=min(workers, islands),
+            initializer=_init_worker,
+            initargs=(engine,),
+        )
 
-                    result = get_consecutive_times(
-                        hours_needed,
-                        all_blocked_times,
-                        room_usage,
-                        valid_room_names,
-                        curriculum_type,
-                        teacher_usage=teacher_usage,
-                        teacher_name=cls.get("teacher"),
-                        slot_pool=local_pool,
+    try:
+        group = []
+        for k in range(islands):
+            jobs = seed_jobs(rng, pop_size)
+            island_rng = random.Random(rng.getrandbits(64))
+            group.append((jobs, island_rng, f"[Island {k + 1}] "))
+
+        if executor is None:
+            pops = [engine.create_population(jobs, seeding) for jobs, _, _ in group]
+        else:
+            futures = [
+                executor.submit(_worker_create_population, jobs, seeding)
+                for jobs, _, _ in group
+            ]
+            pops = [f.result() for f in futures]
+        group = [
+            Island(
+                pop,
+                island_rng,
+                label=label,
+                deadline=deadline,
+                target_fitness=target_fitness,
+                stop_on_feasible=stop_on_feasible,
+                local_search_steps=local_search_steps,
+                local_search_elites=local_search_elites,
+                selection=selection,
+                tournament_size=tournament_size,
+                dedupe=dedupe,
+                seeding=seeding,
+                mutation_rate=mutation_rate,
+                adaptive=adaptive,
+            ).prime(engine)
+            for pop, (_, island_rng, label) in zip(pops, group)
+        ]
+
+        done = 0
+        while generations is None or done < generations:
+            if all(isl.stopped for isl in group) or any(
+                isl.stop_reason in ("target", "feasible") for isl in group
+            ):
+                break
+            n = interval if generations is None else min(interval, generations - done)
+            if executor is None:
+                group = [isl.evolve(engine, n) for isl in group]
+            else:
+                futures = [executor.submit(_worker_evolve, isl, n) for isl in group]
+                group = [f.result() for f in futures]
+            done += n
+
+            # migration แบบวงแหวน: เกาะ k → เกาะ k+1
+            outgoing = [isl.emigrants(migrants) for isl in group]
+            for k, isl in enumerate(group):
+                isl.immigrate(outgoing[k - 1])
+            best = max(isl.best_fitness for isl in group)
+            print(f"Migration after {done} generations | Best: {best}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    winner = max(group, key=lambda isl: isl.best_fitness)
+    reasons = [isl.stop_reason for isl in group if isl.stop_reason]
+    return winner.best, {
+        "generations": max(isl.gen for isl in group),
+        "stop_reason": winner.stop_reason or (reasons[0] if reasons else "generations"),
+        "diversity": winner.diversity,
+    }
+
+
+def run_ga_round(
+    engine,
+    seed=None,
+    workers=0,
+    pop_size=30,
+    generations=300,
+    islands=0,
+    migration_interval=20,
+    migrants=2,
+    time_budget_sec=None,
+    target_fitness=None,
+    stop_on_feasible=False,
+    local_search_steps=0,
+    local_search_elites=2,
+    seeding="greedy",
+    selection="elite",
+    tournament_size=3,
+    dedupe=False,
+    mutation_rate=0.02,
+    adaptive=False,
+):
+    """
+    รัน GA 1 รอบ (population เดียว หรือ island model ถ้า islands > 1)
+    คืน (Individual ที่ดีที่สุด, info) — info มี generations / stop_reason
+    """
+    stop_options = {
+        "time_budget_sec": time_budget_sec,
+        "target_fitness": target_fitness,
+        "stop_on_feasible": stop_on_feasible,
+        "local_search_steps": local_search_steps,
+        "local_search_elites": local_search_elites,
+        "seeding": seeding,
+        "selection": selection,
+        "tournament_size": tournament_size,
+        "dedupe": dedupe,
+        "mutation_rate": mutation_rate,
+        "adaptive": adaptive,
+    }
+    if islands and islands > 1:
+        return island_genetic_algorithm(
+            engine,
+            pop_size,
+            generations,
+            islands=islands,
+            migration_interval=migration_interval,
+            migrants=migrants,
+            seed=seed,
+            workers=workers,
+            **stop_options,
+        )
+    return genetic_algorithm(
+        engine, pop_size, generations, seed=seed, workers=workers, **stop_options
+    )
+
+
+# ===============================================================
+# Simulated annealing: solver ทางเลือก (ตารางเดียว ใช้ neighborhood/คะแนนชุดเดียวกับ GA)
+# ===============================================================
+def simulated_annealing(
+    engine,
+    iterations=20000,
+    seed=None,
+    time_budget_sec=None,
+    target_fitness=None,
+    stop_on_feasible=False,
+    t_start=500.0,
+    t_end=1.0,
+    seeding="greedy",
+):
+    """
+    SA บนตารางเดียว: เริ่มจาก engine.build_individual (ตาม seeding) แล้วสุ่มเพื่อนบ้าน (GAEngine.neighbor)
+    ด้วย delta scoring; รับเสมอถ้าไม่แย่ลง, ถ้าแย่ลงรับด้วยความน่าจะเป็น exp(delta / T)
+    อุณหภูมิลดแบบ geometric จาก t_start → t_end ตามสัดส่วนของ iterations
+    (หรือของงบเวลาถ้า iterations=None)
+    คืน (Individual ที่ดีที่สุดที่เคยเจอ, info) โดย info["generations"] = จำนวน iteration
+    """
+    if iterations is None and time_budget_sec is None:
+        iterations = 20000
+    deadline = _deadline(time_budget_sec)
+    t0 = _time.monotonic()
+    rng = random.Random(seed if seed is not None else random.getrandbits(64))
+
+    start = engine.build_individual(random.Random(rng.getrandbits(64)), seeding)
+    state = engine.evaluator.state(start)
+    best = Individual(state.starts.copy(), state.gene_rooms.copy(), state.score)
+    if not engine.genes:  # ไม่มีวิชาให้จัด (ล็อกหมด) → ไม่มีเพื่อนบ้านให้เดิน
+        return best, {"generations": 0, "stop_reason": "iterations"}
+    hot = engine.conflicted_genes(state)
+    reason = None
+    ratio = t_end / t_start
+
+    it = 0
+    while iterations is None or it < iterations:
+        now = _time.monotonic()
+        if deadline is not None and now >= deadline:
+            reason = "deadline"
+            print(f"SA time budget reached after {it} iterations.")
+            break
+        if iterations is not None:
+            progress = it / iterations
+        else:
+            progress = (now - t0) / max(deadline - t0, 1e-9)
+        temperature = t_start * ratio ** progress
+
+        it += 1
+        step = engine.neighbor(state, rng, hot)
+        if step is not None:
+            delta, before = step
+            if delta >= 0 or rng.random() < math.exp(delta / temperature):
+                if state.score > best.fitness:
+                    best = Individual(
+                        state.starts.copy(), state.gene_rooms.copy(), state.score
                     )
-                    cls["time"] = result["times"]
-                    avail = result["available_rooms"]
-                    cls["room"] = avail[0] if avail else "NO_VALID_ROOM"
+                    if target_fitness is not None and best.fitness >= target_fitness:
+                        reason = "target"
+                        print(f"Target fitness reached: {best.fitness}")
+                        break
+                    if (
+                        stop_on_feasible
+                        and engine.evaluator.hard_conflicts([best])[0] == 0
+                    ):
+                        reason = "feasible"
+                        print("No hard conflicts left.")
+                        break
+            else:
+                engine.undo(state, before)
+
+        if it % 50 == 0:
+            hot = engine.conflicted_genes(state)
+        if it % 1000 == 0:
+            print(
+                f"SA iter {it:06d} | T={temperature:.1f} | Fitness: {state.score}"
+                f" | Best: {best.fitness}"
+            )
+
+    return best, {"generations": it, "stop_reason": reason or "iterations"}
+
 
-                    # ใส่ usage ใหม่กลับ
-                    for t in cls["time"]:
-                        if "NO_VALID_TIME" in t:
-                            continue
-                        if cls.get("room") and cls["room"] != "NO_VALID_ROOM":
-                            room_usage.add((cls["room"], t))
-                        if cls.get("teacher"):
-                            teacher_usage.add((cls["teacher"], t))
+def run_sa_round(
+    engine,
+    seed=None,
+    workers=0,
+    iterations=20000,
+    time_budget_sec=None,
+    target_fitness=None,
+    stop_on_feasible=False,
+    seeding="greedy",
+):
+    """
+    รัน SA 1 รอบ คืน (Individual ที่ดีที่สุด, info) แบบเดียวกับ run_ga_round
+    workers ไม่ใช้ (SA เดินตารางเดียวต่อรอบ) — ขนานได้ด้วย multi-start (rounds > 1)
+    """
+    return simulated_annealing(
+        engine,
+        iterations=iterations,
+        seed=seed,
+        time_budget_sec=time_budget_sec,
+        target_fitness=target_fitness,
+        stop_on_feasible=stop_on_feasible,
+        seeding=seeding,
+    )
 
-            return locked_items + unlocked_items
 
-        def genetic_algorithm(pop_size, generations):
-            population = [create_individual() for _ in range(pop_size)]
+# solver backend ที่เลือกได้จาก run_genetic_algorithm(solver=...)
+SOLVERS = {
+    "ga": run_ga_round,
+    "sa": run_sa_round,
+}
 
-            best_individual_overall = None
-            best_fitness_overall = float("-inf")
-            fitness_old = None
-            break_point = 0 
 
-            for gen in range(generations):
+def run_solver_round(engine, solver="ga", **options):
+    """รัน solver ที่เลือก 1 รอบ คืน (Individual ที่ดีที่สุด, info)"""
+    run = SOLVERS.get(solver)
+    if run is None:
+        raise ValueError(
+            f"ไม่รู้จัก solver '{solver}' (ที่มี: {', '.join(sorted(SOLVERS))})"
+        )
+    return run(engine, **options)
 
-                population.sort(key=lambda ind: fitness(ind), reverse=True)
-                best = population[0]
-                best_fit = fitness(best)
 
-                print(f"Gen {gen:03d} | Fitness: {best_fit}")
+def _timed_round(engine, round_no, rounds, seed, options):
+    print(f"🔁 Round {round_no}/{rounds}")
+    t0 = _time.perf_counter()
+    best, info = run_solver_round(engine, seed=seed, **options)
+    return best, info, _time.perf_counter() - t0
 
-                if best_fit > best_fitness_overall:
-                    best_fitness_overall = best_fit
-                    best_individual_overall = [c.copy() for c in best]
 
-                if best_fit == fitness_old:
-                    break_point += 1
-                else:
-                    break_point = 0  # reset ถ้ามีการเปลี่ยนแปลง
+def _worker_round(round_no, rounds, seed, options):
+    return _timed_round(_WORKER_ENGINE, round_no, rounds, seed, options)
+
+
+def multi_start_genetic_algorithm(engine, rounds, seed=None, workers=0, **options):
+    """
+    รัน GA rounds รอบแบบอิสระ (seed ต่างกัน) พร้อมกันใน process pool ถ้า workers > 1
+    คืน list ผลต่อรอบ [{round, seed, fitness, generations, stop_reason, duration_sec,
+    best_schedule}] ตามลำดับรอบ
+    options ส่งต่อให้ run_solver_round (solver, pop_size, generations, islands, time_budget_sec, ...)
+    time_budget_sec คืองบเวลาของทั้งชุด: แบ่งเท่า ๆ กันตามจำนวน "ระลอก" ที่รอบต้องต่อคิวกันรัน
+    (serial = rounds ระลอก, ขนาน = ceil(rounds / workers) ระลอก)
+    """
+    rng = random.Random(seed if seed is not None else random.getrandbits(64))
+    seeds = [rng.getrandbits(32) for _ in range(rounds)]
+    options = dict(options, workers=0)  # ขนานที่ระดับรอบเท่านั้น
+    parallel = min(workers, rounds) if workers and workers > 1 else 1
+    if options.get("time_budget_sec") is not None:
+        waves = -(-rounds // parallel)
+        options["time_budget_sec"] = options["time_budget_sec"] / waves
+
+    if parallel > 1:
+        with ProcessPoolExecutor(
+            max_workers=parallel,
+            initializer=_init_worker,
+            initargs=(engine,),
+        ) as executor:
+            futures = [
+                executor.submit(_worker_round, i + 1, rounds, sd, options)
+                for i, sd in enumerate(seeds)
+            ]
+            outcomes = [f.result() for f in futures]
+    else:
+        outcomes = [
+            _timed_round(engine, i + 1, rounds, sd, options)
+            for i, sd in enumerate(seeds)
+        ]
+
+    return [
+        {
+            "round": i + 1,
+            "seed": sd,
+            "fitness": best.fitness,
+            "generations": info["generations"],
+            "stop_reason": info["stop_reason"],
+            "diversity": info.get("diversity"),
+            "duration_sec": duration,
+            "best_schedule": best,
+        }
+        for i, (sd, (best, info, duration)) in enumerate(zip(seeds, outcomes))
+    ]
 
-                if break_point >= 100:  # หยุดถ้าไม่มีการปรับปรุง 50 รอบติด
-                    print("Early stopping: no improvement in 100 generations.")
-                    break
-                
-                fitness_old = fitness(best)
 
-                # next generation
-                next_gen = population[:5]  # elites
-                while len(next_gen) < pop_size:
-                    p1, p2 = random.sample(population[:5], 2)
-                    child = crossover(p1, p2)
-                    child = mutate(child, rate=0.02)
-                    next_gen.append(child)
-                population = next_gen
+# ===============================================================
+# GA Runner
+# ===============================================================
+def run_genetic_algorithm(
+    data_loader,
+    write_csv=False,
+    return_df=False,
+    seed=None,
+    workers=0,
+    islands=0,
+    migration_interval=20,
+    migrants=2,
+    rounds=1,
+    generations=None,
+    pop_size=30,
+    time_budget_sec=None,
+    target_fitness=None,
+    stop_on_feasible=False,
+    local_search_steps=0,
+    local_search_elites=2,
+    solver="ga",
+    sa_iterations=None,
+    seeding="greedy",
+    backtrack_depth=2,
+    backtrack_nodes=50,
+    precheck=True,
+    curriculum_hours=None,
+    crossover="onepoint",
+    crossover_repair=False,
+    selection="elite",
+    tournament_size=3,
+    dedupe=False,
+    mutation_rate=0.02,
+    adaptive_mutation=False,
+):
+    """
+    solver: "ga" (ค่าเริ่ม) หรือ "sa" (simulated annealing บนตารางเดียว ดู simulated_annealing)
+            ตัวเลือกของ GA (islands, generations, local_search_*) ใช้กับ "ga" เท่านั้น
+    sa_iterations: จำนวน iteration ของ SA (ค่าเริ่ม 20000 เมื่อไม่มี time_budget_sec)
+    seeding: "greedy" (ค่าเริ่ม) = วางตามลำดับยีนคงที่แบบเดิม
+             "dsatur" = ตารางตั้งต้นสร้างด้วย DSATUR บน conflict graph + variant สุ่ม
+    backtrack_depth / backtrack_nodes: bounded backtracking ตอนสร้างตาราง (ดู GAEngine)
+                                       ถอนยีนที่ขวางได้ไม่เกิน depth ตัว, งบ nodes ตัวเลือกต่อตาราง
+                                       (backtrack_depth=0 = ปิด)
+    crossover: "onepoint" (ค่าเริ่ม แบบเดิม) / "uniform" / "segment" — วิธีผสมพันธุ์ของ GA
+               (ดู GAEngine.crossover)
+    crossover_repair: True = วางยีนที่ชนกันของลูกใหม่ทันทีหลังผสม (GAEngine.repair)
+                      ค่าเริ่มปิด: ลูกที่ซ่อมแล้วชนน้อยลงมาก แต่ selection แบบ elite คัดลูกที่ชนทิ้งอยู่แล้ว
+                      ผลสุดท้ายจึงเท่าเดิมขณะที่แต่ละรุ่นช้าลง 1.5–3 เท่า (คุ้มกับ selection แบบอื่น)
+    selection: "elite" (ค่าเริ่ม แบบเดิม) / "sharing" / "tournament" (ขนาด tournament_size) / "rank"
+    dedupe: True = ตัดตัวที่ genome ซ้ำออกทุกรุ่น (ดู Island, ค่าเริ่มปิด)
+            response มี "diversity" ของรุ่นสุดท้าย
+    mutation_rate: rate ตั้งต้นของ mutate / adaptive_mutation: True = ปรับ rate ตามความคืบหน้า
+                   ใส่ immigrants และ partial restart เมื่อ best ไม่ดีขึ้น (ดู Island, ค่าเริ่มปิด)
+    precheck: True = ตรวจความเป็นไปได้ (analyze_feasibility) ก่อน ถ้าห้อง/อาจารย์ไม่พอจะคืน error
+              ทันที; False = ข้ามไปจัดแบบดีที่สุดเท่าที่ทำได้ (ได้ NO_VALID_TIME / ชนกันบางส่วน)
+    curriculum_hours: {หลักสูตร: ((วัน, ชั่วโมงแรก, ชั่วโมงสุดท้าย), ...)} แทน CURRICULUM_HOURS
+    seed: ทำให้ผลลัพธ์ซ้ำได้ / workers: > 1 = เปิดโหมดขนาน (ProcessPoolExecutor)
+             คุ้มเมื่องานต่อ worker ใหญ่พอ: rounds > 1 หรือ islands > 1 (ขนานทั้งรอบ/ทั้งเกาะ)
+             และการสร้าง population ตั้งต้น; population เดียวจะสร้างลูกขนานเมื่อ
+             pop_size - 5 ≥ workers × PARALLEL_MIN_CHILDREN (เช่น pop_size ≥ 69 กับ workers=2)
+             ไม่งั้นสร้างในเครื่องเดียวเพราะ overhead ต่อรุ่นมากกว่างานสร้างลูก
+    pop_size: ขนาด population ของ GA (ต่อเกาะเมื่อ islands > 1, ค่าเริ่ม 30)
+    islands: > 1 = ใช้ island model (ดู island_genetic_algorithm) แทน population เดียว
+    rounds: > 1 = multi-start รันหลายรอบอิสระ (ขนานตาม workers) แล้วเลือกรอบที่ดีที่สุด
+            response มีสถิติรายรอบใน "rounds" และ "average_fitness"
+    time_budget_sec: โหมด anytime — คืนตารางที่ดีที่สุดเมื่อหมดงบเวลา (วินาที)
+                     ถ้าไม่กำหนด generations จะไม่จำกัดจำนวนรุ่น
+    generations: จำนวนรุ่นสูงสุด (ค่าเริ่ม 300 เมื่อไม่มี time_budget_sec)
+    target_fitness / stop_on_feasible: หยุดทันทีเมื่อถึงคะแนนเป้าหมาย / ไม่มี hard conflict
+    local_search_steps: > 0 = เปิดขั้น memetic (hill-climbing move/swap) บน elite
+                        local_search_elites ตัวทุกรุ่น จำนวนครั้งที่ลองต่อตัว
+    response มี "generations" (จำนวนรุ่นที่วิวัฒน์ไปของรอบที่ดีที่สุด) และ "stop_reason"
+    """
+    try:
+        # -------------------- Load data --------------------
+        course_df, room_df, locked_df, locked_activity_df, timeslot_df = data_loader()
 
-            return best_individual_overall 
+        # ---------------- Compile โจทย์ของรอบนี้ (ไม่มี global) ----------------
+        problem = build_problem_instance(
+            course_df, room_df, locked_df, locked_activity_df, timeslot_df,
+            curriculum_hours=curriculum_hours,
+        )
+        cal = problem.calendar
 
+        if precheck:
+            report = precheck_capacity_or_raise(problem)
+            print(f"Feasibility precheck passed ({report.elapsed_sec * 1000:.1f} ms)")
 
+        # ---------------- GA engine (ข้อมูลคงที่ของรอบ) ----------------
+        engine = GAEngine(
+            problem, backtrack_depth=backtrack_depth, backtrack_nodes=backtrack_nodes,
+            crossover_mode=crossover, crossover_repair=crossover_repair,
+        )
 
         def save_schedule(schedule, write_csv=False, out_path="schedule.csv"):
             rows = []
-            for cls in schedule:
-                for t in cls["time"]:
-                    day = t.split("_")[0] if "_" in t else "N/A"
-                    hour = (
-                        int(t.split("_")[1])
-                        if "_" in t and t.split("_")[1].isdigit()
-                        else None
-                    )
+            for cls in engine.decode(schedule):
+                for i, t in enumerate(cls["time"]):
+                    # แปลง slot id กลับเป็นสตริงเฉพาะตอนบันทึกผล
+                    if t == NO_SLOT:
+                        t, day, hour = f"NO_VALID_TIME_{i}", "NO", None
+                    else:
+                        day, hour = cal.day_of[t], cal.hour_of[t]
+                        t = cal.labels[t]
                     rows.append(
                         {
                             "Course_Code": cls["course"],
@@ -1084,48 +3478,75 @@ def run_genetic_algorithm(data_loader, write_csv=False, return_df=False):
                 print(f"✅ บันทึกไฟล์ {out_path} แล้ว")
             return df
 
-        # ---------------- Run GA (3 rounds) ----------------
-        best_schedules = []
-        durations = []
+        # ---------------- Run GA (rounds รอบ, ขนานได้) ----------------
+        stop_options = {
+            "time_budget_sec": time_budget_sec,
+            "target_fitness": target_fitness,
+            "stop_on_feasible": stop_on_feasible,
+            "seeding": seeding,
+        }
+        if solver == "sa":
+            if sa_iterations is None and time_budget_sec is None:
+                sa_iterations = 20000
+            ga_options = dict(stop_options, solver="sa", iterations=sa_iterations)
+        else:
+            if generations is None and time_budget_sec is None:
+                generations = 300
+            ga_options = dict(
+                stop_options,
+                solver=solver,
+                pop_size=pop_size,
+                generations=generations,
+                islands=islands,
+                migration_interval=migration_interval,
+                migrants=migrants,
+                local_search_steps=local_search_steps,
+                local_search_elites=local_search_elites,
+                selection=selection,
+                tournament_size=tournament_size,
+                dedupe=dedupe,
+                mutation_rate=mutation_rate,
+                adaptive=adaptive_mutation,
+            )
 
         print("Start Round")
         t0 = _time.perf_counter()
-        best = genetic_algorithm(pop_size=30, generations=300)
+        if rounds and rounds > 1:
+            best_schedules = multi_start_genetic_algorithm(
+                engine, rounds, seed=seed, workers=workers, **ga_options
+            )
+        else:
+            best, info = run_solver_round(
+                engine, seed=seed, workers=workers, **ga_options
+            )
+            best_schedules = [
+                {
+                    "round": 1,
+                    "seed": seed,
+                    "fitness": best.fitness,
+                    "generations": info["generations"],
+                    "stop_reason": info["stop_reason"],
+                    "diversity": info.get("diversity"),
+                    "duration_sec": _time.perf_counter() - t0,
+                    "best_schedule": best,
+                }
+            ]
         t1 = _time.perf_counter()
-        durations.append(t1 - t0)
-        fit = fitness(best)
-        best_schedules.append({"best_schedule": best, "fitness": fit})
-
-        # ===============================================================================
-
-        # for i in range(10):
-        #     print(f"🔁 Round {i+1}/10")
-        #     t0 = _time.perf_counter()
-        #     # เรียกใช้ Genetic Algorithm
-        #     best = genetic_algorithm(pop_size=30, generations=500)
-        #     t1 = _time.perf_counter()
-        #     durations.append(t1 - t0)
-        #     # คำนวณ fitness จาก best schedule
-        #     fit = fitness(best) 
-            
-        #     # เก็บข้อมูล
-        #     best_schedules.append({
-        #         "round": i + 1,
-        #         "best_schedule": best,
-        #         "fitness": fit
-        #     })
-        
 
-        # #เรียงลำดับจาก fitness มาก → น้อย
-        # best_schedules.sort(key=lambda x: x["fitness"], reverse=True)
-        # average_fitness = sum(s["fitness"] for s in best_schedules) / len(best_schedules)
-        # print("Average fitness:", average_fitness)
-        # for s in best_schedules:
-        #     print(f"Round {s['round']}: fitness = {s['fitness']}")
+        round_stats = [
+            {k: v for k, v in s.items() if k != "best_schedule"} for s in best_schedules
+        ]
+        average_fitness = sum(s["fitness"] for s in best_schedules) / len(best_schedules)
+        if len(best_schedules) > 1:
+            print("Average fitness:", average_fitness)
+            for s in round_stats:
+                print(
+                    f"Round {s['round']}: fitness = {s['fitness']}"
+                    f" ({s['duration_sec']:.2f}s)"
+                )
 
-        # ===============================================================================
-        
-        #ดึงตัวที่ดีที่สุด
+        #เรียงลำดับจาก fitness มาก → น้อย แล้วดึงตัวที่ดีที่สุด
+        best_schedules.sort(key=lambda x: x["fitness"], reverse=True)
         best_schedule = best_schedules[0]["best_schedule"]
 
         #ส่งไปยัง save_schedule
@@ -1136,8 +3557,17 @@ def run_genetic_algorithm(data_loader, write_csv=False, return_df=False):
             "message": "สร้างตารางสำเร็จ",
             "total_entries": len(final_df),
             "fitness_score": best_schedules[0]["fitness"],
-            "total_time_sec": sum(durations),
+            "solver": solver,
+            "generations": best_schedules[0]["generations"],
+            "stop_reason": best_schedules[0]["stop_reason"],
+            "total_time_sec": t1 - t0,
         }
+        if best_schedules[0]["diversity"] is not None:
+            resp["diversity"] = best_schedules[0]["diversity"]
+        if len(best_schedules) > 1:
+            resp["best_round"] = best_schedules[0]["round"]
+            resp["average_fitness"] = average_fitness
+            resp["rounds"] = round_stats
         if write_csv:
             resp["file_path"] = "schedule.csv"
         if return_df:
@@ -1147,8 +3577,11 @@ def run_genetic_algorithm(data_loader, write_csv=False, return_df=False):
     except Exception as e:
         return {"status": "error", "message": f"เกิดข้อผิดพลาด: {str(e)}"}
 
-def run_genetic_algorithm_from_db():
-    """รัน GA โดยใช้ข้อมูลจาก Django ORM — ไม่อ่าน/เขียน CSV เลย"""
+def run_genetic_algorithm_from_db(**ga_options):
+    """
+    รัน GA โดยใช้ข้อมูลจาก Django ORM — ไม่อ่าน/เขียน CSV เลย
+    ga_options ส่งต่อให้ run_genetic_algorithm (เช่น seed=..., workers=..., pop_size=...)
+    """
     from django.db import transaction
     from .models import (
         CourseSchedule,
@@ -1182,7 +3615,6 @@ def run_genetic_algorithm_from_db():
             return 1
 
     # ----- ORM -> DataFrames -----
-    room_qs = Room.objects.select_related('room_type').all()
     room_df = pd.DataFrame([{
         "room_name": r.name,
         "room_type": r.room_type.name if r.room_type else ""
@@ -1242,7 +3674,9 @@ def run_genetic_algorithm_from_db():
     def loader():
         return course_df, room_df, locked_df, locked_activity_df, time_df
 
-    result = run_genetic_algorithm(loader, write_csv=False, return_df=True)
+    result = run_genetic_algorithm(
+        loader, write_csv=False, return_df=True, **ga_options
+    )
     final_df = result.pop("final_df", pd.DataFrame())
     
     # ----- เขียนเข้า ScheduleInfo -----
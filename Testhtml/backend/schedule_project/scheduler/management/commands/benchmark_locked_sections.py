@@ -0,0 +1,182 @@
+from django.core.management.base import BaseCommand
+import numpy as np
+import pandas as pd
+import json
+import random
+import time
+
+from scheduler.main import normalize_locked_sections
+
+
+def normalize_locked_sections_loop(locked_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    เวอร์ชันเดิมแบบวนลูป (ไว้เทียบผล/เวลากับ normalize_locked_sections ใน scheduler.main)
+    กติกาเดียวกันทุกประการ:
+    - นับ section ต่อ 'subject_code' (ไม่แยกภาคปกติ/พิเศษ)
+    - ครูคนเดียวกัน + วิชาเดียวกัน:
+        * ถ้าเป็น theory + lab  (type ต่างกัน) => อยู่ 'sec เดียวกัน'
+        * ถ้าเป็น theory ซ้ำหลายแถว (type เดียวกัน) => เปิด 'sec ใหม่' ตามจำนวน
+        * ถ้าเป็น lab-only (ไม่มี theory) => รวมเป็น 'sec เดียว'
+    - ครูคนละคน (ในวิชาเดียวกัน) => เปิด sec ใหม่ตามลำดับที่พบ
+    """
+    if locked_df is None or locked_df.empty:
+        return locked_df
+
+    df = locked_df.copy()
+    df.columns = df.columns.str.strip()
+
+    # ---- เตรียมคอลัมน์ 'type' ให้พร้อม ----
+    if "type" not in df.columns:
+        # รองรับฟอร์แมตเก่า (theory_slot/lab_slot)
+        th = df.get("theory_slot")
+        lb = df.get("lab_slot")
+        if th is None and lb is None:
+            raise ValueError(
+                "locked_df ไม่มีคอลัมน์ type หรือ theory_slot/lab_slot ให้ระบุชนิดคลาส"
+            )
+        df["type"] = df.apply(
+            lambda r: (
+                "lab"
+                if int(r.get("lab_slot") or 0) > 0
+                and int(r.get("theory_slot") or 0) == 0
+                else "theory"
+            ),
+            axis=1,
+        )
+    else:
+        df["type"] = df["type"].astype(str).str.lower().str.strip()
+
+    # ---- เตรียมชื่ออาจารย์ให้เป็นมาตรฐาน (ถ้ามี normalize_teacher) ----
+    def _norm_teacher(x):
+        s = str(x).strip()
+        return s
+
+    df["teacher_norm"] = df.get("teacher_name", "").map(_norm_teacher)
+
+    # ---- สร้างคอลัมน์ section (ค่าเริ่ม 0) ----
+    df["section"] = 0
+
+    # ---- เดินทีละวิชา (subject_code) และจัดเลข sec ตามกติกา ----
+    # ใช้อินเด็กซ์เดิมเพื่อคงลำดับที่ผู้ใช้กรอก
+    for subject_code, g in df.groupby("subject_code", sort=False):
+        sec_counter = 0
+
+        # เดินตาม "ครู" ในลำดับที่ปรากฏในไฟล์
+        teachers_in_order = g.drop_duplicates(subset=["teacher_norm"])[
+            "teacher_norm"
+        ].tolist()
+
+        for teacher in teachers_in_order:
+            mask_teacher = (df["subject_code"] == subject_code) & (
+                df["teacher_norm"] == teacher
+            )
+
+            idx_theory = df.index[mask_teacher & (df["type"] == "theory")].tolist()
+            idx_lab = df.index[mask_teacher & (df["type"] == "lab")].tolist()
+
+            if len(idx_theory) > 0:
+                # สร้าง sec ใหม่ตามจำนวน 'theory' ที่พบ (theory ซ้ำ = คนละ sec)
+                sec_ids_for_this_teacher = []
+                for idx in idx_theory:
+                    sec_counter += 1
+                    df.at[idx, "section"] = sec_counter
+                    sec_ids_for_this_teacher.append(sec_counter)
+
+                # แนบ lab ทั้งหมด (ถ้ามี) เข้ากับ 'sec แรก' ของครูคนนี้
+                if len(idx_lab) > 0:
+                    first_sec = sec_ids_for_this_teacher[0]
+                    for idx in idx_lab:
+                        df.at[idx, "section"] = first_sec
+            else:
+                # ไม่มี theory เลย แต่มี lab → รวม lab เป็น sec เดียว
+                if len(idx_lab) > 0:
+                    sec_counter += 1
+                    for idx in idx_lab:
+                        df.at[idx, "section"] = sec_counter
+
+        # ปิดกลุ่ม: ถ้าเผื่อมีแถวไหนยังไม่ได้ section (กรณีพิเศษ) ให้กันรันตก
+        unassigned = df.index[
+            (df["subject_code"] == subject_code) & (df["section"] == 0)
+        ].tolist()
+        if unassigned:
+            for idx in unassigned:
+                sec_counter += 1
+                df.at[idx, "section"] = sec_counter
+
+    # เก็บงาน: ไม่ต้องใช้คอลัมน์ช่วยแล้ว
+    df.drop(columns=["teacher_norm"], inplace=True)
+
+    # ให้ section เป็น int ชัดเจน
+    df["section"] = df["section"].astype(int)
+
+    return df
+
+
+def random_locked_df(rows, rng):
+    """สุ่ม locked_df (รูปแบบเดียวกับ PreSchedule) ที่มีวิชา/ครูซ้ำกันเยอะ ๆ"""
+    subjects = [f"ENGCE{100 + i}" for i in range(max(rows // 6, 1))]
+    teachers = [f"อ.ครู{i}" for i in range(max(rows // 10, 2))]
+    types = ["theory", "lab", "Theory ", "LAB", "other"]
+    data = []
+    for _ in range(rows):
+        data.append({
+            "subject_code": rng.choice(subjects),
+            "subject_name": "",
+            "teacher_name": rng.choice(teachers) + rng.choice(["", " "]),
+            "curriculum_type": rng.choice(["ภาคปกติ", "ภาคพิเศษ"]),
+            "type": rng.choices(types, weights=[6, 4, 1, 1, 1])[0],
+            "room_name": "",
+            "day": rng.choice(["จันทร์", "อังคาร", "เสาร์"]),
+            "start_time": 8,
+            "stop_time": 11,
+        })
+    return pd.DataFrame(data)
+
+
+class Command(BaseCommand):
+    help = 'Check normalize_locked_sections against the loop version on random inputs and time both'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[50, 200, 1000])
+        parser.add_argument('--trials', type=int, default=20, help='จำนวนชุดสุ่มต่อขนาด (เช็กผลเท่ากัน)')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        results = []
+        for rows in options['rows']:
+            mismatches = 0
+            loop_sec = fast_sec = 0.0
+            for _ in range(options['trials']):
+                df = random_locked_df(rows, rng)
+                if rng.random() < 0.3:
+                    # ฟอร์แมตเก่า: ไม่มีคอลัมน์ type ใช้ theory_slot/lab_slot แทน
+                    df = df.drop(columns=['type'])
+                    df['theory_slot'] = [rng.choice([0, 2, 3]) for _ in range(rows)]
+                    df['lab_slot'] = [rng.choice([0, 2]) for _ in range(rows)]
+
+                t0 = time.perf_counter()
+                expected = normalize_locked_sections_loop(df)
+                t1 = time.perf_counter()
+                got = normalize_locked_sections(df)
+                t2 = time.perf_counter()
+                loop_sec += t1 - t0
+                fast_sec += t2 - t1
+
+                same = (
+                    list(expected.columns) == list(got.columns)
+                    and np.array_equal(expected['section'].to_numpy(), got['section'].to_numpy())
+                    and expected['type'].equals(got['type'])
+                )
+                mismatches += 0 if same else 1
+
+            results.append({
+                "rows": rows,
+                "trials": options['trials'],
+                "mismatches": mismatches,
+                "loop_ms": round(loop_sec / options['trials'] * 1000, 2),
+                "vectorized_ms": round(fast_sec / options['trials'] * 1000, 2),
+            })
+
+        status = "success" if all(r["mismatches"] == 0 for r in results) else "error"
+        self.stdout.write(json.dumps({"status": status, "results": results}, ensure_ascii=False))
@@ -1,3 +1,624 @@
-from django.test import TestCase
+"""
+เทสของ engine จัดตาราง (scheduler.main)
+ใช้ unittest.TestCase ล้วน: engine ไม่แตะฐานข้อมูล จึงรันได้โดยไม่ต้องมี MySQL
+    python -m unittest scheduler.tests   (จากโฟลเดอร์ schedule_project)
+"""
+import contextlib
+import io
+import random
+import unittest
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+
+from scheduler.main import (
+    CURRICULUM_HOURS,
+    IMMIGRANT_SHARE,
+    IMMIGRANT_STALL,
+    MAX_MUTATION_RATE,
+    NO_SLOT,
+    RESTART_STALL,
+    Construction,
+    GAEngine,
+    Individual,
+    Island,
+    analyze_feasibility,
+    build_problem_instance,
+    genetic_algorithm,
+    island_genetic_algorithm,
+    normalize_locked_sections,
+    precheck_capacity_or_raise,
+    seed_jobs,
+    simulated_annealing,
+)
+from scheduler.management.commands.benchmark_locked_sections import (
+    normalize_locked_sections_loop,
+    random_locked_df,
+)
+
+WEEKDAYS = ["จันทร์", "อังคาร", "พุธ", "พฤหัสบดี", "ศุกร์"]
+
+
+def make_data(extra_courses=()):
+    """
+    โจทย์ขนาดเล็กแบบเดียวกับที่ data_loader คืน: (course, room, locked, activity, timeslot)
+    extra_courses: แถวของ course_df เพิ่มเติม (dict)
+    """
+    courses = [
+        ("CS101", "Programming", "อ.เอ", "lecture", 3, 2, "ภาคปกติ"),
+        ("CS102", "Data Structures", "อ.เอ", "lecture", 3, 0, "ภาคปกติ"),
+        ("CS201", "Databases", "อ.บี", "lecture", 2, 2, "ภาคปกติ"),
+        ("CS202", "Networks", "อ.บี", "lecture", 3, 0, "ภาคปกติ"),
+        ("CS301", "Operating Systems", "อ.ซี", "lecture", 3, 3, "ภาคปกติ"),
+        ("CS302", "Compilers", "อ.ดี", "lecture", 2, 0, "ภาคปกติ"),
+        ("CS401", "Web Programming", "อ.ดี", "lab", 0, 3, "ภาคพิเศษ"),
+        ("CS402", "Mobile Apps", "อ.ซี", "lecture", 3, 0, "ภาคพิเศษ"),
+    ]
+    course_df = pd.DataFrame(
+        [
+            dict(
+                subject_code=code, subject_name=name, teacher_name=teacher,
+                room_type=room_type, theory_slot=theory, lab_slot=lab,
+                section_count=1, curriculum_type=curriculum,
+            )
+            for code, name, teacher, room_type, theory, lab, curriculum in courses
+        ]
+        + list(extra_courses)
+    )
+    room_df = pd.DataFrame(
+        [
+            dict(room_name="R101", room_type="lecture"),
+            dict(room_name="R102", room_type="lecture"),
+            dict(room_name="LAB1", room_type="lab"),
+        ]
+    )
+    locked_df = pd.DataFrame(
+        [
+            dict(
+                subject_code="LOCK1", subject_name="Seminar", teacher_name="อ.เอ",
+                curriculum_type="ภาคปกติ", room_name="R101", room_type="lecture",
+                type="theory", hours=2, section=1, day="จันทร์", start_time=9, stop_time=11,
+            )
+        ]
+    )
+    activity_df = pd.DataFrame(
+        [dict(activity_name="Meeting", day="พุธ", start_time=12, stop_time=13)]
+    )
+    timeslot_df = pd.DataFrame(
+        [dict(day_of_week=d, start_time=8, stop_time=21) for d in WEEKDAYS]
+        + [dict(day_of_week="เสาร์", start_time=8, stop_time=17)]
+    )
+    return course_df, room_df, locked_df, activity_df, timeslot_df
+
+
+def make_engine(**options):
+    return GAEngine(build_problem_instance(*make_data()), **options)
+
+
+def overloaded_data():
+    """make_data + แล็บ 25 sec × 3 ชม. ที่ห้อง lab ห้องเดียวรับไม่ไหว (บางยีนต้องเป็น NO_SLOT)"""
+    big_lab = dict(
+        subject_code="CS900", subject_name="Big Lab", teacher_name="อ.อี",
+        room_type="lab", theory_slot=0, lab_slot=3, section_count=25,
+        curriculum_type="ภาคปกติ",
+    )
+    return make_data([big_lab])
+
+
+def tight_data():
+    """
+    โจทย์ที่การวางตามลำดับยีนพลาด: วันเดียว (จันทร์ 17–21) อาจารย์ อ.ที สอน 2 วิชา
+    - EV301 บรรยาย 3 ชม. ภาคพิเศษ (ห้องบรรยาย 3 ห้อง, เริ่ม 17 หรือ 18 ได้) มาก่อนตาม LPT
+    - LB101 แล็บ 1 ชม. ภาคปกติ วางได้ที่เดียวคือ LAB1 17:00 (LAB1 18–20 ถูกล็อกไว้)
+    วาง EV301 ที่ 17–19 ก่อน → LB101 ไม่มีที่ลง; ที่ถูกคือ LB101 17:00 แล้ว EV301 18–20
+    """
+    course_df = pd.DataFrame(
+        [
+            dict(
+                subject_code="EV301", subject_name="Evening", teacher_name="อ.ที",
+                room_type="lecture", theory_slot=3, lab_slot=0, section_count=1,
+                curriculum_type="ภาคพิเศษ",
+            ),
+            dict(
+                subject_code="LB101", subject_name="Lab", teacher_name="อ.ที",
+                room_type="lab", theory_slot=0, lab_slot=1, section_count=1,
+                curriculum_type="ภาคปกติ",
+            ),
+        ]
+    )
+    room_df = pd.DataFrame(
+        [dict(room_name=name, room_type="lecture") for name in ("R1", "R2", "R3")]
+        + [dict(room_name="LAB1", room_type="lab")]
+    )
+    locked_df = pd.DataFrame(
+        [
+            dict(
+                subject_code="LOCK1", subject_name="Locked Lab", teacher_name="อ.ล็อก",
+                curriculum_type="ภาคปกติ", room_name="LAB1", room_type="lab",
+                type="lab", hours=2, section=1, day="จันทร์", start_time=18, stop_time=20,
+            )
+        ]
+    )
+    activity_df = pd.DataFrame(columns=["activity_name", "day", "start_time", "stop_time"])
+    timeslot_df = pd.DataFrame([dict(day_of_week="จันทร์", start_time=17, stop_time=21)])
+    return course_df, room_df, locked_df, activity_df, timeslot_df
+
+
+def legacy_fitness(engine, individual):
+    """
+    fitness แบบเดิม (ก่อนมี BatchFitness) บนรายการคลาสที่ decode แล้ว ใช้เป็นตัวเทียบผล
+    เวลาเป็นสตริง "วัน_ชั่วโมง" และชั่วโมงที่ใช้ได้มาจาก TimeSlot + ช่วงของหลักสูตร
+    """
+    cal = engine.calendar
+    blocked = {cal.labels[t] for t in engine.blocked_times}
+
+    def hours_for_day(day, curriculum_type):
+        windows = CURRICULUM_HOURS.get(curriculum_type, ())
+        return sorted(
+            h
+            for h in cal.time_slots.get(day, ())
+            if any(day in days and lo <= h <= hi for days, lo, hi in windows)
+        )
+
+    score = 0
+    used = {"teacher_time": set(), "room_time": set()}
+    for cls in engine.decode(individual):
+        curriculum_type = cls.get("curriculum_type", "ภาคปกติ")
+        labels = [
+            f"NO_VALID_TIME_{i}" if t == NO_SLOT else cal.labels[t]
+            for i, t in enumerate(cls["time"])
+        ]
+        for t in labels:
+            if "NO_VALID_TIME" in t:
+                score -= 1000
+                continue
+            if t in blocked:
+                score -= 1000
+            day, hour = t.split("_")
+            if int(hour) not in hours_for_day(day, curriculum_type):
+                score -= 50
+                continue
+            if cls.get("teacher"):
+                key = (cls["teacher"], t)
+                if key in used["teacher_time"]:
+                    score -= 1000
+                else:
+                    used["teacher_time"].add(key)
+                    score += 30
+            room = cls.get("room")
+            if room and room != "NO_VALID_ROOM":
+                key = (room, t)
+                if key in used["room_time"]:
+                    score -= 1000
+                else:
+                    used["room_time"].add(key)
+                    score += 30
+
+        valid = sorted(
+            (t for t in labels if "NO_VALID_TIME" not in t),
+            key=lambda x: (x.split("_")[0], int(x.split("_")[1])),
+        )
+        prev_day, prev_hour = None, None
+        for t in valid:
+            d, h = t.split("_")
+            h = int(h)
+            if prev_day == d and prev_hour is not None and h == prev_hour + 1:
+                score += 5
+            prev_day, prev_hour = d, h
+    return score
+
+
+def random_individual(engine, rng, clash=False):
+    """
+    chromosome สุ่ม (ไม่สนกติกา): บางยีนเป็น NO_SLOT / ไม่มีห้อง
+    clash=True: ทุกยีนอยู่ห้องแรกที่ slot เดียวกัน (ชนห้อง/อาจารย์เต็มที่)
+    """
+    n_slots = len(engine.calendar)
+    n_rooms = len(engine.room_names)
+    starts, rooms = [], []
+    for g in range(len(engine.genes)):
+        hours = int(engine.gene_hours[g])
+        if clash:
+            starts.append(0)
+            rooms.append(0)
+        elif rng.random() < 0.1:
+            starts.append(NO_SLOT)
+            rooms.append(-1)
+        else:
+            starts.append(rng.randrange(n_slots - hours + 1))
+            rooms.append(rng.randrange(-1, n_rooms))
+    return Individual(np.array(starts, dtype=np.int32), np.array(rooms, dtype=np.int16))
+
+
+def assert_no_double_booking(test, engine, individual):
+    """ไม่มีห้อง/อาจารย์ถูกจองซ้ำใน slot เดียวกัน (นับรวมของที่ล็อก)"""
+    occupancy = engine.occupancy_of(individual)
+    test.assertLessEqual(int(occupancy.room_busy.max(initial=0)), 1)
+    test.assertLessEqual(int(occupancy.teacher_busy.max(initial=0)), 1)
+
+
+def quiet():
+    """ซ่อน log รายรุ่นของ GA ระหว่างเทส"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+class IslandTests(unittest.TestCase):
+    def test_elite_selection_survives_single_unique_elite(self):
+        # population ที่เป็นตัวซ้ำทั้งหมด + dedupe → เหลือ elite ตัวเดียว (ต้องไม่ crash)
+        engine = make_engine()
+        ind = engine.create_population(seed_jobs(random.Random(0), 1))[0]
+        population = [ind.copy() for _ in range(6)]
+        island = Island(population, random.Random(1), selection="elite", dedupe=True)
+        with quiet():
+            self.assertTrue(island.step(engine))
+        self.assertEqual(len(island.population), 6)
+
+    def test_zero_generations_returns_initial_best(self):
+        engine = make_engine()
+        with quiet():
+            for run in (genetic_algorithm, island_genetic_algorithm):
+                best, info = run(engine, 6, 0, seed=2)
+                self.assertIsNotNone(best)
+                self.assertEqual(info["generations"], 0)
+                self.assertEqual(best.fitness, engine.evaluator.score([best])[0])
+
+    def test_sharing_penalizes_clones(self):
+        # ตัวซ้ำ 40 ตัวอยู่อันดับต้น: rank เลือกพวกนี้เป็นส่วนใหญ่ ส่วน sharing หารด้วย niche count
+        engine = make_engine()
+        rng = random.Random(0)
+        clone = engine.create_population(seed_jobs(rng, 1))[0]
+        others = [engine.mutate(clone, rate=0.5, rng=rng) for _ in range(40)]
+        share = {}
+        for selection in ("rank", "sharing"):
+            picks = []
+
+            def make_children(parents, jobs, rate):
+                picks.extend(
+                    np.array_equal(parents[i].starts, clone.starts)
+                    for job in jobs
+                    for i in job[:2]
+                )
+                return engine.make_children(parents, jobs, rate)
+
+            population = [clone.copy() for _ in range(40)] + [ind.copy() for ind in others]
+            island = Island(population, random.Random(1), selection=selection)
+            with quiet():
+                island.step(engine, make_children=make_children)
+            share[selection] = np.mean(picks)
+            self.assertLessEqual(island.diversity["unique"], 41)
+        self.assertGreater(share["rank"], 0.5)
+        self.assertLess(share["sharing"], share["rank"] / 4)
+
+    def test_tournament_and_rank_pick_valid_pairs(self):
+        engine = make_engine()
+        population = engine.create_population(seed_jobs(random.Random(0), 12))
+        for selection in ("tournament", "rank"):
+            pairs = []
+
+            def make_children(parents, jobs, rate):
+                pairs.extend(job[:2] for job in jobs)
+                return engine.make_children(parents, jobs, rate)
+
+            island = Island(
+                [ind.copy() for ind in population], random.Random(1), selection=selection
+            )
+            with quiet():
+                island.step(engine, make_children=make_children)
+            self.assertEqual(len(pairs), 12 - 5)
+            for i1, i2 in pairs:
+                self.assertNotEqual(i1, i2)
+                self.assertTrue(0 <= i1 < 12 and 0 <= i2 < 12)
+            weights = None if selection == "tournament" else [1.0]
+            self.assertEqual(island._pick_pair(1, weights), (0, 0))
+
+    def test_adaptive_rate_rises_on_stall_and_decays_on_improvement(self):
+        engine = make_engine()
+        population = engine.create_population(seed_jobs(random.Random(0), 6))
+        island = Island(population, random.Random(1), mutation_rate=0.02, adaptive=True)
+        immigrants = round(25 * IMMIGRANT_SHARE)
+
+        island.break_point = IMMIGRANT_STALL
+        self.assertEqual(island._adapt(25), immigrants)
+        self.assertAlmostEqual(island.rate, 0.04)
+        island.break_point = 2 * IMMIGRANT_STALL
+        self.assertEqual(island._adapt(25), immigrants)
+        self.assertAlmostEqual(island.rate, 0.08)
+        island.break_point = 2 * IMMIGRANT_STALL + 1
+        self.assertEqual(island._adapt(25), 0)
+        self.assertAlmostEqual(island.rate, 0.08)
+
+        # best ดีขึ้น → ลดครึ่งทีละรุ่นจนกลับมาที่ mutation_rate
+        island.break_point = 0
+        for expected in (0.04, 0.02, 0.02):
+            self.assertEqual(island._adapt(25), 0)
+            self.assertAlmostEqual(island.rate, expected)
+
+        # ไม่ดีขึ้นนาน ๆ (ข้ามรุ่นที่เป็น partial restart) → rate ชนเพดาน
+        for k in (1, 2, 3, 5, 7):
+            island.break_point = k * IMMIGRANT_STALL
+            island._adapt(25)
+        self.assertAlmostEqual(island.rate, MAX_MUTATION_RATE)
+
+        island.break_point = RESTART_STALL
+        with quiet():
+            self.assertEqual(island._adapt(25), 25)
+        self.assertAlmostEqual(island.rate, 0.02)
+        self.assertEqual(island.restarts, 1)
+
+    def test_immigrants_and_restart_keep_population_size(self):
+        # ลูกทุกตัวเป็นสำเนาของ elite ตัวท้าย → best ไม่ดีขึ้นเลย break_point นับขึ้นทุกรุ่น
+        engine = make_engine()
+        population = engine.create_population(seed_jobs(random.Random(0), 30))
+        island = Island(population, random.Random(1), adaptive=True)
+        fresh = []
+
+        def make_children(parents, jobs, rate):
+            return [parents[-1].copy() for _ in jobs]
+
+        def create_population(jobs, seeding):
+            fresh.append((island.break_point, len(jobs)))
+            return engine.create_population(jobs, seeding)
+
+        with quiet():
+            for _ in range(RESTART_STALL + 1):
+                self.assertTrue(
+                    island.step(
+                        engine, make_children=make_children, create_population=create_population
+                    )
+                )
+                self.assertEqual(len(island.population), 30)
+        immigrants = round(25 * IMMIGRANT_SHARE)
+        self.assertEqual(
+            fresh,
+            [(k * IMMIGRANT_STALL, immigrants) for k in (1, 2, 3)] + [(RESTART_STALL, 25)],
+        )
+        self.assertEqual(island.restarts, 1)
+
+
+class FitnessTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = make_engine()
+        self.rng = random.Random(0)
+
+    def population(self):
+        built = self.engine.create_population(seed_jobs(self.rng, 4))
+        randoms = [random_individual(self.engine, self.rng) for _ in range(20)]
+        return built + randoms + [random_individual(self.engine, self.rng, clash=True)]
+
+    def test_batch_fitness_matches_legacy_fitness(self):
+        population = self.population()
+        expected = [legacy_fitness(self.engine, ind) for ind in population]
+        self.assertEqual(self.engine.evaluator.score(population), expected)
+
+    def test_evaluate_scores_clones_once(self):
+        population = self.population()
+        population += [ind.copy() for ind in population[:5]]
+        unique = len({(ind.starts.tobytes(), ind.rooms.tobytes()) for ind in population})
+        for ind in population:
+            ind.invalidate()
+        before = self.engine.evaluator.evaluations
+        scores = self.engine.evaluator.evaluate(population)
+        self.assertEqual(scores, [legacy_fitness(self.engine, ind) for ind in population])
+        self.assertEqual(self.engine.evaluator.evaluations - before, unique)
+
+    def test_score_state_moves_match_legacy_fitness(self):
+        ev = self.engine.evaluator
+        for ind in (
+            random_individual(self.engine, self.rng),
+            random_individual(self.engine, self.rng, clash=True),
+        ):
+            state = ev.state(ind)
+            self.assertEqual(state.score, legacy_fitness(self.engine, ind))
+            for step in range(200):
+                other = random_individual(self.engine, self.rng, clash=step % 3 == 0)
+                g = self.rng.randrange(len(self.engine.genes))
+                state.move(
+                    ev.n_locked + g,
+                    int(other.rooms[g]),
+                    ev.gene_times(g, int(other.starts[g])),
+                )
+                current = Individual(state.starts.copy(), state.gene_rooms.copy())
+                self.assertEqual(state.score, legacy_fitness(self.engine, current))
+
+
+class ConstructionTests(unittest.TestCase):
+    def test_backtracking_places_gene_that_greedy_leaves_unplaced(self):
+        problem = build_problem_instance(*tight_data())
+        greedy = GAEngine(problem, backtrack_depth=0).create_individual(random.Random(0))
+        self.assertEqual(int((greedy.starts == NO_SLOT).sum()), 1)
+
+        engine = GAEngine(problem, backtrack_depth=2)
+        ind = engine.create_individual(random.Random(0))
+        self.assertNotIn(NO_SLOT, ind.starts.tolist())
+        assert_no_double_booking(self, engine, ind)
+
+    def test_backtracking_never_double_books(self):
+        problem = build_problem_instance(*overloaded_data())
+        greedy = GAEngine(problem, backtrack_depth=0)
+        engine = GAEngine(problem, backtrack_depth=2, backtrack_nodes=200)
+        for seed in range(5):
+            before = greedy.create_individual(random.Random(seed))
+            ind = engine.create_individual(random.Random(seed))
+            assert_no_double_booking(self, engine, ind)
+            self.assertLessEqual(
+                int((ind.starts == NO_SLOT).sum()), int((before.starts == NO_SLOT).sum())
+            )
+
+    def test_rollback_matches_fresh_build(self):
+        engine = GAEngine(build_problem_instance(*overloaded_data()))
+        rng = random.Random(0)
+        build = Construction(engine)
+        for g in range(len(engine.genes)):
+            build.place(g, rng)
+        placed = np.flatnonzero(build.starts != NO_SLOT).tolist()
+
+        mark = build.mark()
+        for g in rng.sample(placed, 10):
+            room_id, start = int(build.rooms[g]), int(build.starts[g])
+            build.unassign(g)
+            if rng.random() < 0.5:
+                build.assign(g, room_id, start)
+            else:
+                build.place(g, rng)
+        build.rollback(mark)
+
+        fresh = Construction(engine)
+        for g in placed:
+            fresh.assign(g, int(build.rooms[g]), int(build.starts[g]))
+        for name in ("starts", "rooms", "room_owner", "teacher_owner"):
+            np.testing.assert_array_equal(getattr(build, name), getattr(fresh, name))
+        np.testing.assert_array_equal(build.pool.free, fresh.pool.free)
+        for name in ("room_busy", "teacher_busy", "room_load"):
+            np.testing.assert_array_equal(
+                getattr(build.occupancy, name), getattr(fresh.occupancy, name)
+            )
+
+
+class SeedingTests(unittest.TestCase):
+    def test_dsatur_places_most_constrained_gene_first(self):
+        # LB101 มีตัวเลือกเดียว (ต่อชั่วโมงน้อยสุด) ส่วน EV301 มี 6 → DSATUR ต้องวาง LB101 ก่อน
+        engine = GAEngine(build_problem_instance(*tight_data()), backtrack_depth=0)
+        lab = [c["name"] for c in engine.genes].index("LB101_sec1_lab")
+        self.assertEqual(int(np.argmin(engine.base_options / engine.gene_hours)), lab)
+        with mock.patch.object(
+            Construction, "place", autospec=True, side_effect=Construction.place
+        ) as place:
+            ind = engine.seed_individual(random.Random(0))
+        self.assertEqual([c.args[1] for c in place.call_args_list], [lab, 1 - lab])
+        self.assertNotIn(NO_SLOT, ind.starts.tolist())
+
+    def test_dsatur_leaves_no_more_unplaced_genes_than_greedy(self):
+        for data in (tight_data(), overloaded_data()):
+            engine = GAEngine(build_problem_instance(*data), backtrack_depth=0)
+            for seed in range(3):
+                greedy = engine.create_individual(random.Random(seed))
+                seeded = engine.seed_individual(random.Random(seed))
+                self.assertLessEqual(
+                    int((seeded.starts == NO_SLOT).sum()), int((greedy.starts == NO_SLOT).sum())
+                )
+
+
+class CrossoverTests(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        engine = make_engine()
+        # พ่อแม่ต่างกันแต่ไม่มีใครชนเลย
+        self.parents = [
+            engine.mutate(ind, rate=0.3, rng=rng)
+            for ind in engine.create_population(seed_jobs(rng, 8), "dsatur")
+        ]
+        for ind in self.parents:
+            assert_no_double_booking(self, engine, ind)
+        self.jobs = [rng.sample(range(8), 2) + [rng.getrandbits(64)] for _ in range(30)]
+
+    def test_repair_leaves_no_clash_that_parents_avoided(self):
+        for mode in ("uniform", "segment", "onepoint"):
+            engine = make_engine(crossover_mode=mode, crossover_repair=True)
+            for i1, i2, seed in self.jobs:
+                child = engine.crossover(self.parents[i1], self.parents[i2], random.Random(seed))
+                assert_no_double_booking(self, engine, child)
+
+    def test_repair_only_moves_clashing_genes(self):
+        raw_engine = make_engine(crossover_mode="uniform")
+        engine = make_engine(crossover_mode="uniform", crossover_repair=True)
+        n_locked = len(engine.all_locked_items)
+        locked = [
+            (it["room"], it.get("teacher"), list(it["time"])) for it in engine.all_locked_items
+        ]
+        for i1, i2, seed in self.jobs:
+            raw = raw_engine.crossover(self.parents[i1], self.parents[i2], random.Random(seed))
+            child = engine.crossover(self.parents[i1], self.parents[i2], random.Random(seed))
+            kept = np.setdiff1d(
+                np.arange(len(engine.genes)), engine.clashing_genes(raw.starts, raw.rooms)
+            )
+            np.testing.assert_array_equal(child.starts[kept], raw.starts[kept])
+            np.testing.assert_array_equal(child.rooms[kept], raw.rooms[kept])
+            # ของที่ล็อกไม่ใช่ยีน → ต้องออกมาเหมือนเดิมทุกตัว
+            decoded = engine.decode(child)[:n_locked]
+            self.assertEqual(
+                [(it["room"], it.get("teacher"), it["time"]) for it in decoded], locked
+            )
+
+
+class ParallelTests(unittest.TestCase):
+    def assertSameResult(self, a, b):
+        (best_a, info_a), (best_b, info_b) = a, b
+        np.testing.assert_array_equal(best_a.starts, best_b.starts)
+        np.testing.assert_array_equal(best_a.rooms, best_b.rooms)
+        self.assertEqual(best_a.fitness, best_b.fitness)
+        self.assertEqual(info_a, info_b)
+
+    def test_workers_do_not_change_genetic_algorithm_result(self):
+        # pop_size 70 → ลูก 65 ตัวต่อรุ่น พอให้ 2 worker ได้ ≥ PARALLEL_MIN_CHILDREN ตัว
+        engine = make_engine()
+        with quiet():
+            serial = genetic_algorithm(engine, 70, 3, seed=3, workers=0)
+            parallel = genetic_algorithm(engine, 70, 3, seed=3, workers=2)
+        self.assertSameResult(serial, parallel)
+
+    def test_workers_do_not_change_island_result(self):
+        engine = make_engine()
+        options = dict(islands=3, migration_interval=2, seed=4)
+        with quiet():
+            serial = island_genetic_algorithm(engine, 8, 6, workers=0, **options)
+            parallel = island_genetic_algorithm(engine, 8, 6, workers=2, **options)
+        self.assertSameResult(serial, parallel)
+
+
+class SimulatedAnnealingTests(unittest.TestCase):
+    def test_no_genes_returns_seeded_schedule(self):
+        course_df, room_df, locked_df, activity_df, timeslot_df = make_data()
+        engine = GAEngine(
+            build_problem_instance(
+                course_df.iloc[0:0], room_df, locked_df, activity_df, timeslot_df
+            )
+        )
+        self.assertEqual(len(engine.genes), 0)
+        best, info = simulated_annealing(engine, iterations=50, seed=1)
+        self.assertEqual(len(best), 0)
+        self.assertEqual(info["generations"], 0)
+
+
+class FeasibilityTests(unittest.TestCase):
+    def test_feasible_instance_passes(self):
+        report = analyze_feasibility(build_problem_instance(*make_data()))
+        self.assertTrue(report.ok)
+
+    def test_overloaded_lab_and_teacher_are_reported(self):
+        # แล็บ 25 sec × 3 ชม. = 75 ชม. ในห้อง lab ห้องเดียว (ภาคปกติ จ–ศ ได้ไม่ถึง 60 ชม.)
+        big_lab = dict(
+            subject_code="CS900", subject_name="Big Lab", teacher_name="อ.อี",
+            room_type="lab", theory_slot=0, lab_slot=3, section_count=25,
+            curriculum_type="ภาคปกติ",
+        )
+        problem = build_problem_instance(*make_data([big_lab]))
+        report = analyze_feasibility(problem)
+        self.assertFalse(report.ok)
+        self.assertEqual([rt[:3] for rt in report.room_types], [("lab", "ภาคปกติ", 75)])
+        self.assertEqual([t[:2] for t in report.teachers], [("อ.อี", 75)])
+        with self.assertRaises(RuntimeError):
+            precheck_capacity_or_raise(problem)
+
+
+class LockedSectionTests(unittest.TestCase):
+    def test_vectorized_matches_loop_version(self):
+        rng = random.Random(0)
+        for rows in (1, 7, 60, 300):
+            for old_format in (False, True):
+                df = random_locked_df(rows, rng)
+                if old_format:
+                    df = df.drop(columns=["type"])
+                    df["theory_slot"] = [rng.choice([0, 2, 3]) for _ in range(rows)]
+                    df["lab_slot"] = [rng.choice([0, 2]) for _ in range(rows)]
+                expected = normalize_locked_sections_loop(df)
+                got = normalize_locked_sections(df)
+                self.assertEqual(list(got.columns), list(expected.columns))
+                np.testing.assert_array_equal(
+                    got["section"].to_numpy(), expected["section"].to_numpy()
+                )
+                self.assertTrue(got["type"].equals(expected["type"]))
+
+    def test_empty_frame_is_returned_as_is(self):
+        df = pd.DataFrame(columns=["subject_code", "teacher_name", "type"])
+        self.assertIs(normalize_locked_sections(df), df)